@@ -1,30 +1,65 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
-import os, sys
+import os, sys, json
 from math import sqrt
 from math import pi
 import numpy as np
 from fnmatch import filter
+from OpenResult import openResult, openers
+
+# Record layout of a binary fire list (as EventLog in Macchiato.py), and the index marking the start of a simulation
+recordType = np.dtype([('ref', '<i8'), ('step', '<i8'), ('clock', '<f8'), ('trans', '<u4')])
+noTrans = 0xFFFFFFFF
+
+def readHeader(file):
+    # Offset of the records and transition labels of a binary fire list, leaving the file at the first record
+    offset = int.from_bytes(file.read(8)[4:], 'little')
+    labels = json.loads(file.read(offset - 8).decode('utf-8'))['labels']
+    return offset, labels
+
+def countBinary(path, tag):
+    # Firings matching tag in each simulation of a binary fire list (*.mfl)
+    with openResult(path, 'rb') as file:
+        offset, labels = readHeader(file)
+        if os.path.splitext(path)[1] in openers:
+            # Compressed records are read into memory
+            data = file.read()
+            records = np.frombuffer(data, dtype=recordType, count=len(data)//recordType.itemsize)
+    if os.path.splitext(path)[1] not in openers:
+        count = (os.path.getsize(path) - offset)//recordType.itemsize
+        if count:
+            records = np.memmap(path, dtype=recordType, mode='r', offset=offset, shape=(count,))
+        else:
+            records = np.zeros(0, dtype=recordType)
+    ids = [i for i, t in enumerate(labels) if len(filter([t], tag))]
+    # Each simulation begins with a record of no transition
+    starts = records['trans'] == noTrans
+    sims = np.cumsum(starts) - 1
+    return np.bincount(sims[np.isin(records['trans'], ids)], minlength=starts.sum()).tolist()
 
 def main():
     tag = sys.argv[2]
     total = 0
     count = []
     sim = None
-    with open(os.path.join(os.getcwd(), sys.argv[1]), 'r') as file:
-        for line in file:
-            if line.startswith('>'*5):
-                if sim is not None:
-                    count.append(sim)
-                sim = 0
-                continue
-            try:
-                if len(filter([line.split(',')[2]], tag)):
-                    sim += 1
-                    total += 1
-            except IndexError:
-                pass
-        count.append(sim)
+    if sys.argv[1].endswith(tuple(['.mfl'] + ['.mfl' + ext for ext in openers])):
+        count = countBinary(os.path.join(os.getcwd(), sys.argv[1]), tag)
+        total = sum(count)
+    else:
+        with openResult(os.path.join(os.getcwd(), sys.argv[1]), 'r') as file:
+            for line in file:
+                if line.startswith('>'*5):
+                    if sim is not None:
+                        count.append(sim)
+                    sim = 0
+                    continue
+                try:
+                    if len(filter([line.split(',')[2]], tag)):
+                        sim += 1
+                        total += 1
+                except IndexError:
+                    pass
+            count.append(sim)
     nSims = len(count)
     std = np.std(count)
     prop = np.sum([1 if cc else 0 for cc in count])/nSims
@@ -3,17 +3,18 @@
 import os
 import sys
 import glob
+from OpenResult import openResult, resultPath
 
 def main():
     """
     Extracts all final states of a given place in a directory sys.argv[1], indicated by its label given by sys.argv[2].
 
     """
-    nFiles = len(glob.glob1(os.path.join(os.getcwd(), sys.argv[1]),'Macchiato_PetriNet_Places_*.csv'))
+    nFiles = len(glob.glob1(os.path.join(os.getcwd(), sys.argv[1]),'Macchiato_PetriNet_Places_*.csv*'))
     print('\nDiscovered %d files to inspect in "%s".\n' % (nFiles, sys.argv[1]))
 
     pListLab = sys.argv[2].split(':')
-    searchP = open(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_1.csv'), 'r')
+    searchP = openResult(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_1.csv'), 'r')
     sp = 0
     pList = []
     for line in searchP:
@@ -39,14 +40,14 @@ def main():
 
     # places = sys.argv[2].split(':')
     # pList = places
-    ii = 0 if os.path.isfile(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_0.csv')) else 1
+    ii = 0 if os.path.isfile(resultPath(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_0.csv'))) else 1
     for p in range(len(pList)):
         ends = []
         place = pList[p]
         # placeN = int(place)
         for j in range(nFiles):
             i = j+ii
-            inFile = open(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_%d.csv' % i), 'r')
+            inFile = openResult(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_%d.csv' % i), 'r')
             ends.append(None)
             for line in inFile:
                 if len(line) == 1:
@@ -1,5 +1,6 @@
 import os
 import sys
+from OpenResult import openResult
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -10,7 +11,7 @@ conversion = 8766.0 # Mean year in hours
 
 data = []
 
-dataFile = open(os.path.join(os.getcwd(), sys.argv[1]))
+dataFile = openResult(os.path.join(os.getcwd(), sys.argv[1]))
 for line in dataFile:
     data.append(line.replace(',|', '').strip().split(","))
 dataFile.close()
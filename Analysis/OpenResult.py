@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+import os
+import gzip
+import bz2
+import lzma
+
+# Openers of result files written with each compression, by extension
+openers = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+decompressors = {'.gz': gzip.decompress, '.bz2': bz2.decompress, '.xz': lzma.decompress}
+
+def resultPath(path):
+    """
+    Gives the path of a result file as written, which may have a compression extension added (e.g. '.csv.gz').
+    """
+    if not os.path.isfile(path):
+        for ext in openers:
+            if os.path.isfile(path + ext):
+                return path + ext
+    return path
+
+def openResult(path, mode='r'):
+    """
+    Opens a result file for reading, decompressing it if compressed, given its path with or without the compression extension.
+    """
+    path = resultPath(path)
+    ext = os.path.splitext(path)[1]
+    if ext not in openers:
+        return open(path, mode)
+    return openers[ext](path, mode if 'b' in mode else mode + 't')
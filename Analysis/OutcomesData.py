@@ -4,6 +4,7 @@ import os
 import sys
 import math
 import glob
+from OpenResult import openResult, resultPath
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -13,7 +14,7 @@ def main():
     rName = sys.argv[1].strip('/').strip('\\')
     dir = os.path.join(os.getcwd(), rName)
     # Measure number of files to inspect in directory given by command line arguments
-    nFiles = len(glob.glob1(dir,'Macchiato_PetriNet_Places_*.csv'))
+    nFiles = len(glob.glob1(dir,'Macchiato_PetriNet_Places_*.csv*'))
     print(f'\nDiscovered {nFiles} files to inspect in "{rName}".\n')
 
     nan = float('NaN')
@@ -21,7 +22,7 @@ def main():
     last = 0.0
     # Get target places from command line arguments
     pListLab = sys.argv[2].split(':')
-    searchP = open(os.path.join(dir, 'Macchiato_PetriNet_Places_1.csv'), 'r')
+    searchP = openResult(os.path.join(dir, 'Macchiato_PetriNet_Places_1.csv'), 'r')
     sp = 0
     pList = []
     for line in searchP:
@@ -53,10 +54,10 @@ def main():
     eDC = [0]*nP
 
     # Loop over results files
-    ii = 0 if os.path.isfile(os.path.join(dir, 'Macchiato_PetriNet_Places_0.csv')) else 1
+    ii = 0 if os.path.isfile(resultPath(os.path.join(dir, 'Macchiato_PetriNet_Places_0.csv'))) else 1
     for j in range(nFiles):
         i = j+ii
-        with open(os.path.join(dir, f'Macchiato_PetriNet_Places_{i}.csv'), 'r') as file:
+        with openResult(os.path.join(dir, f'Macchiato_PetriNet_Places_{i}.csv'), 'r') as file:
             pStates = [False]*len(pList)
             l = 0
             # Skip over title lines
@@ -3,6 +3,7 @@
 import os
 import sys
 import glob
+from OpenResult import openResult, resultPath
 import math
 
 import numpy as np
@@ -20,7 +21,7 @@ def main():
 
     """
     # Measure number of files to inspect in directory given by command line arguments
-    nFiles = len(glob.glob1(os.path.join(os.getcwd(), sys.argv[1]),'Macchiato_PetriNet_Places_*.csv'))
+    nFiles = len(glob.glob1(os.path.join(os.getcwd(), sys.argv[1]),'Macchiato_PetriNet_Places_*.csv*'))
     print('\nDiscovered %d files to inspect in "%s".\n' % (nFiles, sys.argv[1]))
 
     TMax = float(sys.argv[2])
@@ -45,10 +46,10 @@ def main():
         columnFound = False
         col = None
 
-        ii = 0 if os.path.isfile(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_0.csv')) else 1
+        ii = 0 if os.path.isfile(resultPath(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_0.csv'))) else 1
         for j in range(nFiles):
             i = j+ii
-            file = open(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_%d.csv' % (i)))
+            file = openResult(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Places_%d.csv' % (i)))
             l = -1
             A = []
             for line in file:
@@ -1,16 +1,46 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 import os, sys
+import multiprocessing
+from OpenResult import openResult, resultPath, openers, decompressors
+
+def readIndex(path):
+    # Index written alongside the concatenated file: Ref,Offset,Length,Rows,Clock,End
+    index = []
+    with open(path, 'r') as in_file:
+        next(in_file)
+        for line in in_file:
+            ref, offset, length = line.split(',')[:3]
+            index.append((int(ref), int(offset), int(length)))
+    return index
+
+def openOutput(outpath, ext, mode):
+    # Split files are compressed as the concatenated file was
+    if ext in openers:
+        return openers[ext](outpath+ext, mode if 'b' in mode else mode+'t')
+    return open(outpath, mode)
+
+def splitPart(path, outpath, offset, length):
+    ext = os.path.splitext(path)[1]
+    with open(path, 'rb') as in_file:
+        in_file.seek(offset)
+        part = in_file.read(length)
+    if ext in decompressors:
+        part = decompressors[ext](part)
+    # Drop separator line
+    with openOutput(outpath, ext, 'wb') as out_file:
+        out_file.write(part.split(b'\n', 1)[1])
 
 def main():
     name = sys.argv[1]
     time = sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
     outdir = os.path.join(os.getcwd(), name+'_'+time)
-    tags = ['Places', 'Trans', 'FireList']
+    tags = ['Places', 'PlaceDeltas', 'Trans', 'FireList']
     found = []
     for tag in tags:
         # print(os.path.join(os.getcwd(), name+'_'+tag+'_'+time))
-        if os.path.isfile(os.path.join(os.getcwd(), name+'_'+tag+'_'+time+'.csv')):
+        if os.path.isfile(resultPath(os.path.join(os.getcwd(), name+'_'+tag+'_'+time+'.csv'))):
             found.append(tag)
     if not len(found):
         sys.exit('No matching files found to split.')
@@ -18,14 +48,27 @@ def main():
     os.mkdir(outdir)
 
     for tag in found:
+        path = resultPath(os.path.join(os.getcwd(), name+'_'+tag+'_'+time+'.csv'))
+        ext = os.path.splitext(path)[1]
+        indexPath = os.path.join(os.getcwd(), name+'_'+tag+'_'+time+'_Index.csv')
+        if os.path.isfile(indexPath):
+            # Each part is read directly from its offset, in parallel
+            jobs = [(path, os.path.join(outdir, 'Macchiato_PetriNet_'+tag+f'_{n+1}.csv'), offset, length) for n, (ref, offset, length) in enumerate(readIndex(indexPath))]
+            if workers > 1:
+                with multiprocessing.Pool(workers) as pool:
+                    pool.starmap(splitPart, jobs)
+            else:
+                for job in jobs:
+                    splitPart(*job)
+            continue
         n = 0
-        with open(os.path.join(os.getcwd(), name+'_'+tag+'_'+time+'.csv'), 'r') as in_file:
+        with openResult(path, 'r') as in_file:
             for line in in_file:
                 if line.startswith('>>>>>'):
                     if n:
                         out_file.close()
                     n+=1
-                    out_file = open(os.path.join(outdir, 'Macchiato_PetriNet_'+tag+f'_{n}.csv'), 'w')
+                    out_file = openOutput(os.path.join(outdir, 'Macchiato_PetriNet_'+tag+f'_{n}.csv'), ext, 'w')
                     continue
                 out_file.write(line)
             out_file.close()
@@ -5,6 +5,7 @@ import os
 import sys
 import math
 import glob
+from OpenResult import openResult, resultPath
 
 import numpy as np
 
@@ -17,7 +18,7 @@ Command line arguments taken in order:
 
 def main():
     # Measure number of files to inspect in directory given by command line arguments
-    nFiles = len(glob.glob1(os.path.join(os.getcwd(), sys.argv[1]),'Macchiato_PetriNet_Trans_*.csv'))
+    nFiles = len(glob.glob1(os.path.join(os.getcwd(), sys.argv[1]),'Macchiato_PetriNet_Trans_*.csv*'))
     print('\nDiscovered %d files to inspect in "%s".\n' % (nFiles, sys.argv[1]))
 
     # # Get runmode from command line arguments
@@ -40,10 +41,10 @@ def main():
     eData = None
 
     # Loop over results files
-    ii = 0 if os.path.isfile(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Trans_0.csv')) else 1
+    ii = 0 if os.path.isfile(resultPath(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Trans_0.csv'))) else 1
     for j in range(nFiles):
         i = j+ii
-        file = open(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Trans_%d.csv' % (i)), 'r')
+        file = openResult(os.path.join(os.getcwd(), sys.argv[1], 'Macchiato_PetriNet_Trans_%d.csv' % (i)), 'r')
         l = False
         for line in file:
             # Skip over title lines
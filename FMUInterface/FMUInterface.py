@@ -103,10 +103,14 @@ class pnfmu(object):
 
         Parameters
         ----------
-        pnNew : Macchiato.PetriNet
-            New version of the Petri Net object
+        pnNew : Macchiato.PetriNet OR Macchiato.Snapshot
+        * If given Macchiato.PetriNet, sets self.pn to a copy of it
+        * If given Macchiato.Snapshot, restores self.pn to that state
         """
-        self.pn = copy.deepcopy(pnNew)
+        if type(pnNew) is Macchiato.Snapshot:
+            self.pn.restore(pnNew)
+        else:
+            self.pn = copy.deepcopy(pnNew)
         self.pn.writeNet(self.pfile, self.tfile, self.tlist, self.pn.runMode)
 
     def endfiles(self):
@@ -202,9 +206,12 @@ class pnfmu(object):
             t0 = self.pn.clock
             if t0 >= self.tMax:
                 break
-            pnNew = copy.deepcopy(self.pn)
-            pnNew.run(1, verbose=False, fileOutput=False)
-            t1 = pnNew.clock
+            # Trial step of the Petri Net, which is rolled back until accepted
+            pnOld = self.pn.snapshot()
+            self.pn.run(1, verbose=False, fileOutput=False)
+            t1 = self.pn.clock
+            pnNew = self.pn.snapshot()
+            self.pn.restore(pnOld)
             opts = self.model.simulate_options()
             if not t1 > t0:
                 self.newPN(pnNew)
@@ -29,11 +29,23 @@ latter.
 import os
 import re
 import sys
-import copy
 import math
 import time
+import heapq
+import bisect
 import random
+import json
+import io
+import array
+import zlib
+import gzip
+import bz2
+import lzma
+import queue
 import shutil
+import struct
+import threading
+import multiprocessing
 from fnmatch import filter
 import argparse
 import textwrap
@@ -42,10 +54,28 @@ import collections
 from platform import system
 from builtins import print as speak
 import xml.etree.ElementTree as ET
+# Optional modules
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 qmS="'"
 qmD='"'
 
+# Trace levels for reports of simulation events
+traceLevels = ['off', 'steps', 'events', 'debug']
+traceSteps, traceEvents, traceDebug = 1, 2, 3
+# Requested trace level, optional file for structured trace records, and
+# effective trace level (zero when there is nowhere to send reports)
+traceLevel = traceDebug
+traceSink = None
+trace = traceDebug
+
+# Arc types, stored by Arc objects as indices in to this list
+arcTypes = ['std', 'inh', 'pcn']
+arcStd, arcInh, arcPcn = 0, 1, 2
+
 ############################################################################
 # File and Simulation Management Utilities
 ############################################################################
@@ -68,10 +98,43 @@ def main():
     parser.add_argument('-T', '--notransfile', action='store_true', help='Suppress file output for transtions')
     parser.add_argument('-F', '--nofirefile', action='store_true', help='Suppress file output for fire list')
     parser.add_argument('-x', '--xmlconvert', action='store_true', help='Convert *.drawio/*.xml file to *.mpn')
+    parser.add_argument('-e', '--engine', default=None, choices=['scan', 'incremental', 'nextreaction'], help='Override the transition enablement engine given in the input file')
+    parser.add_argument('-m', '--sampler', default=None, choices=['direct', 'pool'], help='Override the sampler of transition timings given in the input file')
+    parser.add_argument('-f', '--format', default=None, choices=['csv', 'store'], help='Override the output format given in the input file ("store" writes all simulations to one binary columnar store)')
+    parser.add_argument('-E', '--fireformat', default=None, choices=['csv', 'binary'], help='Override the fire list format given in the input file ("binary" writes an event log of fixed-width records)')
+    parser.add_argument('-D', '--placeformat', default=None, choices=['dense', 'delta'], help='Override the places file format given in the input file ("delta" writes only the places changed at each step, with periodic keyframes)')
+    parser.add_argument('-z', '--compress', default=None, choices=['none', 'gzip', 'bz2', 'xz'], help='Override the compression of output files given in the input file')
+    parser.add_argument('-Z', '--level', default=None, type=int, choices=range(10), metavar='{0-9}', help='Override the compression level given in the input file (0 fastest, 9 smallest; 1 to 9 for bz2)')
+    parser.add_argument('-l', '--trace', default=None, choices=traceLevels, help='Level of detail of simulation reports in verbose mode and in the trace file (default: debug)')
+    parser.add_argument('-o', '--tracefile', default=None, help='Write simulation reports to this file as JSON records, one per line')
+    parser.add_argument('-r', '--seed', default=None, type=int, help='Seed for random number generation, from which each simulation has its own stream')
+    parser.add_argument('-j', '--jobs', default=None, type=int, help='Distribute simulations across this many processes')
+    parser.add_argument('-a', '--online', action='store_true', help='Aggregate statistics as each simulation finishes, rather than keeping every history until the end (requires NumPy)')
+    parser.add_argument('-w', '--background', action='store_true', help='Format, write, and concatenate output files in a background thread while simulating')
+    parser.add_argument('-b', '--batch', default=None, type=int, help='Run simulations in lockstep groups of this size (requires NumPy, "schedule" run mode only, no per-simulation file output)')
     args = parser.parse_args()
 
     # Get Petri Net and simulation parameters
     pn, rp = read(args.file[0].name, xmlconvert=args.xmlconvert)
+    if args.engine is not None:
+        pn.engine = args.engine
+    if args.sampler is not None:
+        pn.sampler = args.sampler
+    if args.format is not None:
+        pn.outputFormat = args.format
+    if args.fireformat is not None:
+        pn.fireFormat = args.fireformat
+    if args.placeformat is not None:
+        pn.placeFormat = args.placeformat
+    if args.compress is not None:
+        pn.compression = args.compress
+    if args.level is not None:
+        pn.compressionLevel = args.level
+    try:
+        checkCompression(pn.compression, pn.compressionLevel)
+    except ValueError as error:
+        parser.error(str(error))
+    setTrace(args.trace, args.tracefile)
 
     # Set file output flags
     pn.writePlaceFile, pn.writeTransFile, pn.writeFireFile = (not args.noplacesfile, not args.notransfile, not args.nofirefile)
@@ -103,9 +166,10 @@ def main():
     if not args.verbose:
         blockPrint()
     wall = time.time()
-    repeat(pn, rp[0], maxSteps=rp[1], simsFactor=rp[2], fixedNumber=args.nSims, start=args.start, history=rp[3], analysisStep=rp[4], fileOutput=rp[5], endOnly=rp[6], concatenate=args.concatenate)
+    repeat(pn, rp[0], maxSteps=rp[1], simsFactor=rp[2], fixedNumber=args.nSims, start=args.start, history=rp[3], analysisStep=rp[4], fileOutput=rp[5], endOnly=rp[6], concatenate=args.concatenate, batch=args.batch, workers=args.jobs, seed=args.seed, online=args.online, background=args.background)
     if not args.verbose:
         enablePrint()
+    closeTrace()
     lt = time.localtime()[:6]
     print('='*80 + '\nSimulations complete after %.2g hrs (%04d-%02d-%02d %02d:%02d:%02d)\n' % (float(time.time()-wall)/float(3600), lt[0], lt[1], lt[2], lt[3], lt[4], lt[5]) + '='*80)
 
@@ -121,6 +185,7 @@ def blockPrint():
     """
     global print
     print = silence
+    updateTrace()
 
 def enablePrint():
     """
@@ -128,6 +193,78 @@ def enablePrint():
     """
     global print
     print = speak
+    updateTrace()
+
+def setTrace(level=None, sink=None):
+    """
+    Sets the level of detail with which simulation events are reported, and
+    optionally a file to which they are also written as JSON records (one
+    per line)
+
+    Parameters
+    ----------
+    level : string or integer
+        One of traceLevels, or its index
+        *  off : No reports
+        *  steps : Steps, transitions fired, and clock advancement
+        *  events : Also token changes, resets, rescheduling, and limits
+        *  debug : Also the full firing schedule at every step (Default)
+    sink : string or file object
+        Path of, or open file for, structured trace records
+    """
+    global traceLevel, traceSink
+    if level is not None:
+        if level in traceLevels:
+            level = traceLevels.index(level)
+        if level not in range(len(traceLevels)):
+            raise ValueError('"%s" does not refer to a valid trace level. Valid levels are: %r' % (level, traceLevels))
+        traceLevel = level
+    if sink is not None:
+        if type(sink) is str:
+            sink = open(sink, 'w')
+        traceSink = sink
+    updateTrace()
+
+def closeTrace():
+    """
+    Closes the structured trace file, if set
+    """
+    global traceSink
+    if traceSink is not None:
+        traceSink.close()
+        traceSink = None
+    updateTrace()
+
+def updateTrace():
+    """
+    Sets the effective trace level, which is zero when terminal output is
+    silenced and no trace file is set, so that disabled reports cost nothing
+    """
+    global trace
+    trace = traceLevel if (print is not silence or traceSink is not None) else 0
+
+def traceEvent(level, event, text, **fields):
+    """
+    Reports a simulation event to the terminal and the trace file. Callers
+    first compare the level with 'trace' (e.g. 'if trace >= traceEvents:'),
+    so that the report is not composed when disabled.
+
+    Parameters
+    ----------
+    level : integer
+        Trace level of the report
+    event : string
+        Type of event
+    text : string
+        Message for the terminal
+    **fields
+        Details of the event for the trace file
+    """
+    print(text)
+    if traceSink is not None:
+        fields['level'] = traceLevels[level]
+        fields['event'] = event
+        traceSink.write(json.dumps(fields) + '\n')
 
 def expandReset(pn, reset):
     """
@@ -189,6 +326,13 @@ def read(file, xmlconvert=False):
     orientation = None
     debug = False
     dotLoc = None
+    engine = 'scan'
+    sampler = 'direct'
+    outputFormat = 'csv'
+    fireFormat = 'csv'
+    compression = 'none'
+    compressionLevel = None
+    placeFormat = 'dense'
 
     # Run Parameters
     maxClock = 1E6
@@ -225,7 +369,9 @@ def read(file, xmlconvert=False):
                 if mode is None:
                     pn = PetriNet(name=name, units=units, runMode=runMode, dot=dot,
                                   visualise=visualise, details=details, useGroup=useGroup,
-                                  orientation=orientation, debug=debug, dotLoc=dotLoc)
+                                  orientation=orientation, debug=debug, dotLoc=dotLoc,
+                                  engine=engine, sampler=sampler, outputFormat=outputFormat, fireFormat=fireFormat,
+                                  compression=compression, compressionLevel=compressionLevel, placeFormat=placeFormat)
                 mode = spln[0]
                 continue
 
@@ -262,6 +408,20 @@ def read(file, xmlconvert=False):
                             dotLoc += ' %s' % i
                     elif spln[1] == 'None':
                         dotLoc = None
+                elif spln[0] == 'engine':
+                    engine = spln[1]
+                elif spln[0] == 'sampler':
+                    sampler = spln[1]
+                elif spln[0] == 'outputFormat':
+                    outputFormat = spln[1]
+                elif spln[0] == 'fireFormat':
+                    fireFormat = spln[1]
+                elif spln[0] == 'placeFormat':
+                    placeFormat = spln[1]
+                elif spln[0] == 'compression':
+                    compression = spln[1]
+                elif spln[0] == 'compressionLevel':
+                    compressionLevel = None if spln[1] == 'None' else int(spln[1])
 
                 # Run Parameters
                 elif spln[0] == 'maxClock':
@@ -457,7 +617,9 @@ def read(file, xmlconvert=False):
                     simsFactor = float(atrb['simsFactor'])
         pn = PetriNet(name=name, units=units, runMode=runMode, dot=dot,
                       visualise=visualise, details=details, useGroup=useGroup,
-                      orientation=orientation, debug=debug, dotLoc=dotLoc)
+                      orientation=orientation, debug=debug, dotLoc=dotLoc,
+                      engine=engine, sampler=sampler, outputFormat=outputFormat, fireFormat=fireFormat,
+                      compression=compression, compressionLevel=compressionLevel, placeFormat=placeFormat)
 
       # PLACES
         for item in root[0][0][0]:
@@ -606,6 +768,13 @@ def write(pn, overwrite=False, rp=None, altName=None, path=None, useResetString=
     wr += '\torientation %s\n' % pn.orientation
     wr += '\tdebug %s\n' % pn.debug
     wr += '\tdotLoc %s\n' % pn.dotLoc
+    wr += '\tengine %s\n' % pn.engine
+    wr += '\tsampler %s\n' % pn.sampler
+    wr += '\toutputFormat %s\n' % pn.outputFormat
+    wr += '\tfireFormat %s\n' % pn.fireFormat
+    wr += '\tplaceFormat %s\n' % pn.placeFormat
+    wr += '\tcompression %s\n' % pn.compression
+    wr += '\tcompressionLevel %s\n' % pn.compressionLevel
     wr += '\n'
     wr += '# Run Parameters\n'
     if type(rp) is list:
@@ -756,6 +925,51 @@ def genID(label):
         gID = re.sub('_', '-', label)
     return id, gID
 
+def poissonVariate(rng, mean):
+    """
+    Draws from a Poisson distribution, by inversion for small means and by
+    transformed rejection (Hörmann's PTRS algorithm) otherwise
+
+    Parameters
+    ----------
+    rng : random.Random object
+        Source of random numbers
+    mean : float
+        Mean of the distribution
+
+    Returns
+    ----------
+    k : integer
+        Poisson variate
+    """
+    if mean <= 0.0:
+        return 0
+    if mean < 10.0:
+        limit = math.exp(-mean)
+        k = 0
+        p = rng.random()
+        while p > limit:
+            k += 1
+            p *= rng.random()
+        return k
+    slam = math.sqrt(mean)
+    loglam = math.log(mean)
+    b = 0.931 + 2.53*slam
+    a = -0.059 + 0.02483*b
+    invalpha = 1.1239 + 1.1328/(b - 3.4)
+    vr = 0.9277 - 3.6224/(b - 2.0)
+    while True:
+        u = rng.random() - 0.5
+        v = rng.random()
+        us = 0.5 - abs(u)
+        k = int(math.floor((2.0*a/us + b)*u + mean + 0.43))
+        if us >= 0.07 and v <= vr:
+            return k
+        if k < 0 or (us < 0.013 and v > us):
+            continue
+        if math.log(v) + math.log(invalpha) - math.log(a/(us*us) + b) <= -mean + k*loglam - math.lgamma(k + 1):
+            return k
+
 class PetriNet(object):
     """
     A Petri Net, composed of places and transitions, which are connected by arcs.
@@ -790,11 +1004,118 @@ class PetriNet(object):
     *  stochastic : One transition is selected for firing in proportion to
        its rates (plus instant and fixed delay transitions)
     *  schedule : Schedule based Monte Carlo integration (Default)
+    *  tau-leap : Approximation of 'stochastic' for nets of rate
+       transitions, in which each step fires Poisson distributed numbers of
+       each ready transition over a leap in time (see leap)
     runModes : list
         Permissible options for 'runMode'
-    schedule : collections.OrderedDict
+    engine : string
+    *  scan : Every transition is tested for enablement at each step
+       (Default)
+    *  incremental : Only transitions adjacent to places changed by the
+       last firing are retested for enablement
+    *  nextreaction : As 'incremental', with the 'stochastic' run mode
+       selecting transitions by the next reaction method (see reactions)
+    engines : list
+        Permissible options for 'engine'
+    sampler : string
+    *  direct : Transition timings are drawn one at a time from 'rng'
+       (Default)
+    *  pool : Transition timings are taken from pools of variates drawn in
+       blocks with NumPy (see Variates)
+    samplers : list
+        Permissible options for 'sampler'
+    outputFormat : string
+    *  csv : The results of each simulation are written to text files of
+       places, transitions, and transitions fired (Default)
+    *  store : The results of each simulation are written to a binary
+       columnar store, shared by a set of simulations (see StoreWriter)
+    outputFormats : list
+        Permissible options for 'outputFormat'
+    fireFormat : string
+    *  csv : The fire list is written as text, listing the labels of the
+       transitions fired at each step (Default)
+    *  binary : The fire list is written as a binary event log, with a
+       fixed-width record of each firing (see EventLog)
+    fireFormats : list
+        Permissible options for 'fireFormat'
+    placeFormat : string
+    *  dense : The places file gives the tokens of every place written at
+       every step (Default)
+    *  delta : The places file gives, at each step, only the places whose
+       tokens have changed, with the tokens of every place at periodic
+       keyframes (see DeltaWriter and PlaceDeltas)
+    placeFormats : list
+        Permissible options for 'placeFormat'
+    keyframeRows : integer
+        Number of rows from one keyframe to the next in the 'delta' place
+        format (Default = 1000)
+    compression : string
+    *  none : Output files are written uncompressed (Default)
+    *  gzip, bz2, xz : Output files are compressed as they are written,
+       and named with the extension '.gz', '.bz2', or '.xz' (see
+       OutputFile). The binary columnar store is not compressed.
+    compressions : list
+        Permissible options for 'compression'
+    compressionLevel : integer
+        Compression level, from 0 (fastest) to 9 (smallest), or from 1
+        for bz2 (Default = None, for 6, or 9 for bz2)
+    fireIndex : dictionary
+        Index of each transition label in the binary fire list (set by
+        writeNetStart)
+    store : StoreWriter object
+        Store to which results are written in the 'store' output format
+        (if None, each run writes its own)
+    variates : Variates object
+        Pools of variates for the 'pool' sampler (created on demand, and
+        replaced whenever 'rng' is)
+    dependents : collections.OrderedDict
+        Index of the transitions connected to each place, by any arc type,
+        whose enabled status may change when that place's tokens change
+        (built on demand by the 'incremental' engine, None otherwise)
+    touches : collections.OrderedDict
+        Labels of places whose tokens are changed by firing each transition
+        (built alongside 'dependents')
+    changed : dictionary
+        Places whose tokens have been changed or reset by the current step,
+        in the order changed (keys only), such that only these are updated
+        and checked against their limits
+    conflicts : collections.OrderedDict
+        Structural conflict graph for the 'all' run mode. For each
+        transition, a list of (place, takers, givers) for each input place
+        or bounded output place it shares with other transitions, where
+        'takers' and 'givers' list (transition, weight) for every transition
+        sharing the place on that side (built on demand by
+        resolveConflicts, None otherwise)
+    enabled : TransList object
+        Transitions currently enabled according to the 'incremental'
+        engine, in the order of PetriNet.trans (None until first evaluated
+        in a run). Enabled transitions keep their ready status between
+        steps until they are retested.
+    instants : TransList object
+        Enabled transitions without a timing (instant transitions), for the
+        'incremental' engines
+    dirty : set
+        Transitions to be retested for enablement by the 'incremental'
+        engine at the next step
+    schedule : Schedule object
         Stores the transition firing scheudle for the 'scheudle' Monte Carlo
         simulation run mode
+    tauError : float
+        Greatest expected change in the tokens of any place over one leap
+        in 'tau-leap' run mode, as a fraction of its tokens (Default = 0.03)
+    tauCritical : float
+        Least expected number of firings over a leap, below which the
+        'tau-leap' run mode takes an exact 'stochastic' step instead
+        (Default = 10)
+    reactions : Schedule object
+        Putative firing times of ready rate transitions for the
+        'nextreaction' engine in the 'stochastic' run mode. Each is drawn
+        when the transition becomes ready, and kept until it fires or is no
+        longer ready.
+    delays : Schedule object
+        Times at which ready fixed delay transitions complete their delays,
+        for the 'nextreaction' engine in the 'stochastic' run mode
     debug : boolean
         Run PetriNet object in debug mode (Default = False)
     places : collections.OrderedDict
@@ -803,9 +1124,10 @@ class PetriNet(object):
         All transitions in the PetriNet
     ready : list
         List of transitions that are ready to fire
-    connectivity : list
-        Descibes the network of connections between places and transitions
-        (not implemented)
+    connectivity : Connectivity object
+        Compiled description of the network of connections between places
+        and transitions (built on demand by buildConnectivity, reset to None
+        whenever the structure of the Petri Net is changed)
     step : integer
         Number of steps taken
     clock : float
@@ -820,8 +1142,20 @@ class PetriNet(object):
     transExit : boolean
         Indictes if simulated ended due a transition firing the maximum
         number of times
+    endReason : string
+        Reason the last run ended: 'deadlock' (no transitions ready),
+        'places' or 'trans' (terminate conditions, or 'places+trans' for
+        both), 'clock', 'steps', or 'none' if no steps were requested
+    outputRows : integer
+        Number of rows written to each output file since writeNetStart
     history : history object
         Log of the firing history of the Petri Net
+    rng : random.Random object
+        Source of random numbers for the simulation (Default is the random
+        module itself, i.e. the global random number generator)
+    seed : integer
+        Seed of 'rng', recorded in output files (None if not seeded by
+        Macchiato)
     dotLoc : string
         Path to Graphviz's dot.exe
     placesToPrint : list
@@ -836,13 +1170,24 @@ class PetriNet(object):
         Toggles file writing for transitions
     writeFireFile : boolean (Default = True)
         Toggles file writing for fire list
+    flushRows : integer
+        Number of rows of each output file held in memory before they are
+        written (Default = 1024)
+    output : OutputThread object
+        If given, output files are formatted and written by this thread
+    catFiles : dictionary
+        If given, open files ('Places', 'Trans', and 'FireList') to which
+        the output of each simulation is appended, after a separator line,
+        in place of separate files (see openCatFiles)
 
     """
     def __init__(self, name=None, units='hrs', runMode='schedule', dot=False,
                  visualise=None, details=True, useGroup=True, orientation=None,
                  debug=False, dotLoc=None, placesToPrint=None,
                  transToPrint=None, writePlaceFile=True, writeTransFile=True,
-                 writeFireFile=True):
+                 writeFireFile=True, engine='scan', sampler='direct',
+                 outputFormat='csv', fireFormat='csv', compression='none',
+                 compressionLevel=None, placeFormat='dense'):
         self.time = int(time.time())
         self.name = str(name)
         if name is None:
@@ -867,14 +1212,52 @@ class PetriNet(object):
         self.places = collections.OrderedDict()
         self.trans = collections.OrderedDict()
         self.ready = []
-        self.connectivity = [] # not implemented
+        self.connectivity = None
         self.units = units
         self.transFiredTotal = 0
 
         self.runMode = runMode
-        self.runModes = ['all', 'single', 'stochastic', 'schedule']
+        self.runModes = ['all', 'single', 'stochastic', 'schedule', 'tau-leap']
         if runMode not in self.runModes:
             raise ValueError('"%s" does not refer to a valid run mode. Valid modes are: %r' % (runMode, self.runModes))
+        self.engine = engine
+        self.engines = ['scan', 'incremental', 'nextreaction']
+        if engine not in self.engines:
+            raise ValueError('"%s" does not refer to a valid engine. Valid engines are: %r' % (engine, self.engines))
+        self.sampler = sampler
+        self.samplers = ['direct', 'pool']
+        if sampler not in self.samplers:
+            raise ValueError('"%s" does not refer to a valid sampler. Valid samplers are: %r' % (sampler, self.samplers))
+        self.outputFormat = outputFormat
+        self.outputFormats = ['csv', 'store']
+        if outputFormat not in self.outputFormats:
+            raise ValueError('"%s" does not refer to a valid output format. Valid formats are: %r' % (outputFormat, self.outputFormats))
+        self.store = None
+        self.fireFormat = fireFormat
+        self.fireFormats = ['csv', 'binary']
+        if fireFormat not in self.fireFormats:
+            raise ValueError('"%s" does not refer to a valid fire list format. Valid formats are: %r' % (fireFormat, self.fireFormats))
+        self.placeFormat = placeFormat
+        self.placeFormats = ['dense', 'delta']
+        if placeFormat not in self.placeFormats:
+            raise ValueError('"%s" does not refer to a valid place format. Valid formats are: %r' % (placeFormat, self.placeFormats))
+        self.keyframeRows = 1000
+        self.compression = compression
+        self.compressions = list(compressionExts)
+        if compression not in self.compressions:
+            raise ValueError('"%s" does not refer to a valid compression. Valid compressions are: %r' % (compression, self.compressions))
+        self.compressionLevel = compressionLevel
+        checkCompression(compression, compressionLevel)
+        self.fireIndex = None
+        self.variates = None
+        self.dependents = None
+        self.touches = None
+        self.transIndex = None
+        self.conflicts = None
+        self.changed = {}
+        self.enabled = None
+        self.instants = None
+        self.dirty = set()
         self.savedot = dot
         self.visualise = visualise
         self.details = details
@@ -885,12 +1268,18 @@ class PetriNet(object):
         self.step = 0
         self.clock = 0.0
 
-        self.schedule = collections.OrderedDict()
+        self.schedule = Schedule()
+        self.reactions = Schedule()
+        self.delays = Schedule()
+        self.tauError = 0.03
+        self.tauCritical = 10.0
 
         self.arcsVerified = False
 
         self.placeExit = False
         self.transExit = False
+        self.endReason = None
+        self.outputRows = 0
 
         self.placesToPrint = placesToPrint if placesToPrint is not None else []
         self.transToPrint = transToPrint if transToPrint is not None else []
@@ -898,8 +1287,13 @@ class PetriNet(object):
         self.writePlaceFile=writePlaceFile
         self.writeTransFile=writeTransFile
         self.writeFireFile=writeFireFile
+        self.flushRows = 1024
+        self.output = None
+        self.catFiles = None
 
         self.history = History()
+        self.rng = random
+        self.seed = None
         # Location of Graphviz's dot.exe:
         # Dependant on operating system and personal set up
         # Requried for visualisation only
@@ -939,6 +1333,23 @@ class PetriNet(object):
                 print('Warning: Graphviz installation not found at specifed location.\n"%s"\nCheck simulation parameter file if visualisation is required.' % dotLoc)
                 time.sleep(5)
 
+    def __getstate__(self):
+        # The random module cannot be copied or pickled, so is reinstated by
+        # __setstate__, and variate pools are redrawn when next needed
+        state = self.__dict__.copy()
+        if state['rng'] is random:
+            state['rng'] = None
+        state['variates'] = None
+        state['store'] = None
+        state['output'] = None
+        state['catFiles'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.rng is None:
+            self.rng = random
+
     def updateTime(self):
         """
         Updates time attribute of PetriNet object
@@ -973,6 +1384,7 @@ class PetriNet(object):
 
         if not label in self.places:
             self.places[label] = Place(label, tokens=tokens, min=min, max=max, limits=limits, group=group)
+            self.invalidate()
         else:
             raise KeyError('Place with label, "%s", already exists' % label)
         # if ' ' in label:
@@ -995,6 +1407,7 @@ class PetriNet(object):
             Unique identifier of the place to be removed
         """
         self.places.pop(label)
+        self.invalidate()
         for t in self.trans:
             trans = self.trans[t]
             if label in trans.inArcs:
@@ -1047,6 +1460,8 @@ class PetriNet(object):
                         reset = [reset]
                 reset = expandReset(self, reset)
             self.trans[label] = Trans(label, rate=rate, uniform=uniform, delay=delay, weibull=weibull, beta=beta, lognorm=lognorm, cyclic=cyclic, maxFire=maxFire, reset=reset, resetString=resetString, vote=vote, group=group)
+            self.trans[label].net = self
+            self.invalidate()
         else:
             raise KeyError('Transition with label, "%s", already exists' % label)
         # if ' ' in label:
@@ -1072,6 +1487,17 @@ class PetriNet(object):
             Unique identifier of the transition to be removed
         """
         self.trans.pop(label)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Discards compiled descriptions of the Petri Net's structure after it
+        has been changed, so that they are rebuilt when next required
+        """
+        self.dependents = None
+        self.conflicts = None
+        self.connectivity = None
+        self.arcsVerified = False
 
     def transSummary(self):
         """
@@ -1088,7 +1514,7 @@ class PetriNet(object):
 
         Parameters
         ----------
-        pfile : filepointer
+        pfile : RowWriter object
             Object indicating location to which place data is writen
         mode : string
         tOut : boolean
@@ -1111,42 +1537,21 @@ class PetriNet(object):
 
         if pfile is not None:
             pfile.write('\n')
-            line = ('In,')
-            if mode in ['stochastic', 'schedule']:
-                line += (',')
-            for p in self.places:
-                if self.placesToPrint and p not in self.placesToPrint:
-                    continue
-                line += ('%d,' % self.places[p].ins)
-            pfile.write('%s\n' % line)
-            line = ('Out,')
-            if mode in ['stochastic', 'schedule']:
-                line += (',')
-            for p in self.places:
-                if self.placesToPrint and p not in self.placesToPrint:
-                    continue
-                line += ('%d,' % self.places[p].outs)
-            pfile.write('%s\n' % line)
-            line = ('Net,')
-            if mode in ['stochastic', 'schedule']:
-                line += (',')
-            for p in self.places:
-                if self.placesToPrint and p not in self.placesToPrint:
-                    continue
-                line += ('%d,' % (self.places[p].ins - self.places[p].outs))
-            pfile.write('%s\n' % line)
-            line = ('Reset,')
-            if mode in ['stochastic', 'schedule']:
-                line += (',')
-            for p in self.places:
-                if self.placesToPrint and p not in self.placesToPrint:
-                    continue
-                line += ('%d,' % self.places[p].resetCount)
-            pfile.write('%s\n' % line)
+            # Blank time column if timed
+            lead = ',' if mode in ['stochastic', 'tau-leap', 'schedule'] else ''
+            # Blank type column if delta-encoded
+            if isinstance(pfile, DeltaWriter):
+                lead += ','
+            places = pfile.columns
+            pfile.write('In,%s%s\n' % (lead, ''.join(['%d,' % p.ins for p in places])))
+            pfile.write('Out,%s%s\n' % (lead, ''.join(['%d,' % p.outs for p in places])))
+            pfile.write('Net,%s%s\n' % (lead, ''.join(['%d,' % (p.ins - p.outs) for p in places])))
+            pfile.write('Reset,%s%s\n' % (lead, ''.join(['%d,' % p.resetCount for p in places])))
 
     def readyTrans(self, mode=None):
         """
         Lists transition that are ready to fire. Updates PetriNet.ready and Trans.waiting attributes.
+        Transitions whose requisites are no longer met are removed from PetriNet.schedule.
 
         Parameters
         ----------
@@ -1162,219 +1567,264 @@ class PetriNet(object):
         """
         if mode is None:
             mode = self.runMode
+        # Arcs must be linked to their places
+        if not self.arcsVerified:
+            self.verifyArcs()
+
+        if self.engine in ['incremental', 'nextreaction']:
+            if self.dependents is None:
+                self.buildDependents()
+            # Retest all transitions on the first step of a run, since tokens may have been changed externally
+            if self.enabled is None:
+                self.enabled = TransList()
+                self.instants = TransList()
+                self.delays = Schedule()
+                self.dirty = set(self.trans.values())
+            # Retest only the transitions affected by the last firing, in the same order as a full scan.
+            # Others remain ready, in place in the list of enabled transitions.
+            for tt in sorted(self.dirty, key=lambda tt: tt.index):
+                ready = self.checkEnabled(tt)
+                if ready is None:
+                    continue
+                if ready:
+                    self.enabled.add(tt)
+                    if tt.rate is None and tt.delay is None:
+                        self.instants.add(tt)
+                    self.markReady(tt, mode)
+                else:
+                    self.enabled.discard(tt)
+                    self.instants.discard(tt)
+                    self.markUnready(tt)
+            self.dirty = set()
+            self.ready = self.enabled.trans
+            return
 
         # Loop over all transitions
         for t in self.trans:
-            v = 0 # counter for voting transitions
-            ready = True
             tt = self.trans[t]
+            ready = self.checkEnabled(tt)
             # Skip transitions without connections
-            if not (len(tt.inArcs) + len(tt.outArcs)):
-                continue
-            # Loop over the transition's incoming arcs
-            for i in tt.inArcs:
-                ii = tt.inArcs[i]
-                place = self.places[ii.start]
-                # Standard arc
-                if ii.type == 'std':
-                    # Check if there are enough tokens to meet the arc weight
-                    if place.tokens >= ii.weight:
-                        # Chech that firing will not put place below minimum
-                        if (place.tokens - ii.weight) < place.min:
-                            ready = False
-                            break
-                        # Tally votes for voting transition
-                        elif tt.vote is not None:
-                            v += 1
-                    else:
-                        # All arcs must be considered for voting transition
-                        if tt.vote is not None:
-                            pass
-                        # Only one unready arc need be found to establish that normal transition cannot fire
-                        else:
-                            ready = False
-                            break
-                # Inhibit arc
-                elif ii.type == 'inh':
-                    # If arc weight is met, transition cannot fire
-                    if place.tokens >= ii.weight:
-                        ready = False
-                        # Enforcement of inhibition arcs for voting transitions
-                        if tt.vote is not None:
-                            v = 0
-                        break
-
-            # Check tally for voting transitions
-            if tt.vote is not None:
-                if v >= tt.vote:
-                    ready = True
-                else:
-                    ready = False
-
-            # Go to next transition if it cannot fire
-            if ready == False:
+            if ready is None:
                 continue
-            # Loop over the transition's outgoing arcs
-            for o in tt.outArcs:
-                oo = tt.outArcs[o]
-                place = self.places[oo.end]
-                # Check that firing will not result in a place exceeding its token limit
-                if (place.tokens + oo.weight) > place.max:
-                    ready = False
-                    break
             # If all requirements for transition to fire are met, mark, and add to list
             if ready == True:
-                tt.ready = True
-                if tt.delay is not None and mode == 'stochastic':
-                    if tt.waiting is None:
-                        tt.waiting = [self.step, self.clock]
-                    elif tt.waiting[0] == self.step + 1:
-                        tt.waiting[0] += 1
-                    elif tt.waiting[0] > self.step + 1:
-                        tt.waiting = [self.step, self.clock]
-                elif mode == 'schedule':
-                    if tt.waiting is None:
-                        tt.waiting = [self.step, self.clock]
+                self.markReady(tt, mode)
                 self.ready.append(tt)
             else:
-                tt.waiting = None
-
+                self.markUnready(tt)
 
-    def resolveConflicts(self):
-        """
-        Removes ready to fire status from one of two conflicting transitions
-        (chosen at random). Only used when runMode = 'all'.
+    def checkEnabled(self, tt):
         """
-        # Incoming arcs
-        # newList = []
-        # Loop over transitions
-        for a in range(len(self.ready)):
-            tA = self.ready[a]
-            # Skip transitions already discounted
-            if not tA.ready:
-                continue
-            # Loop over transitions not yet compared with 'a'
-            for b in range(a+1,len(self.ready)):
-                tB = self.ready[b]
-                # Skip transitions already discounted
-                if not tB.ready:
-                    continue
-                aIn = []
-                bIn = []
-                # Create list of places on incoming arcs
-                for ai in tA.inArcs:
-                    aIn.append(tA.inArcs[ai].start)
-                for bi in tB.inArcs:
-                    bIn.append(tB.inArcs[bi].start)
-                # Check for common members
-                common = list(set(aIn) & set(bIn))
-                if not len(common):
-                    continue
+        Tests if the requisites for a transition to fire are met
 
-                conflict = False
-                # Get weights of arcs
-                for p in range(len(common)):
-                    place = self.places[common[p]]
-                    arcAW = None
-                    arcBW = None
-                    for aa in tA.inArcs:
-                        if tA.inArcs[aa].start == place.label and tA.inArcs[aa].type != 'inh':
-                            arcAW = tA.inArcs[aa].weight
-                            break
-                    for bb in tB.inArcs:
-                        if tB.inArcs[bb].start == place.label and tB.inArcs[bb].type != 'inh':
-                            arcBW = tA.inArcs[bb].weight
-                            break
-                    # If firing both transitions would deplete the place, a conflict exists
-                    if place.min > (place.tokens - arcAW - arcBW):
-                        conflict = True
-                        break
+        Parameters
+        ----------
+        tt : Trans object
+            The transition in question
 
-                # Select a transitions to deactivate, and add the other to the new ready list
-                if conflict:
-                    if random.randint(0,1): # Keep transition'a'
-                        # newList.append(tA)
-                        tB.ready = False
+        Returns
+        ----------
+        ready : boolean
+            True if the transition is enabled, False otherwise. None if the
+            transition has no connecting arcs.
+        """
+        v = 0 # counter for voting transitions
+        ready = True
+        # Skip transitions without connections
+        if not (len(tt.inArcs) + len(tt.outArcs)):
+            return None
+        # Loop over the transition's incoming arcs
+        for ii in tt.inArcs.values():
+            place = ii.place
+            # Standard arc
+            if ii.kind == arcStd:
+                # Check if there are enough tokens to meet the arc weight
+                if place.tokens >= ii.weight:
+                    # Chech that firing will not put place below minimum
+                    if (place.tokens - ii.weight) < place.min:
+                        ready = False
+                        break
+                    # Tally votes for voting transition
+                    elif tt.vote is not None:
+                        v += 1
+                else:
+                    # All arcs must be considered for voting transition
+                    if tt.vote is not None:
+                        pass
+                    # Only one unready arc need be found to establish that normal transition cannot fire
                     else:
-                        # newList.append(tB) # Keep transition 'b'
-                        tA.ready = False
-                        # If 'a' is not selected, there is no need to continue looking for conflicts with it
+                        ready = False
                         break
-                # # No conflict - keep both
-                # else:
-                #     newList.append(tA)
-                #     newList.append(tB)
+            # Inhibit arc
+            elif ii.kind == arcInh:
+                # If arc weight is met, transition cannot fire
+                if place.tokens >= ii.weight:
+                    ready = False
+                    # Enforcement of inhibition arcs for voting transitions
+                    if tt.vote is not None:
+                        v = 0
+                    break
 
-        # Update list of ready to fire transitions
-        # self.ready = newList
-        self.ready = []
-        for t in self.trans:
-            if self.trans[t].ready:
-                self.ready.append(self.trans[t])
+        # Check tally for voting transitions
+        if tt.vote is not None:
+            if v >= tt.vote:
+                ready = True
+            else:
+                ready = False
+
+        # Transition cannot fire
+        if ready == False:
+            return False
+        # Loop over the transition's outgoing arcs
+        for oo in tt.outArcs.values():
+            # Check that firing will not result in a place exceeding its token limit
+            if (oo.place.tokens + oo.weight) > oo.place.max:
+                return False
+        return True
+
+    def markReady(self, tt, mode):
+        """
+        Marks an enabled transition as ready to fire, and records when it
+        became enabled
 
-        # Outgoing arcs
-        # newList = []
-        for a in range(len(self.ready)):
-            tA = self.ready[a]
-            # Skip transitions already discounted
-            if not tA.ready:
-                continue
-            # Loop over transitions not yet compared with 'a'
-            for b in range(a+1,len(self.ready)):
-                tB = self.ready[b]
-                # Skip transitions already discounted
-                if not tB.ready:
-                    continue
-                aOut = []
-                bOut = []
-                # Create list of places on outgoing arcs
-                for ao in tA.outArcs:
-                    aOut.append(tA.outArcs[ao].end)
-                for bo in tB.outArcs:
-                    bOut.append(tB.outArcs[bo].start)
-                # Check for common members
-                common = list(set(aOut) & set(bOut))
-                if not len(common):
-                    continue
+        Parameters
+        ----------
+        tt : Trans object
+            The transition in question
+        mode : string
+            Run mode (see readyTrans)
+        """
+        tt.ready = True
+        if tt.delay is not None and mode in ['stochastic', 'tau-leap']:
+            if tt.waiting is None:
+                tt.waiting = [self.step, self.clock]
+            elif tt.waiting[0] == self.step + 1:
+                tt.waiting[0] += 1
+            elif tt.waiting[0] > self.step + 1:
+                tt.waiting = [self.step, self.clock]
+        elif mode == 'schedule':
+            if tt.waiting is None:
+                tt.waiting = [self.step, self.clock]
+        if tt.rate is not None and mode == 'stochastic' and self.engine == 'nextreaction' and tt.label not in self.reactions:
+            if tt.rate <= 0:
+                raise ValueError('Transition "%s" has invalid rate (%r)' % (tt.label, tt.rate))
+            if self.sampler == 'pool':
+                self.reactions[tt.label] = self.clock + self.variatePool().exponential()/tt.rate
+            else:
+                self.reactions[tt.label] = self.clock + self.rng.expovariate(tt.rate)
+        if tt.delay is not None and mode == 'stochastic' and self.engine == 'nextreaction':
+            self.delays[tt.label] = tt.waiting[1] + tt.delay
 
-                conflict = False
-                # Get weights of arcs
-                for p in range(len(common)):
-                    place = self.places[common[p]]
-                    arcAW = None
-                    arcBW = None
-                    for aa in range(len(tA.outArcs)):
-                        if tA.outArcs[aa].start == place.label and tA.outArcs[aa].type != 'inh':
-                            arcAW = tA.outArcs[aa].weight
-                            break
-                    for bb in range(len(tB.outArcs)):
-                        if tB.outArcs[bb].end == place.label and tB.outArcs[bb].type != 'inh':
-                            arcBW = tA.outArcs[bb].weight
-                            break
-                    # If firing both transitions would overpopulate the place, a conflict exists
-                    if place.min > (place.tokens + arcAW + arcBW):
-                        conflict = True
-                        break
+    def markUnready(self, tt):
+        """
+        Clears the ready and waiting status of a transition whose requisites
+        are not met, and removes it from the firing schedule
 
-                # Select a transitions to deactivate, and add the other to the new ready list
-                if conflict:
-                    if random.randint(0,1): # Keep transition 'a'
-                        # newList.append(tA)
-                        tB.ready = False
-                    else: # Keep transition 'b'
-                        newList.append(tB)
-                        # tA.ready = False
-                        # If 'a' is not selected, there is no need to continue looking for conflicts with it
-                        break
+        Parameters
+        ----------
+        tt : Trans object
+            The transition in question
+        """
+        tt.ready = False
+        tt.waiting = None
+        if tt.label in self.schedule:
+            tt.pcnStatus = 1.0
+            self.schedule.pop(tt.label)
+        if tt.label in self.reactions:
+            self.reactions.pop(tt.label)
+        if tt.label in self.delays:
+            self.delays.pop(tt.label)
+
+    def buildDependents(self):
+        """
+        Constructs the index of transitions connected to each place, and of
+        the places changed by each transition, for the 'incremental' engine
+        """
+        self.dependents = collections.OrderedDict()
+        self.touches = collections.OrderedDict()
+        self.transIndex = {}
+        for p in self.places:
+            self.dependents[p] = []
+        for n, t in enumerate(self.trans):
+            tt = self.trans[t]
+            self.transIndex[t] = n
+            # Any arc type, including outgoing arcs due to place maximums
+            for p in list(tt.inArcs) + list(tt.outArcs):
+                if tt not in self.dependents[p]:
+                    self.dependents[p].append(tt)
+            # Places whose token count can be altered by firing (excluding resets)
+            touched = [i for i in tt.inArcs if tt.inArcs[i].type == 'std']
+            touched += [o for o in tt.outArcs if o not in touched]
+            self.touches[t] = touched
+        self.enabled = None
+
+    def buildConflicts(self):
+        """
+        Constructs the structural conflict graph for the 'all' run mode,
+        listing for each transition the places it shares with other
+        transitions: those which more than one transition takes tokens from,
+        or more than one transition adds tokens to with a token maximum
+        """
+        self.conflicts = collections.OrderedDict((t, []) for t in self.trans)
+        for p in self.places:
+            place = self.places[p]
+            # Transitions taking tokens from, and adding tokens to, the place, with their arc weights
+            takers = []
+            givers = []
+            for t in self.trans:
+                tt = self.trans[t]
+                if p in tt.inArcs and tt.inArcs[p].kind == arcStd:
+                    takers.append((tt, tt.inArcs[p].weight))
+                if p in tt.outArcs and place.max != float('Inf'):
+                    givers.append((tt, tt.outArcs[p].weight))
+            if len(takers) < 2:
+                takers = []
+            if len(givers) < 2:
+                givers = []
+            if takers or givers:
+                entry = (place, takers, givers)
+                for t in collections.OrderedDict((tt.label, None) for tt, weight in takers + givers):
+                    self.conflicts[t].append(entry)
 
+    def resolveConflicts(self):
+        """
+        Removes ready to fire status from conflicting transitions (chosen at
+        random). Only used when runMode = 'all'. Only places shared by ready
+        transitions in the conflict graph (see buildConflicts) are checked:
+        first for those from which the ready transitions together would take
+        the place below its minimum, and then for those to which they would
+        together add tokens beyond its maximum. Transitions sharing such a
+        place are discounted one at a time until the rest fit.
+        """
+        if self.conflicts is None:
+            self.buildConflicts()
+        # Places shared by ready transitions, each once
+        shared = collections.OrderedDict()
+        for t in self.ready:
+            for entry in self.conflicts[t.label]:
+                shared[entry[0]] = entry
+        # Incoming arcs, then outgoing arcs
+        for side in [1, 2]:
+            for entry in shared.values():
+                place = entry[0]
+                # Transitions still ready, and the tokens each would take or add (voting transitions skip inputs they cannot take from)
+                sharing = [(t, weight) for t, weight in entry[side] if t.ready and not (side == 1 and t.vote is not None and weight > place.tokens)]
+                if side == 1:
+                    excess = sum([weight for t, weight in sharing]) - (place.tokens - place.min)
+                else:
+                    excess = place.tokens + sum([weight for t, weight in sharing]) - place.max
+                # Select transitions to deactivate
+                while excess > 0:
+                    t, weight = sharing.pop(self.rng.randint(0, len(sharing) - 1))
+                    t.ready = False
+                    # Retested by the 'incremental' engines at the next step, to be made ready again
+                    if self.enabled is not None:
+                        self.dirty.add(t)
+                    excess -= weight
         # Update list of ready to fire transitions
-        # self.ready = newList
-        self.ready = []
-        for t in self.trans:
-            if self.trans[t].ready:
-                self.ready.append(self.trans[t])
+        self.ready = [t for t in self.ready if t.ready]
 
-    def calcTokens(self, label):
+    def calcTokens(self, label, count=1):
         """
         Calculates the change in tokens from firing a given transition
 
@@ -1382,72 +1832,99 @@ class PetriNet(object):
         ----------
         label : string
             Unique identifier of the transition
+        count : integer
+            Number of times the transition fires (Default = 1, greater only
+            for leaps in 'tau-leap' run mode)
         """
         trans = self.trans[label]
         assert trans.ready, ('Cannot fire! -- transition, "%s" is not ready' % label)
-        print('Firing transition, "%s":' % label)
+        if trace >= traceSteps:
+            traceEvent(traceSteps, 'fire', 'Firing transition, "%s":' % label if count == 1 else 'Firing transition, "%s", %d times:' % (label, count), step=self.step + 1, trans=label, count=count)
         # Update firedCount
-        trans.firedCount += 1
-        self.transFiredTotal += 1
+        trans.firedCount += count
+        self.transFiredTotal += count
         trans.waiting = None
         # Incoming arcs
-        for i in trans.inArcs:
-            ii = trans.inArcs[i]
-            if ii.type != 'std':
+        for ii in trans.inArcs.values():
+            if ii.kind != arcStd:
                 continue
-            place = self.places[ii.start]
+            place = ii.place
             if trans.vote is not None:
                 if ii.weight > place.tokens:
                     continue
-            print('Place, "%s", loses %d tokens' % (ii.start, ii.weight))
-            place.tokenChange -= ii.weight
-            place.outs += ii.weight
+            if trace >= traceEvents:
+                traceEvent(traceEvents, 'tokens', 'Place, "%s", loses %d tokens' % (ii.start, ii.weight*count), step=self.step + 1, place=ii.start, change=-ii.weight*count)
+            place.tokenChange -= ii.weight*count
+            place.outs += ii.weight*count
+            self.changed[place] = True
         # Outgoing arcs
-        for o in trans.outArcs:
-            oo = trans.outArcs[o]
-            place = self.places[oo.end]
+        for oo in trans.outArcs.values():
+            place = oo.place
             test = False
             if trans.vote is not None:
                 if oo.weight > place.tokens:
                     test = False
-                    for i in trans.inArcs:
-                        ii = trans.inArcs[i]
-                        if ii.type == 'std' and ii.start == oo.end:
-                            print('%s : %s' % (label,ii.start))
+                    for ii in trans.inArcs.values():
+                        if ii.kind == arcStd and ii.start == oo.end:
+                            if trace >= traceDebug:
+                                traceEvent(traceDebug, 'voteSkip', '%s : %s' % (label,ii.start), step=self.step + 1, trans=label, place=ii.start)
                             test = True
                             break
                     if test:
                         continue
-            print('Place, "%s", receives %d tokens' % (oo.end, oo.weight))
+            if trace >= traceEvents:
+                traceEvent(traceEvents, 'tokens', 'Place, "%s", receives %d tokens' % (oo.end, oo.weight*count), step=self.step + 1, place=oo.end, change=oo.weight*count)
             if test:
                 sys.exit()
-            place.tokenChange += oo.weight
-            place.ins += oo.weight
+            place.tokenChange += oo.weight*count
+            place.ins += oo.weight*count
+            self.changed[place] = True
 
-    def updateTokens(self):
+    def updateTokens(self, clock=None):
         """
-        Updates places by tokenChange
+        Updates places changed by the current step by tokenChange
+
+        Parameters
+        ----------
+        clock : float
+            Clock at which the tokens change, to which the places' time with
+            tokens is settled first (Default = None, for PetriNet.clock)
         """
-        for p in self.places:
-            pp = self.places[p]
+        if clock is None:
+            clock = self.clock
+        for pp in self.changed:
+            if not pp.tokenChange:
+                continue
+            pp.settleTokenTime(clock)
             pp.tokens += pp.tokenChange
             assert (pp.tokens >= pp.min and pp.tokens <= pp.max), 'Invalid token count, %d, on place, "%s". Change = %d. Min = %d. Max = %r.' % (pp.tokens, pp.label, pp.tokenChange, pp.min, pp.max)
             pp.tokenChange = 0
 
     def clearReady(self):
         """
-        Removes ready to fire status after use
+        Removes ready to fire status after use. The 'incremental' engines
+        keep the status of transitions until they are retested.
         """
-        for t in self.ready:
-            t.ready = False
+        if self.enabled is None:
+            for t in self.ready:
+                t.ready = False
         self.ready = []
 
     def buildConnectivity(self):
         """
-        Constructs a matrix representing the connections between places and
-        transitions
+        Constructs matrices representing the connections between places and
+        transitions (requires NumPy)
+
+        Returns
+        ----------
+        connectivity : Connectivity object
+            Compiled description of the Petri Net, also stored as
+            PetriNet.connectivity
         """
-        raise NotImplementedError('Method, "buildConnectivity" has not yet been constructed')
+        if not self.arcsVerified:
+            self.verifyArcs()
+        self.connectivity = Connectivity(self)
+        return self.connectivity
 
     def selection(self, mode):
         """
@@ -1476,9 +1953,12 @@ class PetriNet(object):
         # 'single' mode -  all transitions given equal weight
         if mode == 'single':
             total = float(len(self.ready))
-            transition = self.ready[random.randint(0, len(self.ready)-1)]
-        # 'stochastic' mode - transitions selected according to rate
-        elif mode == 'stochastic':
+            transition = self.ready[self.rng.randint(0, len(self.ready)-1)]
+        # 'stochastic' mode with 'nextreaction' engine - earliest putative firing time selected
+        elif mode == 'stochastic' and self.engine == 'nextreaction':
+            return self.nextReaction()
+        # 'stochastic' mode - transitions selected according to rate (also exact steps of 'tau-leap' mode)
+        elif mode in ['stochastic', 'tau-leap']:
             # Fire instant transitions fisrt
             delayOnly = []
             for t in self.ready:
@@ -1488,7 +1968,7 @@ class PetriNet(object):
                     delayOnly.append(t)
             if len(table):
                 time = 0.0
-                transition = table[random.randint(0, len(table)-1)]
+                transition = table[self.rng.randint(0, len(table)-1)]
                 return transition, time
             else:
                 # Create event table and sum rate total
@@ -1502,14 +1982,14 @@ class PetriNet(object):
                 if len(table):
                     table.append([total, None])
                     # Randomly select point on the table
-                    event = random.uniform(0, total)
+                    event = self.rng.uniform(0, total)
                     # Find corresponding transition
                     for i in range(len(table)):
                         if event >= table[i][0] and event < table[i+1][0]:
                             transition = table[i][1]
                             break
                     # Calculate clock advancement
-                    mu = random.random()
+                    mu = self.rng.random()
                     time = -math.log(mu)/total
 
             # Compile list of fixed delay transitions that have been waiting to fire and select one
@@ -1534,7 +2014,7 @@ class PetriNet(object):
                     else:
                         table.append(t)
             if len(table):
-                transition = table[random.randint(0, len(table)-1)]
+                transition = table[self.rng.randint(0, len(table)-1)]
                 # Compute remaning time for fixed delay duration
                 time = transition.delay - (self.clock - transition.waiting[1])
                 assert time > 0.0, (time, transition.waiting, transition.delay)
@@ -1545,12 +2025,6 @@ class PetriNet(object):
             instants = []
             pcInst = []
 
-            # Remove transitions from the schedule whose requisites are no longer met
-            for s in list(self.schedule):
-                if not self.trans[s].ready:
-                    self.trans[s].pcnStatus = 1.0
-                    self.schedule.pop(s)
-
             # Assign firing time for 'ready' transitions not yet in the schedule
             for trans in self.ready:
                 if trans.rate is not None or trans.uniform is not None or trans.delay is not None or trans.weibull is not None or trans.beta is not None or trans.lognorm is not None or trans.cyclic is not None:
@@ -1559,25 +2033,28 @@ class PetriNet(object):
                         self.schedule[trans.label] = self.clock + self.getWait(trans)
                     elif trans.pcn:
                         con = 1.0
-                        for ia in trans.inArcs:
-                            if trans.inArcs[ia].type == 'pcn':
-                                con += trans.inArcs[ia].weight * self.places[ia].tokens
+                        for ia in trans.inArcs.values():
+                            if ia.kind == arcPcn:
+                                con += ia.weight * ia.place.tokens
                         if con != trans.pcnStatus and trans.waiting is not None:
                             oldScdl = self.schedule[trans.label]
                             #print('>> con %f, status %f, waiting %r' % (con, trans.pcnStatus, trans.waiting))
                             self.schedule[trans.label] = max(self.clock, trans.waiting[1] + self.getWait(trans))
-                            print('>> Rescheduling %s from %f %s to %f %s' % (trans.label, oldScdl, self.units, self.schedule[trans.label], self.units))
+                            if trace >= traceEvents:
+                                traceEvent(traceEvents, 'reschedule', '>> Rescheduling %s from %f %s to %f %s' % (trans.label, oldScdl, self.units, self.schedule[trans.label], self.units), step=self.step + 1, trans=trans.label, old=oldScdl, new=self.schedule[trans.label])
                 else:
                     # Create list of instant transitions
                     instants.append(trans)
                 if trans.pcn:
                     # zero weight place coniditional arcs fire timed transitions instantly
-                    for i in trans.inArcs:
-                        ii = trans.inArcs[i]
-                        if ii.type == 'pcn' and not ii.weight and self.places[ii.start].tokens:
+                    for ii in trans.inArcs.values():
+                        if ii.kind == arcPcn and not ii.weight and ii.place.tokens:
                             pcInst.append(trans)
 
             # Update schedule object to account for instance place coniditional effect
+            if len(pcInst):
+                # Copied, as the 'incremental' engines keep the list between steps
+                self.ready = list(self.ready)
             for pci in range(len(pcInst)):
                 for t in range(len(self.ready)):
                     if self.ready[t] == pcInst[pci]:
@@ -1589,26 +2066,20 @@ class PetriNet(object):
 
             # Instant transitions always fire first
             if len(instants):
-                print('%d instant transitions ready to fire:' % len(instants))
-                for t in instants:
-                    print('\t%s' % t.label)
-                return instants[random.randint(0,len(instants)-1)], 0.0
+                if trace >= traceDebug:
+                    traceEvent(traceDebug, 'instants', '%d instant transitions ready to fire:\n' % len(instants) + '\n'.join('\t%s' % t.label for t in instants), step=self.step + 1, trans=[t.label for t in instants])
+                return instants[self.rng.randint(0,len(instants)-1)], 0.0
 
             # Create list of transitions that are next availible to fire
             nexts = []
             if len(self.schedule):
-                next = float('Inf')
-                print('Current transition firing schedule:')
-                for s in self.schedule:
-                    print('\t%s   %.3g %s' % (s, self.schedule[s], self.units))
-                    next = min(self.schedule[s], next)
-                for s in self.schedule:
-                    if self.schedule[s] == next:
-                        nexts.append(s)
+                if trace >= traceDebug:
+                    traceEvent(traceDebug, 'schedule', 'Current transition firing schedule:\n' + '\n'.join('\t%s   %.3g %s' % (s, self.schedule[s], self.units) for s in self.schedule), step=self.step + 1, schedule=[[s, self.schedule[s]] for s in self.schedule])
+                nexts = self.schedule.nexts()
 
                 # If more than one transition is scheduled to fire next (i.e. at the same time), select one at random
                 if len(nexts):
-                    transition = self.trans[nexts[random.randint(0,len(nexts)-1)]]
+                    transition = self.trans[nexts[self.rng.randint(0,len(nexts)-1)]]
                     time = self.schedule[transition.label] - self.clock
                     # Remove selected transition from the scheudle
                     self.schedule.pop(transition.label)
@@ -1616,6 +2087,151 @@ class PetriNet(object):
         # Return results
         return transition, time
 
+    def nextReaction(self):
+        """
+        Selects the next transition to fire in 'stochastic' run mode for the
+        'nextreaction' engine. Instant transitions fire first. Otherwise,
+        the rate transition with the earliest putative firing time in
+        PetriNet.reactions is selected, unless a fixed delay transition
+        completes its delay sooner. The putative times of all other
+        transitions are kept, rather than drawn afresh at every step, and
+        instant and fixed delay transitions are read from PetriNet.instants
+        and PetriNet.delays, so that the ready transitions are not scanned.
+
+        Returns
+        ----------
+        transition : Trans object
+            The transition selected to fire
+        time : float
+            The clock advancement generated
+        """
+        transition = None
+        time = None
+        # Fire instant transitions first
+        if len(self.instants):
+            return self.instants.trans[self.rng.randint(0, len(self.instants)-1)], 0.0
+
+        # Rate transition with the earliest putative firing time
+        if len(self.reactions):
+            if trace >= traceDebug:
+                traceEvent(traceDebug, 'reactions', 'Current putative firing times:\n' + '\n'.join('\t%s   %.3g %s' % (r, self.reactions[r], self.units) for r in self.reactions), step=self.step + 1, reactions=[[r, self.reactions[r]] for r in self.reactions])
+            nexts = self.reactions.nexts()
+            transition = self.trans[nexts[self.rng.randint(0, len(nexts)-1)]]
+            time = self.reactions[transition.label] - self.clock
+
+        # Fixed delay transitions due to complete their delay first
+        if len(self.delays):
+            nexts = self.delays.nexts()
+            minTime = self.delays[nexts[0]]
+            if time is None or minTime < self.clock + time:
+                # Ties in the order of PetriNet.trans
+                table = sorted(nexts, key=self.transIndex.__getitem__)
+                transition = self.trans[table[self.rng.randint(0, len(table)-1)]]
+                # Compute remaning time for fixed delay duration
+                time = transition.delay - (self.clock - transition.waiting[1])
+                assert time > 0.0, (time, transition.waiting, transition.delay)
+
+        # A new putative firing time is drawn if the transition is ready again
+        if transition is not None and transition.label in self.reactions:
+            self.reactions.pop(transition.label)
+        return transition, time
+
+    def leap(self, maxClock=None):
+        """
+        Selects the transitions to fire in 'tau-leap' run mode. If every
+        ready transition is a plain rate transition, a leap in time is
+        chosen such that the expected change in each place's tokens is
+        within 'tauError' of its tokens, and each transition fires a Poisson
+        distributed number of times over the leap. Leaps which would take a
+        place beyond its minimum, maximum, or limits, or meet an inhibitor
+        arc of a firing transition, are halved until valid. An exact
+        'stochastic' step is taken instead if any other transition is ready,
+        if fewer than 'tauCritical' firings are expected, or if no leap is
+        bounded (no ready transition changes any place's tokens, and there
+        is no maximum clock).
+
+        Parameters
+        ----------
+        maxClock : float
+            Maximum clock time permitted, which leaps do not exceed
+
+        Returns
+        ----------
+        fireList : list
+            The transitions selected to fire
+        counts : list
+            Number of times each transition fires
+        time : float
+            The clock advancement generated
+        """
+        total = 0.0
+        changes = []
+        for t in self.ready:
+            if t.rate is None or t.uniform is not None or t.delay is not None or t.weibull is not None or t.beta is not None or t.lognorm is not None or t.cyclic is not None or t.vote is not None or len(t.reset):
+                break
+            if t.rate <= 0:
+                raise ValueError('Transition "%s" has invalid rate (%r)' % (t.label, t.rate))
+            total += t.rate
+            # Net change in tokens of each place per firing
+            change = {}
+            for ii in t.inArcs.values():
+                if ii.kind == arcStd:
+                    change[ii.place] = change.get(ii.place, 0) - ii.weight
+            for oo in t.outArcs.values():
+                change[oo.place] = change.get(oo.place, 0) + oo.weight
+            changes.append(change)
+        else:
+            # Expected change in tokens of each place and its variance per unit time
+            mean = {}
+            var = {}
+            for t, change in zip(self.ready, changes):
+                for place, c in change.items():
+                    mean[place] = mean.get(place, 0.0) + t.rate*c
+                    var[place] = var.get(place, 0.0) + t.rate*c*c
+            tau = float('inf')
+            for place in mean:
+                bound = max(self.tauError*place.tokens, 1.0)
+                if mean[place]:
+                    tau = min(tau, bound/abs(mean[place]))
+                if var[place]:
+                    tau = min(tau, bound*bound/var[place])
+            if maxClock is not None:
+                tau = min(tau, maxClock - self.clock)
+            # Unbounded if no ready transition changes any place's tokens
+            while not math.isinf(tau) and total*tau >= self.tauCritical:
+                counts = []
+                for t in self.ready:
+                    k = poissonVariate(self.rng, t.rate*tau)
+                    if t.maxFire is not None:
+                        k = max(min(k, t.maxFire - t.firedCount), 0)
+                    counts.append(k)
+                # Tokens of each place after the leap
+                tokens = {}
+                for k, change in zip(counts, changes):
+                    for place, c in change.items():
+                        tokens[place] = tokens.get(place, place.tokens) + k*c
+                valid = True
+                for place, n in tokens.items():
+                    if n < place.min or n > place.max or (place.limits[0] is not None and n < place.limits[0] <= place.tokens) or (place.limits[1] is not None and n > place.limits[1] >= place.tokens):
+                        valid = False
+                        break
+                if valid:
+                    for t, k in zip(self.ready, counts):
+                        if k:
+                            for ii in t.inArcs.values():
+                                if ii.kind == arcInh and tokens.get(ii.place, ii.place.tokens) >= ii.weight:
+                                    valid = False
+                if valid:
+                    fireList = [t for t, k in zip(self.ready, counts) if k]
+                    counts = [k for k in counts if k]
+                    if trace >= traceEvents:
+                        traceEvent(traceEvents, 'leap', 'Leaping %f %s with %d firings' % (tau, self.units, sum(counts)), step=self.step + 1, time=tau, trans=[t.label for t in fireList], counts=counts)
+                    return fireList, counts, tau
+                tau /= 2.0
+        # Exact step
+        transition, time = self.selection('tau-leap')
+        return [transition], [1], time
+
     def getWait(self, trans):
         """
         Calculates the duration between the requisites of a transition being
@@ -1635,33 +2251,53 @@ class PetriNet(object):
         wait = 0.0
         con = 1.0 # Modifier for place conditionals
         if trans.pcn:
-            for ia in trans.inArcs:
-                if trans.inArcs[ia].type == 'pcn':
-                    con += trans.inArcs[ia].weight * self.places[ia].tokens
+            for ia in trans.inArcs.values():
+                if ia.kind == arcPcn:
+                    con += ia.weight * ia.place.tokens
             # if con == 0:
             #     con = 1
+        # Standard variates are scaled here, so pools do not depend on 'con'
+        pool = self.variatePool() if self.sampler == 'pool' else None
         if trans.rate is not None:
             # KMC-esque Stochastic firing
-            wait += (-math.log(random.uniform(0,1)))/(trans.rate*con)
+            if pool is None:
+                wait += (-math.log(self.rng.uniform(0,1)))/(trans.rate*con)
+            else:
+                wait += pool.exponential()/(trans.rate*con)
         if trans.uniform is not None:
             # Random uniform distribution
-            wait += -random.uniform(-trans.uniform/con, 0.0) # gives wait in range of (0.0, uniform/con]
+            if pool is None:
+                wait += -self.rng.uniform(-trans.uniform/con, 0.0) # gives wait in range of (0.0, uniform/con]
+            else:
+                wait += pool.uniform()*(trans.uniform/con)
         if trans.delay is not None:
             # Fixed wait firing
             wait += trans.delay/con
         if trans.weibull is not None:
             #  Weibull distribution
             genMean = trans.weibull[0]
-            if trans.weibull[2] > 0.0:
-                genMean = max(random.normalvariate(genMean, trans.weibull[2]), 0.0)
-            wait += (genMean/con)*((-math.log(1-random.uniform(0,1)))**(1.0/trans.weibull[1]))
+            if pool is None:
+                if trans.weibull[2] > 0.0:
+                    genMean = max(self.rng.normalvariate(genMean, trans.weibull[2]), 0.0)
+                wait += (genMean/con)*((-math.log(1-self.rng.uniform(0,1)))**(1.0/trans.weibull[1]))
+            else:
+                if trans.weibull[2] > 0.0:
+                    genMean = max(genMean + pool.normal()*trans.weibull[2], 0.0)
+                wait += (genMean/con)*pool.weibull(trans.weibull[1])
         if trans.beta is not None:
             # Beta distribution
-            wait += random.betavariate(trans.beta[0], trans.beta[1])*(trans.beta[2]/con)
-            print(trans.beta, con, wait)
+            if pool is None:
+                wait += self.rng.betavariate(trans.beta[0], trans.beta[1])*(trans.beta[2]/con)
+            else:
+                wait += pool.beta(trans.beta[0], trans.beta[1])*(trans.beta[2]/con)
+            if trace >= traceDebug:
+                traceEvent(traceDebug, 'beta', '%r %r %r' % (trans.beta, con, wait), step=self.step + 1, trans=trans.label, con=con, wait=wait)
         if trans.lognorm is not None:
             # Lognormal
-            wait += random.lognormvariate(trans.lognorm[0]/con, trans.lognorm[1])
+            if pool is None:
+                wait += self.rng.lognormvariate(trans.lognorm[0]/con, trans.lognorm[1])
+            else:
+                wait += math.exp(trans.lognorm[0]/con + trans.lognorm[1]*pool.normal())
         if trans.cyclic is not None:
             # Cyclic
             if con > 0.0:
@@ -1685,6 +2321,29 @@ class PetriNet(object):
             trans.pcnStatus = con
         return wait
 
+    def variatePool(self):
+        """
+        Returns the pools of variates for the 'pool' sampler, creating new
+        pools, seeded from 'rng', if there are none or 'rng' has been replaced
+
+        Returns
+        ----------
+        variates : Variates object
+            Pools of variates drawn from the current random number stream
+        """
+        if self.variates is None or self.variates.source is not self.rng:
+            self.variates = Variates(self.rng)
+        return self.variates
+
+    def seedString(self):
+        """
+        Returns the random number seed formatted for the title line of
+        output files (empty if not set)
+        """
+        if self.seed is None:
+            return ''
+        return 'Seed,%s,' % self.seed
+
     def writeNetStart(self, mode):
         """
         Creates output file with header and writes initial state
@@ -1704,30 +2363,47 @@ class PetriNet(object):
 
         Returns
         ----------
-        pfile : filepointer
+        pfile : RowWriter object
             Object indicating location to which place data is writen
-        tfile : filepointer
+        tfile : RowWriter object
             Object indicating location to which transition data is writen
-        tlist : filepointer
+        tlist : RowWriter object
             Object indicating location to which list of transitions fired is
-            writen
+            writen (a binary file in the 'binary' fire format)
         """
+        # Compression settings may have been changed since construction
+        checkCompression(self.compression, self.compressionLevel)
         path = os.path.join(os.getcwd(), self.name)
         if not os.path.exists(path) and True in [self.writePlaceFile, self.writeTransFile, self.writeFireFile]:
             os.mkdir(path)
+        # Step, and clock if timed, leading each row
+        lead = '%d,%f,' if mode in ['stochastic', 'tau-leap', 'schedule'] else '%d,'
         # Make places file
-        if self.writePlaceFile:
+        if self.writePlaceFile and self.placeFormat == 'delta':
+            name = 'Macchiato_PetriNet_PlaceDeltas_%d.csv' % self.time
+            if self.debug:
+                name = 'debug_PlaceDeltas.csv'
+            columns = [self.places[p] for p in self.places if not self.placesToPrint or p in self.placesToPrint]
+            pfile = DeltaWriter(os.path.join(os.getcwd(), path, name), columns, lead, self.keyframeRows, self.flushRows, self.output, None if self.catFiles is None else self.catFiles['Places'], self.compression, self.compressionLevel)
+            if self.catFiles is not None:
+                pfile.write('>'*5 + ',%d,' % self.time + '<'*5 + '\n')
+            header = '%s,PlaceDeltas,(Token Changes),%s\nStep,'% (self.name, self.seedString())
+            if mode in ['stochastic', 'tau-leap', 'schedule']:
+                header += 'Time/%s,' % self.units
+            header += 'Type,' + ''.join(['%s,' % p.label for p in columns])
+            pfile.write('%s\n' % header)
+        elif self.writePlaceFile:
             name = 'Macchiato_PetriNet_Places_%d.csv' % self.time
             if self.debug:
                 name = 'debug_Places.csv'
-            pfile = open(os.path.join(os.getcwd(), path, name), 'w')
-            header = '%s,Places,(Token Count),\nStep,'% self.name
-            if mode in ['stochastic', 'schedule']:
+            columns = [self.places[p] for p in self.places if not self.placesToPrint or p in self.placesToPrint]
+            pfile = RowWriter(os.path.join(os.getcwd(), path, name), columns, lead + '%d,'*len(columns) + '\n', self.flushRows, self.output, None if self.catFiles is None else self.catFiles['Places'], self.compression, self.compressionLevel)
+            if self.catFiles is not None:
+                pfile.write('>'*5 + ',%d,' % self.time + '<'*5 + '\n')
+            header = '%s,Places,(Token Count),%s\nStep,'% (self.name, self.seedString())
+            if mode in ['stochastic', 'tau-leap', 'schedule']:
                 header += 'Time/%s,' % self.units
-            for p in self.places:
-                if self.placesToPrint and p not in self.placesToPrint:
-                    continue
-                header += ('%s,' % self.places[p].label)
+            header += ''.join(['%s,' % p.label for p in columns])
             pfile.write('%s\n' % header)
         else:
             pfile = None
@@ -1736,48 +2412,65 @@ class PetriNet(object):
             name = 'Macchiato_PetriNet_Trans_%d.csv' % self.time
             if self.debug:
                 name = 'debug_Trans.csv'
-            tfile = open(os.path.join(os.getcwd(), path, name), 'w')
-            header = '%s,Transitions,(Fired Count),\nStep,'% self.name
-            if mode in ['stochastic', 'schedule']:
+            columns = [self.trans[t] for t in self.trans if not self.transToPrint or t in self.transToPrint]
+            tfile = RowWriter(os.path.join(os.getcwd(), path, name), columns, lead + '%d,'*len(columns) + '\n', self.flushRows, self.output, None if self.catFiles is None else self.catFiles['Trans'], self.compression, self.compressionLevel)
+            if self.catFiles is not None:
+                tfile.write('>'*5 + ',%d,' % self.time + '<'*5 + '\n')
+            header = '%s,Transitions,(Fired Count),%s\nStep,'% (self.name, self.seedString())
+            if mode in ['stochastic', 'tau-leap', 'schedule']:
                 header += 'Time/%s,' % self.units
-            for t in self.trans:
-                if self.transToPrint and t not in self.transToPrint:
-                    continue
-                header += ('%s,' % self.trans[t].label)
+            header += ''.join(['%s,' % t.label for t in columns])
             tfile.write('%s\n' % header)
         else:
             tfile = None
         # Transitions fired at each step
-        if self.writeFireFile:
+        if self.writeFireFile and self.fireFormat == 'binary':
+            name = 'Macchiato_PetriNet_FireList_%d.mfl' % self.time
+            if self.debug:
+                name = 'debug_TransList.mfl'
+            if self.catFiles is not None:
+                # Header written on opening
+                tlist = self.catFiles['FireList']
+            else:
+                tlist = OutputFile(os.path.join(os.getcwd(), path, name), self.compression, self.compressionLevel)
+                writeEventLogHeader(tlist, self)
+            self.fireIndex = {t: i for i, t in enumerate(self.trans)}
+            # Start of simulation
+            tlist.write(EventLog.record.pack(self.time, self.step, self.clock, EventLog.noTrans))
+        elif self.writeFireFile:
             name = 'Macchiato_PetriNet_FireList_%d.csv' % self.time
             if self.debug:
                 name = 'debug_TransList.csv'
-            tlist = open(os.path.join(os.getcwd(), path, name), 'w')
-            header = '%s\nStep,' % self.name
-            if mode in ['stochastic', 'schedule']:
+            tlist = RowWriter(os.path.join(os.getcwd(), path, name), [], lead + '%s\n', self.flushRows, self.output, None if self.catFiles is None else self.catFiles['FireList'], self.compression, self.compressionLevel)
+            if self.catFiles is not None:
+                tlist.write('>'*5 + ',%d,' % self.time + '<'*5 + '\n')
+            seed = self.seedString()
+            header = '%s%s\nStep,' % (self.name, ',' + seed if seed else '')
+            if mode in ['stochastic', 'tau-leap', 'schedule']:
                 header += 'Time/%s,' % self.units
             header += 'Transition,'
             tlist.write('%s\n' % header)
         else:
             tlist = None
         # Write 0th entry
+        self.outputRows = 0
         self.writeNet(pfile, tfile, tlist, mode)
         # Return file pointers
         return pfile, tfile, tlist
 
-    def writeNet(self, pfile, tfile, tlist, mode, fireList=[]):
+    def writeNet(self, pfile, tfile, tlist, mode, fireList=[], counts=None, record=None):
         """
         Writes Petri Net status at the end of a step
 
         Parameters
         ----------
-        pfile : filepointer
+        pfile : RowWriter object
             Object indicating location to which place data is writen
-        tfile : filepointer
+        tfile : RowWriter object
             Object indicating location to which transition data is writen
-        tlist : filepointer
+        tlist : RowWriter object
             Object indicating location to which list of transitions fired is
-            writen
+            writen (a binary file in the 'binary' fire format)
         mode : string
         *  all : All non-conflicting transitions are fired simultaneously
         *  single : One transition is randomly selected and fired
@@ -1785,35 +2478,30 @@ class PetriNet(object):
            to its rates (plus instant and fixed delay transitions)
         fireList : list
             Transitions firing on this step.
+        counts : list
+            Number of times each transition fires, each firing being listed
+            (Default = None, for once each)
+        record : StoreRecord object
+            If given, the state is added to this in place of the files
         """
-        # Places
-        if self.writePlaceFile:
-            line = ('%d,' % self.step)
-            if mode in ['stochastic', 'schedule']:
-                line += ('%f,' % self.clock)
-            for p in self.places:
-                if self.placesToPrint and p not in self.placesToPrint:
-                    continue
-                line += ('%d,' % self.places[p].tokens)
-            pfile.write('%s\n' % line)
-        # Transitions
-        if self.writeTransFile:
-            line = ('%d,' % self.step)
-            if mode in ['stochastic', 'schedule']:
-                line += ('%f,' % self.clock)
-            for t in self.trans:
-                if self.transToPrint and t not in self.transToPrint:
-                    continue
-                line += ('%d,' % self.trans[t].firedCount)
-            tfile.write('%s\n' % line)
-        # Transition List
-        if self.writeFireFile:
-            line = ('%d,' % self.step)
-            if mode in ['stochastic', 'schedule']:
-                line += ('%f,' % self.clock)
-            for t in fireList:
-                line += ('%s,' % t.label)
-            tlist.write('%s\n' % line)
+        if record is not None:
+            record.update(self, fireList, counts)
+        else:
+            self.outputRows += 1
+            # Step, and clock if timed, leading each row
+            lead = (self.step, self.clock) if mode in ['stochastic', 'tau-leap', 'schedule'] else (self.step,)
+            # Places
+            if self.writePlaceFile:
+                pfile.row(lead + tuple([p.tokens for p in pfile.columns]))
+            # Transitions
+            if self.writeTransFile:
+                tfile.row(lead + tuple([t.firedCount for t in tfile.columns]))
+            # Transition List
+            if self.writeFireFile and self.fireFormat == 'binary':
+                for i, t in enumerate(fireList):
+                    tlist.write(EventLog.record.pack(self.time, self.step, self.clock, self.fireIndex[t.label])*(1 if counts is None else counts[i]))
+            elif self.writeFireFile:
+                tlist.row(lead + (''.join([('%s,' % t.label)*(1 if counts is None else counts[i]) for i, t in enumerate(fireList)]),))
         # Visualisation
         if self.savedot:
             self.dot(mode=mode)
@@ -1866,7 +2554,7 @@ class PetriNet(object):
         # Step & time info
         if self.details:
             info = '%s\\nStep: %d' % (self.gID, self.step)
-            if mode in ['stochastic', 'schedule']:
+            if mode in ['stochastic', 'tau-leap', 'schedule']:
                 info += '\\nClock: %.3g %s' % (self.clock, self.units)
             out.write('\n\tInfo')
             out.write('\n\t\t[')
@@ -2014,7 +2702,7 @@ class PetriNet(object):
         out.write('\n\t\t\ttooltip="%s"' % self.trans[t].id)
         # out.write('\n\t\t\tid="%s"' % t)
         # out.write('\n\t\t\ttooltip="%s"' % t)
-        if mode in ['stochastic', 'schedule']:
+        if mode in ['stochastic', 'tau-leap', 'schedule']:
             # out.write('\n\t\t\tlabel="%s\\nRate: %s/%s"' % (t, self.trans[t].rate, self.units))
             gID = self.trans[t].gID
             # if self.trans[t].vote is not None:
@@ -2134,22 +2822,28 @@ class PetriNet(object):
 
     def verifyArcs(self):
         """
-        Checks arcs to ensure all connect to real places
+        Checks arcs to ensure all connect to real places, links each arc to
+        its place object, and numbers places and transitions in order
         """
 
-        for t in self.trans:
+        for n, p in enumerate(self.places):
+            self.places[p].index = n
+        for n, t in enumerate(self.trans):
             trans = self.trans[t]
+            trans.index = n
             for i in trans.inArcs:
                 ii = trans.inArcs[i]
                 if not ii.start in self.places:
                     raise KeyError('Transition "%s" has ingoing arc to non-existant place "%s"' % (trans.label, ii.start))
+                ii.place = self.places[ii.start]
             for o in trans.outArcs:
                 oo = trans.outArcs[o]
                 if not oo.end in self.places:
                     raise KeyError('Transition "%s" has outgoing arc to non-existant place "%s"' % (trans.label, oo.end))
+                oo.place = self.places[oo.end]
         self.arcsVerified = True
 
-    def fire(self, fireList, time):
+    def fire(self, fireList, time, counts=None):
         """
         Manages transition firing
 
@@ -2159,33 +2853,99 @@ class PetriNet(object):
             List of transitions to fire
         time : float
             Duration of clock advancement on firing
+        counts : list
+            Number of times each transition fires (Default = None, for once
+            each)
         """
-        for trans in fireList:
-            self.calcTokens(trans.label)
-            trans.lastFired = self.clock + time
-        self.updateTokens()
+        now = self.clock + time if time is not None else self.clock
+        for i, trans in enumerate(fireList):
+            self.calcTokens(trans.label, 1 if counts is None else counts[i])
+            trans.lastFired = now
+        self.updateTokens(now)
         self.clearReady()
         for trans in fireList:
             trans.pcnStatus = 1.0
             if len(trans.reset):
                 for p in trans.reset:
-                    self.places[p].resetPlace()
+                    place = self.places[p]
+                    place.settleTokenTime(now)
+                    place.resetPlace()
+                    self.changed[place] = True
+        # Flag transitions affected by this firing for the 'incremental' engine
+        if self.enabled is not None:
+            for trans in fireList:
+                self.dirty.add(trans)
+                for p in self.touches[trans.label]:
+                    self.dirty.update(self.dependents[p])
+                for p in trans.reset:
+                    self.dirty.update(self.dependents[p])
+
+    def snapshot(self):
+        """
+        Captures the mutable state of the Petri Net (token counts, firing
+        records, schedule, clock, and step), but not its structure
+
+        Returns
+        ----------
+        snap : Snapshot object
+            The state of the Petri Net, which may be reinstated by restore
+        """
+        self.settleTokenTime()
+        return Snapshot(self)
 
-    def updateTokenTime(self, time):
+    def restore(self, snap):
         """
-        Updates time with tokens, 'totalTokenTime', attribute
+        Reinstates, in place, a state captured by snapshot
 
         Parameters
         ----------
-        time : float
-            Step duration
+        snap : Snapshot object
+            State of this Petri Net, or another with the same places and
+            transitions
         """
-        if time is not None:
-            for p in self.places:
-                if self.places[p].tokens:
-                    self.places[p].totalTokenTime += time
+        if snap.places != tuple(self.places) or snap.trans != tuple(self.trans):
+            raise ValueError('Snapshot does not match the places and transitions of Petri Net "%s"' % self.name)
+        for p, tokens, ins, outs, resetCount, totalTokenTime in zip(self.places.values(), snap.tokens, snap.ins, snap.outs, snap.resetCount, snap.totalTokenTime):
+            p.tokens = tokens
+            p.ins = ins
+            p.outs = outs
+            p.resetCount = resetCount
+            p.totalTokenTime = totalTokenTime
+            p.settled = snap.clock
+            p.tokenChange = 0
+            p.justReset = False
+        for t, firedCount, waiting, lastFired, pcnStatus in zip(self.trans.values(), snap.firedCount, snap.waiting, snap.lastFired, snap.pcnStatus):
+            t.firedCount = firedCount
+            t.waiting = list(waiting) if waiting is not None else None
+            t.lastFired = lastFired
+            t.pcnStatus = pcnStatus
+            t.ready = False
+        self.schedule = Schedule()
+        for label, when in snap.schedule:
+            self.schedule[label] = when
+        self.reactions = Schedule()
+        for label, when in snap.reactions:
+            self.reactions[label] = when
+        self.clock = snap.clock
+        self.step = snap.step
+        self.transFiredTotal = snap.transFiredTotal
+        self.placeExit = snap.placeExit
+        self.transExit = snap.transExit
+        self.ready = []
+        self.enabled = None
+        self.dirty = set()
+        self.changed = {}
+
+    def settleTokenTime(self):
+        """
+        Brings the time with tokens, 'totalTokenTime', of every place up to
+        date with the clock. Done at the end of each run, as places' time
+        with tokens is otherwise only updated when their tokens change.
+        """
+        for p in self.places.values():
+            p.settleTokenTime(self.clock)
 
-    def run(self, steps, maxClock=None, mode=None, history=False, fileOutput=True, endOnly=False, verbose=True):
+    def run(self, steps, maxClock=None, mode=None, history=False, fileOutput=True, endOnly=False, verbose=True, seed=None):
         """
         Simulates Petri Net
 
@@ -2205,17 +2965,25 @@ class PetriNet(object):
            chronological order (timings are assinged when requisites are
            met, and persist until either it is fire, or requisites are
            withdrawn).
+        *  tau-leap : As 'stochastic', but firing Poisson distributed
+           numbers of rate transitions over each leap in time where
+           possible (see leap)
         history : boolean
             Log state of Petri Net in history object
         fileOutput : boolean
             Toggles file output
         verbose : boolean
             Toggles amount of terminal print out
+        seed : integer
+            If given, the simulation draws random numbers from a new
+            generator with this seed (see PetriNet.rng)
 
         Returns
         ----------
         lastFiles : list
-            Path to last set of three output files if fileOutput enabled.
+            Path to last set of three output files if fileOutput enabled
+            (in the 'store' output format, the path of the store written in
+            place of the first, or None if written to 'store').
             Returns empty list otherwise.
         """
         # Check Petri Net has nodes
@@ -2228,11 +2996,22 @@ class PetriNet(object):
         if not self.arcsVerified:
             self.verifyArcs()
 
+        # Start new random number stream
+        if seed is not None:
+            self.rng = random.Random(seed)
+            self.seed = seed
+
         # Create first entry in history object
         if history and not self.history.set:
             self.history.update(self)
 
         start = self.step
+        # Enablement is fully re-evaluated at the start of each run
+        self.enabled = None
+        # Time with tokens is accumulated from the start of the run
+        for p in self.places.values():
+            p.settled = self.clock
+        self.changed = {}
 
         # Get run mode
         if mode is None:
@@ -2240,31 +3019,38 @@ class PetriNet(object):
         if mode not in self.runModes:
             raise ValueError('"%s" does not refer to a valid run mode. Valid modes are: %r' % (mode, self.runModes))
 
-        # Create file to record simulation
+        # Create file or store record to record simulation
+        record = None
         if fileOutput:
-            pfile, tfile, tlist = self.writeNetStart(mode)
+            if self.outputFormat == 'store':
+                pfile, tfile, tlist = None, None, None
+                if True in [self.writePlaceFile, self.writeTransFile, self.writeFireFile]:
+                    record = StoreRecord(self)
+                    self.writeNet(pfile, tfile, tlist, mode, record=record)
+            else:
+                pfile, tfile, tlist = self.writeNetStart(mode)
 
         if not verbose:
             blockPrint()
         print ('='*80)
         if steps:
             while True:
-                print ('Step %d of %d to %d' % (self.step + 1, start + 1, start + steps))
+                if trace >= traceSteps:
+                    traceEvent(traceSteps, 'step', 'Step %d of %d to %d' % (self.step + 1, start + 1, start + steps), step=self.step + 1, clock=self.clock)
                 # Transition(s) that will fire this step
                 fireList = []
+                counts = None
                 time = None
-                # self.buildConnectivity()
 
                 # Get list of transitions whose requisites are met
                 self.readyTrans()
                 if len(self.ready):
-                    if mode != 'schedule':
+                    if mode != 'schedule' and trace >= traceEvents:
                         # Print transitions ready to fire
-                        print('%d transitions ready to fire:' % len(self.ready))
-                        for t in self.ready:
-                            print('\t%s' % t.label)
+                        traceEvent(traceEvents, 'ready', '%d transitions ready to fire:\n' % len(self.ready) + '\n'.join('\t%s' % t.label for t in self.ready), step=self.step + 1, trans=[t.label for t in self.ready])
                 else:
                     print('No transitions ready to fire - End of integration\n')
+                    self.endReason = 'deadlock'
                     break
                 if mode == 'all':
                     self.resolveConflicts()
@@ -2272,37 +3058,40 @@ class PetriNet(object):
                 elif mode in ['single', 'stochastic', 'schedule']:
                     transition, time = self.selection(mode)
                     fireList.append(transition)
+                elif mode == 'tau-leap':
+                    fireList, counts, time = self.leap(maxClock)
 
-                # Update places' token holding time
-                self.updateTokenTime(time)
                 # Fire the transition(s)
-                self.fire(fireList, time)
+                self.fire(fireList, time, counts)
                 # Advance step
                 self.step += 1
                 # Advance clock
                 if time is not None:
                     self.clock += time
-                    print('Advancing clock by %f %s to %f %s' % (time, self.units, self.clock, self.units))
+                    if trace >= traceSteps:
+                        traceEvent(traceSteps, 'clock', 'Advancing clock by %f %s to %f %s' % (time, self.units, self.clock, self.units), step=self.step, time=time, clock=self.clock)
 
                 # Write state after this step to file
                 if fileOutput and not endOnly:
-                    self.writeNet(pfile, tfile, tlist, mode, fireList=fireList)
+                    self.writeNet(pfile, tfile, tlist, mode, fireList=fireList, counts=counts, record=record)
                 # Update history object
                 if history:
                     self.history.update(self)
-                print('Completed step %d' % self.step)
-                print ('-'*80)
+                if trace >= traceSteps:
+                    traceEvent(traceSteps, 'completed', 'Completed step %d\n' % self.step + '-'*80, step=self.step)
 
-                # Check places and transitions for terminate conditions
+                # Check places and transitions changed by this step (all on the first step) for terminate conditions
                 endPlaces = False
                 endTrans = False
-                for p in self.places:
-                    if self.places[p].checkLimits():
+                for place in (self.places.values() if self.step == start + 1 else self.changed):
+                    if place.checkLimits():
                         endPlaces = True
-                for t in self.trans:
-                    if self.trans[t].checkMax():
+                for trans in (self.trans.values() if self.step == start + 1 else fireList):
+                    if trans.checkMax():
                         endTrans = True
+                self.changed = {}
                 if endPlaces or endTrans:
+                    self.endReason = '+'.join([reason for reason, end in [('places', endPlaces), ('trans', endTrans)] if end])
                     if endPlaces:
                         print('Place token count has reached terminate condition. Ending simulation.')
                         self.placeExit = True
@@ -2310,24 +3099,29 @@ class PetriNet(object):
                         print('Transition fire count has reached terminate condition. Ending simulation.')
                         self.transExit = True
                     if endOnly:
-                        self.writeNet(pfile, tfile, tlist, mode, fireList=fireList)
+                        self.writeNet(pfile, tfile, tlist, mode, fireList=fireList, counts=counts, record=record)
                     break
 
                 # End simulation if time limit is reached
                 if time is not None and maxClock is not None:
                     if self.clock > maxClock:
                         print('%d steps simulated. Step %d reached. Max clock reached.' % (steps, self.step))
+                        self.endReason = 'clock'
                         break
                 if self.step >= start + steps:
                     print('%d steps simulated. Step %d reached. Simulation complete.' % (steps, self.step))
+                    self.endReason = 'steps'
                     break
 
         else:
             if not verbose:
                 enablePrint()
             print('Initial state rendered. No simulation conducted.')
+            self.endReason = 'none'
 
 
+        self.settleTokenTime()
+
         # Print end of step summary
         print('='*80+'\n')
         if steps:
@@ -2339,11 +3133,25 @@ class PetriNet(object):
             print('='*80+fin)
             print('='*80)
         lastFiles = []
-        if fileOutput:
+        if record is not None:
+            record.finish(self)
+            if self.store is not None:
+                self.store.add(self.time, record)
+                lastFiles = [None, None, None]
+            else:
+                store = StoreWriter(os.path.join(os.getcwd(), self.name, 'Macchiato_PetriNet_Store_%d' % self.time), self, mode)
+                store.add(self.time, record)
+                store.close()
+                lastFiles = [store.path, None, None]
+        elif fileOutput:
             for file in [pfile, tfile, tlist]:
                 if file is not None:
                     lastFiles.append(os.path.realpath(file.name))
-                    file.close()
+                    if self.catFiles is None:
+                        file.close()
+                    else:
+                        # Index this simulation's part of the concatenated file
+                        file.index(self.time, self.outputRows, self.clock, self.endReason)
                 else:
                     lastFiles.append(None)
 
@@ -2377,12 +3185,19 @@ class Place(object):
     outs : integer
         Number of tokens removed from this place during simulation
     totalTokenTime : float
-        Total duration for which the place has tokens
+        Total duration for which the place has tokens, up to 'settled'
+    settled : float
+        Clock to which 'totalTokenTime' has been accumulated (see
+        settleTokenTime)
     group : integer
         Label used to group places for visualisation
     resetCount : integer
         Number of times the place has been reset
+    index : integer
+        Position of the place in its Petri Net (set by PetriNet.verifyArcs)
     """
+    __slots__ = ('label', 'id', 'gID', 'tokens', 'resetTokens', 'tokenChange', 'min', 'max', 'limits', 'ins', 'outs', 'totalTokenTime', 'settled', 'group', 'resetCount', 'justReset', 'index')
+
     def __init__(self, label, tokens=0, min=0, max=None, limits=None, group=None):
         self.label = str(label)
         if ' ' in self.label:
@@ -2407,10 +3222,12 @@ class Place(object):
             if group < 0:
                 raise TypeError('Group designation must be positive (place "%s")' % self.label)
         self.totalTokenTime = 0.0
+        self.settled = 0.0
         self.group=group
 
         self.resetCount = 0
         self.justReset = False
+        self.index = None
 
     def checkLimits(self):
         """
@@ -2426,18 +3243,36 @@ class Place(object):
         if self.limits[0] is not None:
             if self.tokens < self.limits[0]:
                 status = True
-                print('Place "%s" has fewer tokens than its required limits' % self.label)
+                if trace >= traceEvents:
+                    traceEvent(traceEvents, 'limit', 'Place "%s" has fewer tokens than its required limits' % self.label, place=self.label, tokens=self.tokens)
         if self.limits[1] is not None:
             if self.tokens > self.limits[1]:
                 status = True
-                print('Place "%s" has more tokens than its required limits' % self.label)
+                if trace >= traceEvents:
+                    traceEvent(traceEvents, 'limit', 'Place "%s" has more tokens than its required limits' % self.label, place=self.label, tokens=self.tokens)
         return status
 
+    def settleTokenTime(self, clock):
+        """
+        Adds the time since 'settled' to 'totalTokenTime' if the place holds
+        tokens. Called before the place's tokens change, such that
+        'totalTokenTime' need not be updated at every step.
+
+        Parameters
+        ----------
+        clock : float
+            Clock to which the time with tokens is accumulated
+        """
+        if self.tokens:
+            self.totalTokenTime += clock - self.settled
+        self.settled = clock
+
     def resetPlace(self):
         """
         Resets the place's token count to 'resetTokens'
         """
-        print('Reseting place, "%s", from %d tokens to %d' % (self.label, self.tokens, self.resetTokens))
+        if trace >= traceEvents:
+            traceEvent(traceEvents, 'reset', 'Reseting place, "%s", from %d tokens to %d' % (self.label, self.tokens, self.resetTokens), place=self.label, tokens=self.tokens, resetTokens=self.resetTokens)
         self.tokens = self.resetTokens
         self.resetCount += 1
         self.justReset = True
@@ -2537,7 +3372,15 @@ class Trans(object):
         Indicates the system clock after the transition was last fired
     group : integer
         Label used to group transitions for visualisation
+    net : PetriNet object
+        The Petri Net to which the transition belongs, notified when arcs
+        are added or removed (None if not created by PetriNet.addTrans)
+    index : integer
+        Position of the transition in its Petri Net (set by
+        PetriNet.verifyArcs)
     """
+    __slots__ = ('label', 'id', 'gID', 'rate', 'uniform', 'delay', 'weibull', 'beta', 'lognorm', 'cyclic', 'maxFire', 'waiting', 'inArcs', 'outArcs', 'pcn', 'pcnStatus', 'ready', 'firedCount', 'lastFired', 'reset', 'resetString', 'vote', 'net', 'group', 'index')
+
     def __init__(self, label, rate=None, uniform=None, delay=None, weibull=None, beta=None, lognorm=None, cyclic=None, maxFire=None, reset=None, resetString=None, vote=None, group=None):
         self.label = str(label)
         if ' ' in self.label:
@@ -2573,8 +3416,8 @@ class Trans(object):
                 raise ValueError('Cyclic distribution requires list of two parameters (transition "%s")' % self.label)
         self.maxFire = maxFire
         self.waiting = None
-        self.inArcs = collections.OrderedDict()
-        self.outArcs = collections.OrderedDict()
+        self.inArcs = {}
+        self.outArcs = {}
         self.pcn = False
         self.pcnStatus = 1.0
         self.ready = False
@@ -2588,6 +3431,8 @@ class Trans(object):
             if vote < 1:
                 raise ValueError('Voting threshold (%r) must be positive integer (transition "%s")' % (vote, self.label))
         self.vote = vote
+        self.net = None
+        self.index = None
         if group is not None:
             if type(group) is not int:
                 raise TypeError('Group designation (%r) must be positive integer (transition "%s")' % (group, self.label))
@@ -2622,6 +3467,8 @@ class Trans(object):
             self.inArcs[place] = Arc(place, self.label, weight=weight, type=type)
             if type == 'pcn':
                 self.pcn = True
+            if self.net is not None:
+                self.net.invalidate()
         else:
             raise KeyError('Arc from place, "%s", already exists on transition, "%s"' % (
                 place, self.label))
@@ -2646,6 +3493,8 @@ class Trans(object):
 
         # Delete arc
         self.inArcs.pop(place)
+        if self.net is not None:
+            self.net.invalidate()
 
     def addOutArc(self, place, weight=1):
         """
@@ -2662,6 +3511,8 @@ class Trans(object):
         # Check that this arc does not already exist
         if not place in self.outArcs:
             self.outArcs[place] = Arc(self.label, place, weight=weight)
+            if self.net is not None:
+                self.net.invalidate()
         else:
             raise KeyError('Arc to place, "%s", already exists on transition, "%s"' % (place, self.label))
 
@@ -2675,6 +3526,8 @@ class Trans(object):
             Label of receiving place
         """
         self.outArcs.pop(place)
+        if self.net is not None:
+            self.net.invalidate()
 
     def checkMax(self):
         """
@@ -2687,7 +3540,8 @@ class Trans(object):
         """
         if self.maxFire is not None:
             if self.firedCount >= self.maxFire:
-                print('Transition "%s" has reached its maximum permitted fire count' % self.label)
+                if trace >= traceEvents:
+                    traceEvent(traceEvents, 'maxFire', 'Transition "%s" has reached its maximum permitted fire count' % self.label, trans=self.label)
                 return True
         return False
 
@@ -2708,33 +3562,409 @@ class Arc(object):
         *  std : Standard Arc
         *  inh : Inhibit Arc
         *  pnc : Place Conditional Arc
+    kind : integer
+        Index of 'type' in arcTypes (arcStd, arcInh, or arcPcn)
+    place : Place object
+        The place connected by the arc (set by PetriNet.verifyArcs)
     """
+    __slots__ = ('kind', 'weight', 'start', 'end', 'place')
+
     def __init__(self, start, end, weight=1, type='std'):
         self.type = type
         self.weight = weight
         self.start = start
         self.end = end
+        self.place = None
 
-class History(object):
+    @property
+    def type(self):
+        return arcTypes[self.kind]
+
+    @type.setter
+    def type(self, type):
+        self.kind = arcTypes.index(type)
+
+class ArcMatrix(object):
     """
-    Records the history of the places and the transtions in a PetriNet
+    Sparse matrix of arc weights, with a row for each transition and a
+    column for each place, stored as a list of arcs grouped by transition
 
     Attributes
     ----------
-    clock : list
-       Gives the clock value at each step
-    places : collections.OrderedDict
-        History of places
-    trans : collections.OrderedDict
-        History of transitions
-    set : boolean
-        Indicates if update method has been run
+    trans : numpy.ndarray
+        Index of the transition connected by each arc
+    place : numpy.ndarray
+        Index of the place connected by each arc
+    weight : numpy.ndarray
+        Weight of each arc
+    ptr : numpy.ndarray
+        The arcs of transition i are found from ptr[i] to ptr[i+1]
+    shape : tuple
+        Number of transitions and number of places
     """
-    def __init__(self):
-        self.clock = []
-        self.places = collections.OrderedDict()
-        self.trans = collections.OrderedDict()
-        self.set = False
+    def __init__(self, arcs, shape, dtype):
+        # Stable sort retains the order of arcs for each transition
+        arcs = sorted(arcs, key=lambda arc: arc[0])
+        self.trans = np.array([arc[0] for arc in arcs], dtype=np.intp)
+        self.place = np.array([arc[1] for arc in arcs], dtype=np.intp)
+        self.weight = np.array([arc[2] for arc in arcs], dtype=dtype)
+        self.ptr = np.zeros(shape[0]+1, dtype=np.intp)
+        np.cumsum(np.bincount(self.trans, minlength=shape[0]), out=self.ptr[1:])
+        self.shape = shape
+
+    def __len__(self):
+        return len(self.weight)
+
+    def dense(self):
+        """
+        Returns the matrix in dense form
+
+        Returns
+        ----------
+        matrix : numpy.ndarray
+            Array of arc weights of shape (transitions, places)
+        """
+        matrix = np.zeros(self.shape, dtype=self.weight.dtype)
+        matrix[self.trans, self.place] = self.weight
+        return matrix
+
+    def count(self, flags):
+        """
+        Counts flagged arcs for each transition
+
+        Parameters
+        ----------
+        flags : numpy.ndarray
+            Boolean array with an entry for each arc in its last dimension
+
+        Returns
+        ----------
+        counts : numpy.ndarray
+            Number of flagged arcs of each transition, with an entry for each
+            transition in its last dimension
+        """
+        total = np.zeros(flags.shape[:-1]+(len(self)+1,), dtype=np.intp)
+        np.cumsum(flags, axis=-1, out=total[...,1:])
+        return total[...,self.ptr[1:]] - total[...,self.ptr[:-1]]
+
+    def sum(self, values):
+        """
+        Sums values over the arcs of each transition, in arc order
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Array with an entry for each arc in its last dimension
+
+        Returns
+        ----------
+        totals : numpy.ndarray
+            Sum for each transition, with an entry for each transition in
+            its last dimension
+        """
+        totals = np.zeros(values.shape[:-1]+(self.shape[0],), dtype=values.dtype)
+        rows = np.flatnonzero(np.diff(self.ptr))
+        if len(rows):
+            totals[...,rows] = np.add.reduceat(values, self.ptr[rows], axis=-1)
+        return totals
+
+    def select(self, rows):
+        """
+        Lists the arcs of a given transition for each of a number of
+        simulations
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            Index of a transition for each simulation
+
+        Returns
+        ----------
+        sims : numpy.ndarray
+            Position in 'rows' of each arc found
+        arcs : numpy.ndarray
+            Index of each arc found
+        """
+        starts = self.ptr[rows]
+        counts = self.ptr[rows+1] - starts
+        sims = np.repeat(np.arange(len(rows)), counts)
+        arcs = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return sims, arcs
+
+class Connectivity(object):
+    """
+    Compiled description of a Petri Net's structure, in which places and
+    transitions are referred to by integer indices, for use in vectorised
+    calculations (requires NumPy). Markings are integer arrays with an entry
+    for each place, and may have any number of leading dimensions (e.g. one
+    row per simulation).
+
+    Attributes
+    ----------
+    places : list
+        Place labels in index order
+    trans : list
+        Transition labels in index order
+    placeIndex : dictionary
+        Index of each place label
+    transIndex : dictionary
+        Index of each transition label
+    pre : ArcMatrix object
+        Weights of standard incoming arcs (tokens consumed on firing)
+    post : ArcMatrix object
+        Weights of outgoing arcs (tokens produced on firing)
+    inhibit : ArcMatrix object
+        Weights of inhibit arcs
+    pcn : ArcMatrix object
+        Weights of place conditional arcs (floats)
+    reset : ArcMatrix object
+        Places reset by each transition (weights of one)
+    minimum : numpy.ndarray
+        Minimum token count of each place
+    maximum : numpy.ndarray
+        Maximum token count of each place (floats, infinite if unbounded)
+    resetTokens : numpy.ndarray
+        Token count to which each place is restored on reset
+    vote : numpy.ndarray
+        Voting threshold of each transition (zero if not a voting transition)
+    voteArcs : dictionary
+        Incoming standard and inhibit arcs of each voting transition, by
+        index, as lists of [type, place index, weight] in arc order
+    connected : numpy.ndarray
+        False for transitions without connecting arcs
+    """
+    def __init__(self, pn):
+        if np is None:
+            raise ImportError('NumPy is required to build the connectivity of a Petri Net')
+        self.places = list(pn.places)
+        self.trans = list(pn.trans)
+        self.placeIndex = {p: i for i, p in enumerate(self.places)}
+        self.transIndex = {t: i for i, t in enumerate(self.trans)}
+        shape = (len(self.trans), len(self.places))
+
+        arcs = {'std': [], 'inh': [], 'pcn': []}
+        outs = []
+        resets = []
+        self.vote = np.zeros(shape[0], dtype=np.int64)
+        self.voteArcs = collections.OrderedDict()
+        self.connected = np.zeros(shape[0], dtype=bool)
+        for t in self.trans:
+            tt = pn.trans[t]
+            ti = self.transIndex[t]
+            self.connected[ti] = bool(len(tt.inArcs) + len(tt.outArcs))
+            for i in tt.inArcs:
+                ii = tt.inArcs[i]
+                arcs[ii.type].append([ti, self.placeIndex[ii.start], ii.weight])
+            for o in tt.outArcs:
+                oo = tt.outArcs[o]
+                outs.append([ti, self.placeIndex[oo.end], oo.weight])
+            for r in tt.reset:
+                resets.append([ti, self.placeIndex[r], 1])
+            if tt.vote is not None:
+                self.vote[ti] = tt.vote
+                self.voteArcs[ti] = [[ii.type, self.placeIndex[ii.start], ii.weight] for ii in tt.inArcs.values() if ii.type != 'pcn']
+        self.pre = ArcMatrix(arcs['std'], shape, np.int64)
+        self.inhibit = ArcMatrix(arcs['inh'], shape, np.int64)
+        self.pcn = ArcMatrix(arcs['pcn'], shape, np.float64)
+        self.post = ArcMatrix(outs, shape, np.int64)
+        self.reset = ArcMatrix(resets, shape, np.int64)
+
+        self.minimum = np.array([pn.places[p].min for p in self.places], dtype=np.int64)
+        self.maximum = np.array([pn.places[p].max for p in self.places], dtype=np.float64)
+        self.resetTokens = np.array([pn.places[p].resetTokens for p in self.places], dtype=np.int64)
+
+    def marking(self, pn):
+        """
+        Returns the current token counts of a Petri Net's places
+
+        Parameters
+        ----------
+        pn : PetriNet object
+            Petri Net with the structure described by this object
+
+        Returns
+        ----------
+        marking : numpy.ndarray
+            Token count of each place
+        """
+        return np.array([pn.places[p].tokens for p in self.places], dtype=np.int64)
+
+    def incidence(self):
+        """
+        Returns the dense incidence matrix (net change in each place's tokens
+        on firing each transition, excluding resets)
+
+        Returns
+        ----------
+        incidence : numpy.ndarray
+            Array of shape (transitions, places)
+        """
+        return self.post.dense() - self.pre.dense()
+
+    def enabled(self, marking):
+        """
+        Tests which transitions have their requisites met for one or more
+        markings, with the same rules as PetriNet.checkEnabled
+
+        Parameters
+        ----------
+        marking : numpy.ndarray
+            Token counts, with an entry for each place in the last dimension
+
+        Returns
+        ----------
+        ready : numpy.ndarray
+            Boolean array with an entry for each transition in the last
+            dimension
+        """
+        marking = np.asarray(marking)
+        # Standard arcs must have their weight met without breaching place minimums
+        tokens = marking[...,self.pre.place]
+        flags = (tokens < self.pre.weight) | (tokens - self.pre.weight < self.minimum[self.pre.place])
+        ready = self.pre.count(flags) == 0
+        # Inhibit arcs disable when their weight is met
+        ready &= self.inhibit.count(marking[...,self.inhibit.place] >= self.inhibit.weight) == 0
+        # Voting transitions tally their arcs in order, stopping at the first failure
+        for ti in self.voteArcs:
+            votes = np.zeros(marking.shape[:-1], dtype=np.int64)
+            live = np.ones(marking.shape[:-1], dtype=bool)
+            for type, pi, weight in self.voteArcs[ti]:
+                tokens = marking[...,pi]
+                if type == 'std':
+                    met = live & (tokens >= weight)
+                    live &= ~(met & (tokens - weight < self.minimum[pi]))
+                    votes += met & live
+                else:
+                    inhibited = live & (tokens >= weight)
+                    votes[inhibited] = 0
+                    live &= ~inhibited
+            ready[...,ti] = votes >= self.vote[ti]
+        # Outgoing arcs must not breach place maximums
+        ready &= self.post.count(marking[...,self.post.place] + self.post.weight > self.maximum[self.post.place]) == 0
+        return ready & self.connected
+
+class History(object):
+    """
+    Records the history of the places and the transtions in a PetriNet. The
+    state at each step is stored by column, in NumPy arrays which double in
+    length when full (or lists of rows if NumPy is unavailable). The clock,
+    places, and trans attributes give the dictionary-of-lists views of the
+    history, which are built on demand.
+
+    Attributes
+    ----------
+    clock : list
+       Gives the clock value at each step
+    places : collections.OrderedDict
+        History of places ([tokens, resetCount] at each step)
+    trans : collections.OrderedDict
+        History of transitions (firedCount at each step)
+    set : boolean
+        Indicates if update method has been run
+    placeLabels : tuple
+        Place labels, in column order
+    transLabels : tuple
+        Transition labels, in column order
+    size : integer
+        Number of steps recorded
+    clockData : numpy.ndarray
+        Clock value at each step (first 'size' entries in use)
+    tokenData : numpy.ndarray
+        Token count (int32) of each place (columns) at each step (rows)
+    resetData : numpy.ndarray
+        Reset count (int32) of each place (columns) at each step (rows)
+    firedData : numpy.ndarray
+        Fired count of each transition (columns) at each step (rows)
+    views : dict
+        Dictionary-of-lists views built since the last update
+    """
+    def __init__(self):
+        self.placeLabels = ()
+        self.transLabels = ()
+        self.size = 0
+        self.clockData = None
+        self.tokenData = None
+        self.resetData = None
+        self.firedData = None
+        self.views = {}
+
+    def __getstate__(self):
+        # Unused capacity and views are not copied or pickled
+        state = self.__dict__.copy()
+        if np is not None and self.clockData is not None:
+            for key in ['clockData', 'tokenData', 'resetData', 'firedData']:
+                state[key] = state[key][:self.size].copy()
+        state['views'] = {}
+        return state
+
+    @property
+    def set(self):
+        return self.clockData is not None
+
+    @property
+    def clock(self):
+        if 'clock' not in self.views:
+            if self.clockData is None:
+                self.views['clock'] = []
+            elif np is None:
+                self.views['clock'] = list(self.clockData)
+            else:
+                self.views['clock'] = self.clockData[:self.size].tolist()
+        return self.views['clock']
+
+    @property
+    def places(self):
+        if 'places' not in self.views:
+            places = collections.OrderedDict()
+            for j, p in enumerate(self.placeLabels):
+                if np is None:
+                    places[p] = [[self.tokenData[s][j], self.resetData[s][j]] for s in range(self.size)]
+                else:
+                    places[p] = np.stack([self.tokenData[:self.size, j], self.resetData[:self.size, j]], axis=1).tolist()
+            self.views['places'] = places
+        return self.views['places']
+
+    @property
+    def trans(self):
+        if 'trans' not in self.views:
+            trans = collections.OrderedDict()
+            for j, t in enumerate(self.transLabels):
+                if np is None:
+                    trans[t] = [self.firedData[s][j] for s in range(self.size)]
+                else:
+                    trans[t] = self.firedData[:self.size, j].tolist()
+            self.views['trans'] = trans
+        return self.views['trans']
+
+    def reserve(self, n):
+        """
+        Ensures there is space to record a further n steps, at least doubling
+        the capacity of the arrays when they are enlarged
+
+        Parameters
+        ----------
+        n : integer
+            Number of steps to be recorded
+        """
+        if self.clockData is None:
+            if np is None:
+                self.clockData, self.tokenData, self.resetData, self.firedData = [], [], [], []
+                return
+            capacity = max(64, n)
+        elif np is None or self.size + n <= len(self.clockData):
+            return
+        else:
+            capacity = max(2*len(self.clockData), self.size + n)
+        clock = np.zeros(capacity, dtype=np.float64)
+        tokens = np.zeros((capacity, len(self.placeLabels)), dtype=np.int32)
+        resets = np.zeros((capacity, len(self.placeLabels)), dtype=np.int32)
+        fired = np.zeros((capacity, len(self.transLabels)), dtype=np.int64)
+        if self.clockData is not None:
+            clock[:self.size] = self.clockData[:self.size]
+            tokens[:self.size] = self.tokenData[:self.size]
+            resets[:self.size] = self.resetData[:self.size]
+            fired[:self.size] = self.firedData[:self.size]
+        self.clockData, self.tokenData, self.resetData, self.firedData = clock, tokens, resets, fired
 
     def update(self, pn):
         """
@@ -2745,24 +3975,2408 @@ class History(object):
         pn : PetriNet object
             The Petri Net whose state is to be recorded
         """
-        # Get Petri Net clock state
-        self.clock.append(pn.clock)
-        # Record places
-        for p in pn.places:
-            if not self.set:
-                self.places[p] = []
-            self.places[p].append([pn.places[p].tokens, pn.places[p].resetCount])
-        # Record transitions
-        for t in pn.trans:
-            if not self.set:
-                self.trans[t] = []
-            self.trans[t].append(pn.trans[t].firedCount)
-        # Mark that lists for places and transitions have been created for this Petri Net structure
-        self.set = True
+        # Columns are set by the first record for this Petri Net structure
+        if not self.set:
+            self.placeLabels = tuple(pn.places)
+            self.transLabels = tuple(pn.trans)
+        self.reserve(1)
+        places = pn.places.values()
+        trans = pn.trans.values()
+        if np is None:
+            self.clockData.append(pn.clock)
+            self.tokenData.append([p.tokens for p in places])
+            self.resetData.append([p.resetCount for p in places])
+            self.firedData.append([t.firedCount for t in trans])
+        else:
+            self.clockData[self.size] = pn.clock
+            self.tokenData[self.size] = [p.tokens for p in places]
+            self.resetData[self.size] = [p.resetCount for p in places]
+            self.firedData[self.size] = [t.firedCount for t in trans]
+        self.size += 1
+        self.views = {}
+
+    def fromArrays(self, places, trans, clock, tokens, resets, fired):
+        """
+        Records a sequence of states given as arrays (e.g. by a Batch object)
+
+        Parameters
+        ----------
+        places : list
+            Place labels, in column order
+        trans : list
+            Transition labels, in column order
+        clock : numpy.ndarray
+            Clock value at each step
+        tokens : numpy.ndarray
+            Token count of each place (columns) at each step (rows)
+        resets : numpy.ndarray
+            Reset count of each place (columns) at each step (rows)
+        fired : numpy.ndarray
+            Fired count of each transition (columns) at each step (rows)
+        """
+        if not self.set:
+            self.placeLabels = tuple(places)
+            self.transLabels = tuple(trans)
+        n = len(clock)
+        self.reserve(n)
+        self.clockData[self.size:self.size+n] = clock
+        self.tokenData[self.size:self.size+n] = tokens
+        self.resetData[self.size:self.size+n] = resets
+        self.firedData[self.size:self.size+n] = fired
+        self.size += n
+        self.views = {}
+
+    def arrays(self):
+        """
+        Returns the recorded history as arrays (requires NumPy)
+
+        Returns
+        ----------
+        clock : numpy.ndarray
+            Clock value at each step
+        tokens : numpy.ndarray
+            Token count of each place (columns) at each step (rows)
+        resets : numpy.ndarray
+            Reset count of each place (columns) at each step (rows)
+        fired : numpy.ndarray
+            Fired count of each transition (columns) at each step (rows)
+        """
+        if np is None:
+            raise ImportError('NumPy is required for History.arrays')
+        if not self.set:
+            return np.zeros(0), np.zeros((0, len(self.placeLabels)), dtype=np.int32), np.zeros((0, len(self.placeLabels)), dtype=np.int32), np.zeros((0, len(self.transLabels)), dtype=np.int64)
+        return self.clockData[:self.size], self.tokenData[:self.size], self.resetData[:self.size], self.firedData[:self.size]
+
+class TransList(object):
+    """
+    Transitions held in the order of PetriNet.trans, for the 'incremental'
+    engines, such that a transition is added or removed by bisection of its
+    index (Trans.index), rather than the list being sorted at every step
+
+    Attributes
+    ----------
+    keys : list
+        Index of each transition, in ascending order
+    trans : list
+        The transitions, in the same order
+    """
+    __slots__ = ('keys', 'trans')
+
+    def __init__(self):
+        self.keys = []
+        self.trans = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.trans)
+
+    def __contains__(self, tt):
+        i = bisect.bisect_left(self.keys, tt.index)
+        return i < len(self.keys) and self.keys[i] == tt.index
+
+    def add(self, tt):
+        """
+        Adds a transition, if not already present
+        """
+        i = bisect.bisect_left(self.keys, tt.index)
+        if i == len(self.keys) or self.keys[i] != tt.index:
+            self.keys.insert(i, tt.index)
+            self.trans.insert(i, tt)
+
+    def discard(self, tt):
+        """
+        Removes a transition, if present
+        """
+        i = bisect.bisect_left(self.keys, tt.index)
+        if i < len(self.keys) and self.keys[i] == tt.index:
+            del self.keys[i]
+            del self.trans[i]
+
+class Schedule(object):
+    """
+    Transition firing schedule for the 'schedule' run mode. Behaves as a
+    dictionary of transition labels to firing times, but is stored as a
+    binary heap, such that the next transitions to fire can be found, and a
+    given transition removed or rescheduled, in logarithmic time.
+
+    Attributes
+    ----------
+    heap : list
+        Binary heap of [time, order, count, label] entries. Removed or
+        rescheduled entries are left in place with a label of None and are
+        discarded when reached.
+    entries : dict
+        Current heap entry for each scheduled transition, in the order in
+        which they were first scheduled
+    order : integer
+        Counter for the order in which transitions are scheduled, so that
+        simultaneous firing times are listed consistently
+    count : integer
+        Counter for heap entries, so that no two entries compare equal
+    stale : integer
+        Number of removed entries still present in the heap
+    """
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.order = 0
+        self.count = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, label):
+        return label in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, label):
+        return self.entries[label][0]
+
+    def __setitem__(self, label, time):
+        """
+        Schedules a transition to fire at a given time, replacing any firing
+        time it has already been given
+        """
+        entry = self.entries.get(label)
+        if entry is None:
+            order = self.order
+            self.order += 1
+        elif entry[0] == time:
+            return
+        else:
+            order = entry[1]
+            entry[3] = None
+            self.stale += 1
+        entry = [time, order, self.count, label]
+        self.count += 1
+        self.entries[label] = entry
+        heapq.heappush(self.heap, entry)
+        self.compact()
+
+    def pop(self, label):
+        """
+        Removes a transition from the schedule
+
+        Parameters
+        ----------
+        label : string
+            Unique identifier of the transition
+
+        Returns
+        ----------
+        time : float
+            The firing time the transition was scheduled for
+        """
+        entry = self.entries.pop(label)
+        entry[3] = None
+        self.stale += 1
+        self.compact()
+        return entry[0]
+
+    def nexts(self):
+        """
+        Finds the transitions scheduled to fire soonest
+
+        Returns
+        ----------
+        nexts : list
+            Labels of all transitions sharing the earliest firing time, in the
+            order in which they were scheduled
+        """
+        heap = self.heap
+        ties = []
+        while len(heap):
+            if heap[0][3] is None:
+                heapq.heappop(heap)
+                self.stale -= 1
+            elif not len(ties) or heap[0][0] == ties[0][0]:
+                ties.append(heapq.heappop(heap))
+            else:
+                break
+        for entry in ties:
+            heapq.heappush(heap, entry)
+        return [entry[3] for entry in ties]
+
+    def compact(self):
+        """
+        Rebuilds the heap without removed entries once they outnumber the
+        scheduled transitions
+        """
+        if self.stale > max(len(self.entries), 32):
+            self.heap = [entry for entry in self.heap if entry[3] is not None]
+            heapq.heapify(self.heap)
+            self.stale = 0
+
+class Variates(object):
+    """
+    Pools of random variates for transition timings, for the 'pool' sampler.
+    Each pool is filled with a block of standard variates drawn by NumPy,
+    which are handed out in sequence, and refilled when exhausted. Variates
+    are independent of place conditionals and of the scale of each
+    distribution, which are applied by PetriNet.getWait, so pools are shared
+    by all transitions with the same distribution shape.
+
+    Attributes
+    ----------
+    source : random.Random object
+        Random number generator from which the pools were seeded
+    rng : numpy.random.Generator
+        Source of the pools' variates
+    size : integer
+        Number of variates drawn to fill a pool
+    pools : dict
+        Variates ([list, position]) of each distribution, keyed by its name
+        and shape parameters
+    """
+    __slots__ = ('source', 'rng', 'size', 'pools')
+
+    def __init__(self, source, size=4096):
+        if np is None:
+            raise ImportError('NumPy is required for the "pool" sampler')
+        self.source = source
+        self.rng = np.random.default_rng(source.getrandbits(64))
+        self.size = size
+        self.pools = {}
+
+    def take(self, key):
+        """
+        Returns the next variate of a pool, refilling it if exhausted
+
+        Parameters
+        ----------
+        key : tuple
+            Name of the distribution, followed by its shape parameters
+
+        Returns
+        ----------
+        variate : float
+            Next variate from the pool
+        """
+        pool = self.pools.get(key)
+        if pool is None or pool[1] == len(pool[0]):
+            pool = [self.draw(key), 0]
+            self.pools[key] = pool
+        variate = pool[0][pool[1]]
+        pool[1] += 1
+        return variate
+
+    def draw(self, key):
+        """
+        Draws a block of variates to fill a pool
+
+        Parameters
+        ----------
+        key : tuple
+            Name of the distribution, followed by its shape parameters
+
+        Returns
+        ----------
+        variates : list
+            New variates for the pool
+        """
+        if key[0] == 'exponential':
+            block = self.rng.standard_exponential(self.size)
+        elif key[0] == 'uniform':
+            block = 1.0 - self.rng.random(self.size) # in range of (0.0, 1.0]
+        elif key[0] == 'normal':
+            block = self.rng.standard_normal(self.size)
+        elif key[0] == 'weibull':
+            block = self.rng.weibull(key[1], self.size)
+        elif key[0] == 'beta':
+            block = self.rng.beta(key[1], key[2], self.size)
+        else:
+            raise ValueError('"%s" does not refer to a pooled distribution' % key[0])
+        return block.tolist()
+
+    def exponential(self):
+        """
+        Returns an exponential variate with unit rate
+        """
+        return self.take(('exponential',))
+
+    def uniform(self):
+        """
+        Returns a uniform variate in the range (0.0, 1.0]
+        """
+        return self.take(('uniform',))
+
+    def normal(self):
+        """
+        Returns a normal variate with zero mean and unit standard deviation
+        """
+        return self.take(('normal',))
+
+    def weibull(self, shape):
+        """
+        Returns a Weibull variate with unit scale and the given shape
+        """
+        return self.take(('weibull', shape))
+
+    def beta(self, alpha, beta):
+        """
+        Returns a beta variate with the given shape parameters
+        """
+        return self.take(('beta', alpha, beta))
+
+class Snapshot(object):
+    """
+    Mutable state of a Petri Net, as captured by PetriNet.snapshot, held in
+    flat tuples in the order of the net's places and transitions
+
+    Attributes
+    ----------
+    places : tuple
+        Place labels
+    trans : tuple
+        Transition labels
+    tokens : tuple
+        Token count of each place
+    ins : tuple
+        Tokens added to each place
+    outs : tuple
+        Tokens removed from each place
+    resetCount : tuple
+        Number of times each place has been reset
+    totalTokenTime : tuple
+        Time with tokens of each place
+    firedCount : tuple
+        Number of times each transition has fired
+    waiting : tuple
+        Step and clock from which each transition has been ready to fire
+        (None if not)
+    lastFired : tuple
+        Clock when each transition last fired (None if never)
+    pcnStatus : tuple
+        Last place conditional modifier of each transition
+    schedule : tuple
+        Label and firing time of each scheduled transition, in the order
+        scheduled
+    reactions : tuple
+        Label and putative firing time of each transition in
+        PetriNet.reactions, in the order added
+    clock : float
+        Simulated time accrued
+    step : integer
+        Number of steps taken
+    transFiredTotal : integer
+        Total number of transitions fired
+    placeExit : boolean
+        See PetriNet
+    transExit : boolean
+        See PetriNet
+    """
+    def __init__(self, pn):
+        self.places = tuple(pn.places)
+        self.trans = tuple(pn.trans)
+        places = pn.places.values()
+        trans = pn.trans.values()
+        self.tokens = tuple(p.tokens for p in places)
+        self.ins = tuple(p.ins for p in places)
+        self.outs = tuple(p.outs for p in places)
+        self.resetCount = tuple(p.resetCount for p in places)
+        self.totalTokenTime = tuple(p.totalTokenTime for p in places)
+        self.firedCount = tuple(t.firedCount for t in trans)
+        self.waiting = tuple(tuple(t.waiting) if t.waiting is not None else None for t in trans)
+        self.lastFired = tuple(t.lastFired for t in trans)
+        self.pcnStatus = tuple(t.pcnStatus for t in trans)
+        self.schedule = tuple((label, pn.schedule[label]) for label in pn.schedule)
+        self.reactions = tuple((label, pn.reactions[label]) for label in pn.reactions)
+        self.clock = pn.clock
+        self.step = pn.step
+        self.transFiredTotal = pn.transFiredTotal
+        self.placeExit = pn.placeExit
+        self.transExit = pn.transExit
+
+class Batch(object):
+    """
+    Simulates many replicates of a Petri Net in lockstep, with the state of
+    every replicate held in NumPy arrays (one row per replicate). Follows
+    the rules of the 'schedule' run mode. No files are written during the
+    simulations.
+
+    Attributes
+    ----------
+    pn : PetriNet object
+        The Petri Net simulated, giving the initial state of every replicate
+    conn : Connectivity object
+        Compiled structure of the Petri Net
+    n : integer
+        Number of replicates
+    rng : numpy.random.Generator
+        Source of random numbers
+    tokens : numpy.ndarray
+        Token count of each place
+    ins : numpy.ndarray
+        Number of tokens added to each place
+    outs : numpy.ndarray
+        Number of tokens removed from each place
+    resetCount : numpy.ndarray
+        Number of times each place has been reset
+    totalTokenTime : numpy.ndarray
+        Total duration for which each place has held tokens
+    firedCount : numpy.ndarray
+        Number of times each transition has fired
+    lastFired : numpy.ndarray
+        Clock when each transition last fired (NaN if never)
+    schedule : numpy.ndarray
+        Scheduled firing time of each transition
+    scheduled : numpy.ndarray
+        Marks transitions present in the schedule
+    waiting : numpy.ndarray
+        Clock when each transition became ready to fire (NaN if not ready)
+    pcnStatus : numpy.ndarray
+        Last place conditional modifier applied to each transition
+    clock : numpy.ndarray
+        Simulated time of each replicate
+    step : numpy.ndarray
+        Number of steps taken by each replicate
+    live : numpy.ndarray
+        Marks replicates which have not yet ended
+    placeExit : numpy.ndarray
+        Marks replicates ended due to a place's token limits
+    transExit : numpy.ndarray
+        Marks replicates ended due to a transition's maximum fire count
+    records : list
+        States recorded at each step for the replicates' histories
+    """
+    def __init__(self, pn, n, rng=None):
+        if np is None:
+            raise ImportError('NumPy is required for batch simulation')
+        if pn.connectivity is None:
+            pn.buildConnectivity()
+        self.pn = pn
+        self.conn = conn = pn.connectivity
+        self.n = n
+        self.rng = rng if rng is not None else np.random.default_rng()
+        places = [pn.places[p] for p in conn.places]
+        trans = [pn.trans[t] for t in conn.trans]
+
+        # State of each replicate
+        self.tokens = np.tile(conn.marking(pn), (n, 1))
+        self.ins = np.tile(np.array([p.ins for p in places], dtype=np.int64), (n, 1))
+        self.outs = np.tile(np.array([p.outs for p in places], dtype=np.int64), (n, 1))
+        self.resetCount = np.tile(np.array([p.resetCount for p in places], dtype=np.int64), (n, 1))
+        self.totalTokenTime = np.tile(np.array([p.totalTokenTime for p in places], dtype=np.float64), (n, 1))
+        self.firedCount = np.tile(np.array([t.firedCount for t in trans], dtype=np.int64), (n, 1))
+        self.lastFired = np.tile(np.array([np.nan if t.lastFired is None else t.lastFired for t in trans], dtype=np.float64), (n, 1))
+        self.schedule = np.full((n, len(trans)), np.inf)
+        self.scheduled = np.zeros((n, len(trans)), dtype=bool)
+        self.waiting = np.full((n, len(trans)), np.nan)
+        self.pcnStatus = np.ones((n, len(trans)))
+        self.clock = np.full(n, float(pn.clock))
+        self.step = np.full(n, pn.step, dtype=np.int64)
+        self.live = np.ones(n, dtype=bool)
+        self.placeExit = np.zeros(n, dtype=bool)
+        self.transExit = np.zeros(n, dtype=bool)
+        self.records = []
+
+        # Termination conditions
+        self.lower = np.array([-np.inf if p.limits[0] is None else p.limits[0] for p in places])
+        self.upper = np.array([np.inf if p.limits[1] is None else p.limits[1] for p in places])
+        self.maxFire = np.array([np.inf if t.maxFire is None else t.maxFire for t in trans])
+
+        # Timing parameters (NaN where not applicable)
+        def param(kind, i=None):
+            return np.array([np.nan if getattr(t, kind) is None else (getattr(t, kind) if i is None else getattr(t, kind)[i]) for t in trans], dtype=np.float64)
+        self.rate = param('rate')
+        self.uniform = param('uniform')
+        self.delay = param('delay')
+        self.weibull = [param('weibull', i) for i in range(3)]
+        self.beta = [param('beta', i) for i in range(3)]
+        self.lognorm = [param('lognorm', i) for i in range(2)]
+        self.cyclic = [param('cyclic', i) for i in range(2)]
+        kinds = [self.rate, self.uniform, self.delay, self.weibull[0], self.beta[0], self.lognorm[0], self.cyclic[0]]
+        self.timed = np.any([~np.isnan(k) for k in kinds], axis=0)
+
+        # Place conditionals and voting
+        self.hasPcn = conn.pcn.count(np.ones(len(conn.pcn), dtype=bool)) > 0
+        zero = conn.pcn.weight == 0
+        self.zeroPcn = ArcMatrix([[conn.pcn.trans[a], conn.pcn.place[a], 0] for a in np.flatnonzero(zero)], conn.pcn.shape, np.int64)
+        self.voting = conn.vote > 0
+        # Outgoing arcs of voting transitions to places that are also on their standard incoming arcs
+        preSets = [set(conn.pre.place[conn.pre.ptr[t]:conn.pre.ptr[t+1]].tolist()) for t in range(len(trans))]
+        self.voteShared = np.array([bool(self.voting[t]) and p in preSets[t] for t, p in zip(conn.post.trans.tolist(), conn.post.place.tolist())], dtype=bool)
+
+    def choose(self, mask):
+        """
+        Selects one marked transition at random, with equal weight, for each
+        replicate
+
+        Parameters
+        ----------
+        mask : numpy.ndarray
+            Boolean array marking the candidate transitions of each replicate
+
+        Returns
+        ----------
+        choice : numpy.ndarray
+            Index of the selected transition for each replicate
+        """
+        n = mask.sum(axis=1)
+        pick = (self.rng.random(len(n)) * n).astype(np.int64)
+        return np.argmax(np.cumsum(mask, axis=1) > pick[:,None], axis=1)
+
+    def getWait(self, trans, con, clock, lastFired):
+        """
+        Samples the duration between the requisites of transitions being met
+        and them firing, as per PetriNet.getWait
+
+        Parameters
+        ----------
+        trans : numpy.ndarray
+            Index of each transition to sample
+        con : numpy.ndarray
+            Place conditional modifier for each sample
+        clock : numpy.ndarray
+            Clock of the replicate for each sample
+        lastFired : numpy.ndarray
+            Clock when the transition last fired for each sample
+
+        Returns
+        ----------
+        wait : numpy.ndarray
+            The duration until each transition fires
+        """
+        rng = self.rng
+        wait = np.zeros(len(trans))
+        # KMC-esque Stochastic firing
+        m = ~np.isnan(self.rate[trans])
+        if m.any():
+            wait[m] += rng.standard_exponential(m.sum())/(self.rate[trans[m]]*con[m])
+        # Random uniform distribution
+        m = ~np.isnan(self.uniform[trans])
+        if m.any():
+            wait[m] += rng.random(m.sum())*(self.uniform[trans[m]]/con[m])
+        # Fixed wait firing
+        m = ~np.isnan(self.delay[trans])
+        if m.any():
+            wait[m] += self.delay[trans[m]]/con[m]
+        # Weibull distribution
+        m = ~np.isnan(self.weibull[0][trans])
+        if m.any():
+            t = trans[m]
+            genMean = self.weibull[0][t].copy()
+            sigma = self.weibull[2][t]
+            u = sigma > 0.0
+            if u.any():
+                genMean[u] = np.maximum(rng.normal(genMean[u], sigma[u]), 0.0)
+            wait[m] += (genMean/con[m])*(rng.standard_exponential(len(t))**(1.0/self.weibull[1][t]))
+        # Beta distribution
+        m = ~np.isnan(self.beta[0][trans])
+        if m.any():
+            t = trans[m]
+            wait[m] += rng.beta(self.beta[0][t], self.beta[1][t])*(self.beta[2][t]/con[m])
+        # Lognormal
+        m = ~np.isnan(self.lognorm[0][trans])
+        if m.any():
+            t = trans[m]
+            wait[m] += rng.lognormal(self.lognorm[0][t]/con[m], self.lognorm[1][t])
+        # Cyclic
+        m = ~np.isnan(self.cyclic[0][trans])
+        if m.any():
+            t = trans[m]
+            if (con[m] <= 0.0).any():
+                raise NotImplementedError('Conversion of PCN to instant not yet writen')
+            period = self.cyclic[0][t]/con[m]
+            c = clock[m]
+            w = period - np.mod(c - self.cyclic[1][t], period)
+            w[w == period] = 0.0
+            w[w < 0.0] += period[w < 0.0]
+            first = (w == 0.0) & (c == 0.0)
+            w[first] += period[first]
+            again = lastFired[m] == c
+            w[again] += period[again]
+            wait[m] += w
+        return wait
+
+    def record(self, rows):
+        """
+        Stores the current state of the given replicates for their histories
+        """
+        self.records.append([rows, self.clock[rows], self.tokens[rows], self.resetCount[rows], self.firedCount[rows]])
+
+    def histories(self, n=None):
+        """
+        Assembles a History object for each replicate from the recorded
+        states
+
+        Parameters
+        ----------
+        n : integer
+            Number of replicates for which to return histories (Default is
+            None, for all)
+
+        Returns
+        ----------
+        histories : list
+            History object for each replicate
+        """
+        if n is None:
+            n = self.n
+        if not len(self.records):
+            return [History() for i in range(n)]
+        rows = np.concatenate([r[0] for r in self.records])
+        order = np.argsort(rows, kind='stable')
+        rows = rows[order]
+        data = [np.concatenate([r[k] for r in self.records])[order] for k in range(1, 5)]
+        bounds = np.searchsorted(rows, np.arange(n+1))
+        histories = []
+        for i in range(n):
+            h = History()
+            a, b = bounds[i], bounds[i+1]
+            h.fromArrays(self.conn.places, self.conn.trans, data[0][a:b], data[1][a:b], data[2][a:b], data[3][a:b])
+            histories.append(h)
+        return histories
+
+    def run(self, steps, maxClock=None, history=False):
+        """
+        Simulates all replicates until each has ended
+
+        Parameters
+        ----------
+        steps : integer
+            Maximum number of steps to calculate for each replicate
+        maxClock : float
+            Maximum clock time permitted
+        history : boolean
+            Record the state of each replicate at each step
+        """
+        conn = self.conn
+        if history:
+            self.record(np.arange(self.n))
+        if not steps:
+            return
+        start = self.step.copy()
+        while True:
+            rows = np.flatnonzero(self.live)
+            if not len(rows):
+                break
+            tokens = self.tokens[rows]
+            clock = self.clock[rows]
+
+            # Get transitions whose requisites are met, and end replicates without any
+            ready = conn.enabled(tokens)
+            end = ~ready.any(axis=1)
+            if end.any():
+                self.live[rows[end]] = False
+                rows, tokens, clock, ready = rows[~end], tokens[~end], clock[~end], ready[~end]
+                if not len(rows):
+                    break
+            if trace >= traceSteps:
+                traceEvent(traceSteps, 'batchStep', 'Step of %d replicates' % len(rows), replicates=int(len(rows)))
+
+            # Remove transitions from the schedule whose requisites are no longer met
+            schedule = self.schedule[rows]
+            scheduled = self.scheduled[rows]
+            waiting = self.waiting[rows]
+            pcnStatus = self.pcnStatus[rows]
+            lastFired = self.lastFired[rows]
+            pcnStatus[~ready & scheduled] = 1.0
+            scheduled &= ready
+            waiting[~ready] = np.nan
+            # Record when transitions became ready
+            new = ready & np.isnan(waiting)
+            waiting[new] = np.broadcast_to(clock[:,None], waiting.shape)[new]
+
+            # Place conditional modifiers
+            con = np.ones(ready.shape)
+            if len(conn.pcn):
+                con += conn.pcn.sum(tokens[:,conn.pcn.place]*conn.pcn.weight)
+            timed = ready & self.timed
+            reschedule = timed & scheduled & self.hasPcn & (con != pcnStatus)
+            # Assign firing time for 'ready' transitions not yet in the schedule
+            r, t = np.nonzero(timed & ~scheduled)
+            if len(r):
+                schedule[r, t] = clock[r] + self.getWait(t, con[r, t], clock[r], lastFired[r, t])
+                scheduled[r, t] = True
+                pcnStatus[r, t] = np.where(self.hasPcn[t], con[r, t], pcnStatus[r, t])
+            # Reschedule place conditional transitions whose modifier has changed
+            r, t = np.nonzero(reschedule)
+            if len(r):
+                schedule[r, t] = np.maximum(clock[r], waiting[r, t] + self.getWait(t, con[r, t], clock[r], lastFired[r, t]))
+                pcnStatus[r, t] = con[r, t]
+            # Zero weight place conditional arcs fire timed transitions instantly
+            pcInst = np.zeros(ready.shape, dtype=bool)
+            if len(self.zeroPcn):
+                pcInst = ready & (self.zeroPcn.count(tokens[:,self.zeroPcn.place] > 0) > 0)
+                scheduled &= ~pcInst
+
+            # Instant transitions always fire first, otherwise the next scheduled
+            instants = (ready & ~self.timed) | pcInst
+            inst = instants.any(axis=1)
+            choice = np.zeros(len(rows), dtype=np.intp)
+            time = np.zeros(len(rows))
+            if inst.any():
+                choice[inst] = self.choose(instants[inst])
+            if not inst.all():
+                nxt = np.where(scheduled[~inst], schedule[~inst], np.inf)
+                soonest = nxt.min(axis=1)
+                choice[~inst] = self.choose(scheduled[~inst] & (nxt == soonest[:,None]))
+                time[~inst] = soonest - clock[~inst]
+            # Remove selected transitions from the schedule
+            scheduled[np.arange(len(rows)), choice] = False
+            schedule[~scheduled] = np.inf
+            self.schedule[rows] = schedule
+            self.scheduled[rows] = scheduled
+            self.waiting[rows] = waiting
+            self.pcnStatus[rows] = pcnStatus
+
+            # Update places' token holding time
+            self.totalTokenTime[rows] += time[:,None]*(tokens > 0)
+            # Fire the transitions
+            self.fire(rows, choice, tokens, time)
+            # Update history
+            if history:
+                self.record(rows)
+
+            # Check places and transitions for terminate conditions
+            tokens = self.tokens[rows]
+            placeExit = ((tokens < self.lower) | (tokens > self.upper)).any(axis=1)
+            transExit = (self.firedCount[rows] >= self.maxFire).any(axis=1)
+            self.placeExit[rows] |= placeExit
+            self.transExit[rows] |= transExit
+            end = placeExit | transExit | (self.step[rows] >= start[rows] + steps)
+            if maxClock is not None:
+                end |= self.clock[rows] > maxClock
+            self.live[rows[end]] = False
+
+    def fire(self, rows, choice, tokens, time):
+        """
+        Fires one transition in each of the given replicates
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            Index of each replicate
+        choice : numpy.ndarray
+            Index of the transition to fire in each replicate
+        tokens : numpy.ndarray
+            Token counts of the replicates before firing
+        time : numpy.ndarray
+            Duration of clock advancement for each replicate
+        """
+        conn = self.conn
+        # Incoming arcs (only those with their weight met for voting transitions)
+        sims, arcs = conn.pre.select(choice)
+        places = conn.pre.place[arcs]
+        weight = conn.pre.weight[arcs]
+        keep = ~(self.voting[choice[sims]] & (weight > tokens[sims, places]))
+        sims, places, weight = sims[keep], places[keep], weight[keep]
+        self.tokens[rows[sims], places] -= weight
+        self.outs[rows[sims], places] += weight
+        # Outgoing arcs
+        sims, arcs = conn.post.select(choice)
+        places = conn.post.place[arcs]
+        weight = conn.post.weight[arcs]
+        keep = ~(self.voteShared[arcs] & (weight > tokens[sims, places]))
+        sims, places, weight = sims[keep], places[keep], weight[keep]
+        self.tokens[rows[sims], places] += weight
+        self.ins[rows[sims], places] += weight
+        # Update transitions
+        self.firedCount[rows, choice] += 1
+        self.lastFired[rows, choice] = self.clock[rows] + time
+        self.waiting[rows, choice] = np.nan
+        self.pcnStatus[rows, choice] = 1.0
+        # Resets
+        sims, arcs = conn.reset.select(choice)
+        places = conn.reset.place[arcs]
+        self.tokens[rows[sims], places] = conn.resetTokens[places]
+        self.resetCount[rows[sims], places] += 1
+        # Advance step and clock
+        self.step[rows] += 1
+        self.clock[rows] += time
+
+# Extension of the files written with each compression
+compressionExts = collections.OrderedDict([('none', ''), ('gzip', '.gz'), ('bz2', '.bz2'), ('xz', '.xz')])
+# Levels accepted by each compression
+compressionLevels = {'none': range(10), 'gzip': range(10), 'bz2': range(1, 10), 'xz': range(10)}
+
+def checkCompression(compression, level=None):
+    """
+    Checks a compression and level before any output is written, raising
+    ValueError if either is invalid
+
+    Parameters
+    ----------
+    compression : string
+        Compression (see PetriNet.compression)
+    level : integer
+        Compression level (None for the default)
+    """
+    if compression not in compressionExts:
+        raise ValueError('"%s" does not refer to a valid compression. Valid compressions are: %r' % (compression, list(compressionExts)))
+    levels = compressionLevels[compression]
+    if level is not None and level not in levels:
+        raise ValueError('Compression level for "%s" must be from %d to %d, not %r' % (compression, levels[0], levels[-1], level))
+
+def compressor(compression, level=None):
+    """
+    Creates an object compressing a stream of data, with 'compress' and
+    'flush' methods, as used by OutputFile
+
+    Parameters
+    ----------
+    compression : string
+        Compression (see PetriNet.compression)
+    level : integer
+        Compression level, from 0 to 9 (Default = None, for 6, or 9 for
+        bz2)
+
+    Returns
+    ----------
+    compressor : object
+        The compressor (None for 'none')
+    """
+    if compression == 'gzip':
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    elif compression == 'bz2':
+        return bz2.BZ2Compressor(9 if level is None else level)
+    elif compression == 'xz':
+        return lzma.LZMACompressor(preset=6 if level is None else level)
+    return None
+
+def compressionOf(path):
+    """
+    Gives the compression of a result file, from its extension
+
+    Parameters
+    ----------
+    path : string
+        Path of the file
+
+    Returns
+    ----------
+    compression : string
+        Compression (see PetriNet.compression)
+    """
+    for compression, ext in compressionExts.items():
+        if ext and path.endswith(ext):
+            return compression
+    return 'none'
+
+def stripCompression(path):
+    """
+    Removes the compression extension, if any, from the path of a result
+    file
+
+    Parameters
+    ----------
+    path : string
+        Path of the file
+
+    Returns
+    ----------
+    path : string
+        Path without the compression extension
+    """
+    return path[:len(path) - len(compressionExts[compressionOf(path)])]
+
+def decompress(data, compression):
+    """
+    Decompresses data read from a compressed result file, of one or more
+    whole compressed streams
+
+    Parameters
+    ----------
+    data : bytes
+        Compressed data
+    compression : string
+        Compression (see PetriNet.compression)
+
+    Returns
+    ----------
+    data : bytes
+        Decompressed data
+    """
+    if compression == 'gzip':
+        return gzip.decompress(data)
+    elif compression == 'bz2':
+        return bz2.decompress(data)
+    elif compression == 'xz':
+        return lzma.decompress(data)
+    return data
+
+def openResult(path, mode='r'):
+    """
+    Opens a result file for reading, decompressing it as it is read if its
+    extension indicates compression
+
+    Parameters
+    ----------
+    path : string
+        Path of the file
+    mode : string
+        'r' for text, or 'rb' for bytes (Default = 'r')
+
+    Returns
+    ----------
+    file : filepointer
+        The file
+    """
+    compression = compressionOf(path)
+    if compression == 'none':
+        return open(path, mode)
+    if 'b' not in mode:
+        mode += 't'
+    return {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[compression](path, mode)
+
+class OutputFile(object):
+    """
+    Output file, compressed as it is written (see PetriNet.compression).
+    Text is written encoded as UTF-8, without translation of newlines, and
+    compressed data is written as the compressor produces it. The file
+    holds one or more whole compressed streams, each of which can be
+    decompressed alone (see endStream).
+
+    Attributes
+    ----------
+    name : string
+        Path of the file, including the compression extension
+    file : filepointer
+        The file, opened for binary writing
+    compression : string
+        Compression (see PetriNet.compression)
+    level : integer
+        Compression level (None for the default)
+    compressor : object
+        Compressor of the current stream (None if uncompressed, see
+        compressor)
+    size : integer
+        Number of bytes written, before compression
+    streamStart : integer
+        Value of size at the start of the current stream
+    """
+    def __init__(self, path, compression='none', level=None, mode='wb'):
+        """
+        Parameters
+        ----------
+        path : string
+            Path of the file, without the compression extension
+        compression : string
+            Compression (Default = 'none')
+        level : integer
+            Compression level (Default = None)
+        mode : string
+            'wb' to write a new file, or 'ab' to append (Default = 'wb')
+        """
+        self.name = path + compressionExts[compression]
+        self.file = open(self.name, mode)
+        self.compression = compression
+        self.level = level
+        self.compressor = compressor(compression, level)
+        self.size = 0
+        self.streamStart = 0
+
+    def write(self, data):
+        """
+        Writes text (encoded as UTF-8), or bytes, to the file
+
+        Parameters
+        ----------
+        data : string or bytes
+            Data to write
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.size += len(data)
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def endStream(self):
+        """
+        Completes the compressed stream written since the last was
+        completed, so that it can be decompressed alone, and starts another
+        """
+        if self.compressor is not None and self.size > self.streamStart:
+            self.file.write(self.compressor.flush())
+            self.compressor = compressor(self.compression, self.level)
+        self.streamStart = self.size
+
+    def close(self):
+        self.endStream()
+        self.file.close()
+
+class RowWriter(object):
+    """
+    Buffered writer of an output file, as returned by
+    PetriNet.writeNetStart. The values of each row are held until
+    'flushRows' rows have accumulated, and then formatted, from a template
+    prepared for the columns written, and written together, either
+    directly or by a background thread (see OutputThread).
+
+    Attributes
+    ----------
+    file : OutputFile object
+        Output file
+    name : string
+        Path of the output file
+    columns : list
+        Place or Transition objects written in each row (in column order)
+    template : string
+        Format of each row, given the values of the row
+    buffer : list
+        Values of the rows (tuples), and text, not yet written
+    flushRows : integer
+        Number of rows held before they are written
+    thread : OutputThread object
+        Thread by which rows are formatted and written (None to write
+        directly)
+    shared : boolean
+        Indicates that the file is shared with other writers in turn (as in
+        concatenated output), so is left open on closing
+    """
+    def __init__(self, path, columns, template, flushRows=1024, thread=None, file=None, compression='none', level=None):
+        """
+        Parameters
+        ----------
+        path : string
+            Path of the output file
+        columns : list
+            Place or Transition objects written in each row
+        template : string
+            Format of each row
+        flushRows : integer
+            Number of rows held before they are written
+        thread : OutputThread object
+            Thread by which rows are formatted and written (Default = None,
+            to write directly)
+        file : filepointer
+            Open file to write to in place of path, which is left open on
+            closing (Default = None)
+        compression : string
+            Compression of the file opened, whose path is given the
+            compression extension (Default = 'none', see OutputFile)
+        level : integer
+            Compression level (Default = None)
+        """
+        self.shared = file is not None
+        self.file = OutputFile(path, compression, level) if file is None else file
+        self.name = self.file.name
+        self.columns = columns
+        self.template = template
+        self.buffer = []
+        self.flushRows = flushRows
+        self.thread = thread
+
+    def row(self, values):
+        """
+        Adds a row to the file
+
+        Parameters
+        ----------
+        values : tuple
+            Values of the row, in the order of the template
+        """
+        self.buffer.append(values)
+        if len(self.buffer) >= self.flushRows:
+            self.flush()
+
+    def write(self, text):
+        """
+        Adds text to the file, as a row
+
+        Parameters
+        ----------
+        text : string
+            Text to write
+        """
+        self.buffer.append(text)
+        if len(self.buffer) >= self.flushRows:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the rows held to the file
+        """
+        rows = self.buffer
+        self.buffer = []
+        if self.thread is not None:
+            self.thread.submit(self.writeRows, rows)
+        else:
+            self.writeRows(rows)
+
+    def writeRows(self, rows):
+        """
+        Formats and writes rows to the file
+
+        Parameters
+        ----------
+        rows : list
+            Values of the rows (tuples), and text
+        """
+        template = self.template
+        if rows:
+            self.file.write(''.join([template % r if type(r) is tuple else r for r in rows]))
+        self.file.flush()
+
+    def index(self, ref, rows, clock, reason):
+        """
+        Writes the rows held, and indexes the part of a shared concatenated
+        file written since it was last indexed (see CatFile.index)
+
+        Parameters
+        ----------
+        ref : integer
+            Label of the simulation
+        rows : integer
+            Number of rows written for the simulation
+        clock : float
+            Final clock value of the simulation
+        reason : string
+            Reason the simulation ended (see PetriNet.endReason)
+        """
+        self.flush()
+        if self.thread is not None:
+            self.thread.submit(self.file.index, ref, rows, clock, reason)
+        else:
+            self.file.index(ref, rows, clock, reason)
+
+    def close(self):
+        """
+        Writes the rows held, and closes the file (unless shared)
+        """
+        self.flush()
+        if self.shared:
+            return
+        if self.thread is not None:
+            self.thread.submit(self.file.close)
+        else:
+            self.file.close()
+
+class DeltaWriter(RowWriter):
+    """
+    Buffered writer of a delta-encoded places file (see
+    PetriNet.placeFormat). Following the step (and clock), each row gives
+    its type, 'K' or 'D', and either the tokens of every place written (a
+    keyframe, 'K'), or the column index and tokens of each place whose
+    tokens have changed since the previous row ('D'). The first row, and
+    every 'keyframeRows' rows thereafter, are keyframes. The file is read
+    with PlaceDeltas.
+
+    Attributes
+    ----------
+    lead : string
+        Format of the step (and clock) leading each row
+    leadLength : integer
+        Number of values leading each row
+    keyframeRows : integer
+        Number of rows from one keyframe to the next
+    rows : integer
+        Number of rows added
+    last : tuple
+        Tokens of the previous row
+    """
+    def __init__(self, path, columns, lead, keyframeRows=1000, flushRows=1024, thread=None, file=None, compression='none', level=None):
+        """
+        Parameters
+        ----------
+        path : string
+            Path of the output file
+        columns : list
+            Place objects written in each row
+        lead : string
+            Format of the step (and clock) leading each row
+        keyframeRows : integer
+            Number of rows from one keyframe to the next
+        flushRows, thread, file, compression, level
+            See RowWriter
+        """
+        RowWriter.__init__(self, path, columns, lead + 'K,' + '%d,'*len(columns) + '\n', flushRows, thread, file, compression, level)
+        self.lead = lead
+        self.leadLength = lead.count('%')
+        self.keyframeRows = keyframeRows
+        self.rows = 0
+        self.last = None
+
+    def row(self, values):
+        """
+        Adds a row to the file, as a keyframe or as the changes since the
+        previous row
+
+        Parameters
+        ----------
+        values : tuple
+            Step (and clock), followed by the tokens of each column
+        """
+        tokens = values[self.leadLength:]
+        if self.rows % self.keyframeRows:
+            last = self.last
+            # Changes held as a list, to be told apart from keyframes
+            values = [values[:self.leadLength], tuple([x for i, n in enumerate(tokens) if n != last[i] for x in (i, n)])]
+        self.last = tokens
+        self.rows += 1
+        RowWriter.row(self, values)
+
+    def writeRows(self, rows):
+        """
+        Formats and writes rows to the file
+
+        Parameters
+        ----------
+        rows : list
+            Values of keyframes (tuples), of changes (lists of the leading
+            values and the changes), and text
+        """
+        template = self.template
+        lead = self.lead + 'D,'
+        text = []
+        for r in rows:
+            if type(r) is tuple:
+                text.append(template % r)
+            elif type(r) is list:
+                text.append(lead % r[0] + ('%d,'*len(r[1])) % r[1] + '\n')
+            else:
+                text.append(r)
+        if text:
+            self.file.write(''.join(text))
+        self.file.flush()
+
+class OutputThread(object):
+    """
+    Background thread by which output files are written, so that
+    simulation continues while files are formatted, written, and
+    concatenated. Tasks are executed in the order submitted, from a bounded
+    queue: once 'maxTasks' are waiting, submission blocks until the thread
+    catches up. An exception raised by a task stops the execution of later
+    tasks, and is raised again in the submitting thread by the next call to
+    submit, wait, or close.
+
+    Attributes
+    ----------
+    tasks : queue.Queue
+        Tasks waiting, as (function, arguments)
+    error : Exception
+        Exception raised by a task (None if none)
+    thread : threading.Thread
+        The thread
+    """
+    def __init__(self, maxTasks=64):
+        """
+        Parameters
+        ----------
+        maxTasks : integer
+            Number of tasks waiting at which submission blocks
+        """
+        self.tasks = queue.Queue(maxTasks)
+        self.error = None
+        self.thread = threading.Thread(target=self.work, name='MacchiatoOutput', daemon=True)
+        self.thread.start()
+
+    def work(self):
+        """
+        Executes tasks until closed
+        """
+        while True:
+            task = self.tasks.get()
+            try:
+                if task is None:
+                    return
+                if self.error is None:
+                    task[0](*task[1])
+            except BaseException as e:
+                self.error = e
+            finally:
+                self.tasks.task_done()
+
+    def check(self):
+        """
+        Raises any exception raised by a task
+        """
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            raise error
+
+    def submit(self, function, *args):
+        """
+        Adds a task, blocking while the queue is full
+
+        Parameters
+        ----------
+        function : function
+            Function to call
+        args
+            Arguments of the function
+        """
+        self.check()
+        self.tasks.put((function, args))
+
+    def wait(self):
+        """
+        Blocks until all submitted tasks are complete
+        """
+        self.tasks.join()
+        self.check()
+
+    def close(self, check=True):
+        """
+        Completes all submitted tasks, and stops the thread
+
+        Parameters
+        ----------
+        check : boolean
+            Raises any exception raised by a task if True (False when
+            closing after an exception elsewhere)
+        """
+        self.tasks.put(None)
+        self.thread.join()
+        if check:
+            self.check()
+
+class StoreRecord(object):
+    """
+    The results of one simulation for a binary store (see StoreWriter),
+    accumulated in typed arrays in place of the output files: the step,
+    clock, tokens of each place and fired count of each transition written
+    to file (see PetriNet.placesToPrint and PetriNet.transToPrint) after
+    each step, and the transitions fired at each step.
+
+    Attributes
+    ----------
+    columns : tuple
+        Place and Transition objects written at each step (None once
+        finished)
+    transIndex : dictionary
+        Index of each transition label, for the fire list (None once
+        finished)
+    step : array.array
+        Step at each row
+    clock : array.array
+        Clock value at each row
+    tokens : array.array
+        Token count of each place written, at each row (row-major)
+    fired : array.array
+        Fired count of each transition written, at each row (row-major)
+    events : array.array
+        Index of the transition of each firing
+    eventRows : array.array
+        Row of each firing, from the first row of the simulation
+    totals : array.array
+        Tokens in, tokens out, and resets of each place written, at the end
+        of the simulation
+    exit : integer
+        Terminate conditions met (1 for places, 2 for transitions, 3 for
+        both, 0 otherwise)
+    """
+    __slots__ = ['columns', 'transIndex', 'step', 'clock', 'tokens', 'fired', 'events', 'eventRows', 'totals', 'exit']
+
+    def __init__(self, pn):
+        places, trans, fireLabels = storeColumns(pn)
+        self.columns = ([pn.places[p] for p in places], [pn.trans[t] for t in trans])
+        self.transIndex = {t: i for i, t in enumerate(fireLabels)}
+        self.step = array.array('q')
+        self.clock = array.array('d')
+        self.tokens = array.array('q')
+        self.fired = array.array('q')
+        self.events = array.array('i')
+        self.eventRows = array.array('q')
+        self.totals = array.array('q')
+        self.exit = 0
+
+    def update(self, pn, fireList=[], counts=None):
+        """
+        Records the state of a Petri Net at the end of a step
+
+        Parameters
+        ----------
+        pn : PetriNet object
+            The Petri Net simulated
+        fireList : list
+            Transitions firing on this step
+        counts : list
+            Number of times each transition fires (Default = None, for once
+            each)
+        """
+        row = len(self.step)
+        self.step.append(pn.step)
+        self.clock.append(pn.clock)
+        self.tokens.extend([p.tokens for p in self.columns[0]])
+        self.fired.extend([t.firedCount for t in self.columns[1]])
+        if not self.transIndex:
+            return
+        for i, t in enumerate(fireList):
+            n = 1 if counts is None else counts[i]
+            self.events.extend([self.transIndex[t.label]]*n)
+            self.eventRows.extend([row]*n)
+
+    def finish(self, pn):
+        """
+        Records the totals of a Petri Net at the end of the simulation, and
+        releases its places and transitions
+
+        Parameters
+        ----------
+        pn : PetriNet object
+            The Petri Net simulated
+        """
+        places = self.columns[0]
+        self.totals.extend([p.ins for p in places])
+        self.totals.extend([p.outs for p in places])
+        self.totals.extend([p.resetCount for p in places])
+        self.exit = (1 if pn.placeExit else 0) + (2 if pn.transExit else 0)
+        self.columns = None
+        self.transIndex = None
+
+def storeColumns(pn):
+    """
+    Gives the columns of a binary store of the results of a Petri Net,
+    following the selection of output files, places, and transitions
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net simulated
+
+    Returns
+    ----------
+    places : list
+        Labels of the places whose tokens are recorded
+    trans : list
+        Labels of the transitions whose fired counts are recorded
+    fireLabels : list
+        Labels of the transitions whose firings may be recorded (empty if
+        the fire list is not written)
+    """
+    places = [p for p in pn.places if pn.writePlaceFile and (not pn.placesToPrint or p in pn.placesToPrint)]
+    trans = [t for t in pn.trans if pn.writeTransFile and (not pn.transToPrint or t in pn.transToPrint)]
+    fireLabels = list(pn.trans) if pn.writeFireFile else []
+    return places, trans, fireLabels
+
+class StoreWriter(object):
+    """
+    Writes the results of a set of simulations to a binary columnar store: a
+    directory holding a JSON manifest and a raw file for each column, to
+    which the records of each simulation are appended in turn (see
+    ReplicateStore). Records are held until 'flushRows' rows have
+    accumulated, and then written together.
+
+    Attributes
+    ----------
+    path : string
+        Directory of the store (None if records are only collected, as in
+        the worker processes of repeatParallel)
+    manifest : dictionary
+        Description of the store, written to manifest.json
+    pending : list
+        (ref, StoreRecord object) of each simulation not yet written
+    pendingRows : integer
+        Number of rows pending
+    flushRows : integer
+        Number of rows pending at which they are written
+    """
+    # Column files and their array.array type codes
+    columns = collections.OrderedDict([('step', 'q'), ('clock', 'd'), ('tokens', 'q'), ('fired', 'q'), ('events', 'i'), ('eventRows', 'q'), ('totals', 'q')])
+    # Record of each simulation in replicates.bin
+    replicateFormat = '=qqqqqdq'
+    replicateFields = ['ref', 'row', 'rows', 'event', 'events', 'clock', 'exit']
+
+    def __init__(self, path, pn, mode, flushRows=65536):
+        """
+        Parameters
+        ----------
+        path : string
+            Directory of the store, which is created if needed and emptied
+            of any existing store (None to only collect records)
+        pn : PetriNet object
+            The Petri Net simulated
+        mode : string
+            Run mode of the simulations
+        flushRows : integer
+            Number of rows pending at which they are written
+        """
+        self.path = path
+        order = '<' if sys.byteorder == 'little' else '>'
+        places, trans, fireLabels = storeColumns(pn)
+        self.manifest = collections.OrderedDict([
+            ('format', 'Macchiato store'),
+            ('version', 1),
+            ('name', pn.name),
+            ('units', pn.units),
+            ('runMode', mode),
+            ('timed', mode in ['stochastic', 'tau-leap', 'schedule']),
+            ('seed', pn.seed),
+            ('time', pn.time),
+            ('places', places),
+            ('trans', trans),
+            ('fireLabels', fireLabels),
+            ('dtypes', collections.OrderedDict((c, '%s%s%d' % (order, 'f' if code == 'd' else 'i', array.array(code).itemsize)) for c, code in self.columns.items())),
+            ('replicateDtype', [[f, '%s%s8' % (order, 'f' if f == 'clock' else 'i')] for f in self.replicateFields]),
+            ('replicates', 0),
+            ('rows', 0),
+            ('events', 0),
+        ])
+        self.pending = []
+        self.pendingRows = 0
+        self.flushRows = flushRows
+        if path is not None:
+            if not os.path.exists(path):
+                os.makedirs(path)
+            for c in list(self.columns) + ['replicates']:
+                open(os.path.join(path, '%s.bin' % c), 'wb').close()
+            self.writeManifest()
+
+    def add(self, ref, record):
+        """
+        Adds the results of a simulation to the store
+
+        Parameters
+        ----------
+        ref : integer
+            Label of the simulation
+        record : StoreRecord object
+            Results of the simulation (finished)
+        """
+        self.pending.append((ref, record))
+        self.pendingRows += len(record.step)
+        if self.path is not None and self.pendingRows >= self.flushRows:
+            self.flush()
+
+    def take(self):
+        """
+        Removes and returns the pending records
+
+        Returns
+        ----------
+        pending : list
+            (ref, StoreRecord object) of each simulation
+        """
+        pending = self.pending
+        self.pending = []
+        self.pendingRows = 0
+        return pending
+
+    def flush(self):
+        """
+        Writes the pending records to the store
+        """
+        pending = self.take()
+        if self.path is None or not len(pending):
+            return
+        for c in self.columns:
+            with open(os.path.join(self.path, '%s.bin' % c), 'ab') as file:
+                for ref, record in pending:
+                    getattr(record, c).tofile(file)
+        with open(os.path.join(self.path, 'replicates.bin'), 'ab') as file:
+            for ref, record in pending:
+                file.write(struct.pack(self.replicateFormat, ref, self.manifest['rows'], len(record.step), self.manifest['events'], len(record.events), record.clock[-1] if len(record.clock) else 0.0, record.exit))
+                self.manifest['replicates'] += 1
+                self.manifest['rows'] += len(record.step)
+                self.manifest['events'] += len(record.events)
+        self.writeManifest()
+
+    def writeManifest(self):
+        """
+        Writes the manifest of the store
+        """
+        with open(os.path.join(self.path, 'manifest.json'), 'w') as file:
+            json.dump(self.manifest, file, indent=1)
+
+    def close(self):
+        """
+        Writes any pending records
+        """
+        self.flush()
+
+class ReplicateStore(object):
+    """
+    Read access to a binary columnar store of the results of a set of
+    simulations, written by StoreWriter (requires NumPy). The columns are
+    memory-mapped, and the rows of each simulation are found from its
+    record in 'replicates'. Rows hold the step, clock, tokens of each place,
+    and fired count of each transition after each step, as in the output
+    files, and firings are listed by row and transition index.
+
+    Attributes
+    ----------
+    path : string
+        Directory of the store
+    manifest : dictionary
+        Description of the store (name, units, runMode, seed, and sizes)
+    places : list
+        Labels of the places written, in column order
+    trans : list
+        Labels of the transitions written, in column order
+    fireLabels : list
+        Labels of all transitions, indexed by 'events'
+    step : numpy.ndarray
+        Step at each row
+    clock : numpy.ndarray
+        Clock value at each row
+    tokens : numpy.ndarray
+        Token count of each place (columns) at each row
+    fired : numpy.ndarray
+        Fired count of each transition (columns) at each row
+    events : numpy.ndarray
+        Index of the transition of each firing
+    eventRows : numpy.ndarray
+        Row of each firing, from the first row of its simulation
+    totals : numpy.ndarray
+        Tokens in, tokens out, and resets of each place at the end of each
+        simulation (shape: simulations, 3, places)
+    replicates : numpy.ndarray
+        Record of each simulation: ref (label), row and rows (first row and
+        number of rows), event and events (first firing and number of
+        firings), final clock, and exit (see StoreRecord)
+    index : dictionary
+        Position in 'replicates' of each simulation label
+    """
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : string
+            Directory of the store
+        """
+        if np is None:
+            raise ImportError('NumPy is required to read a store')
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), 'r') as file:
+            self.manifest = json.load(file)
+        if self.manifest.get('format') != 'Macchiato store':
+            raise ValueError('"%s" is not a Macchiato store' % path)
+        self.places = self.manifest['places']
+        self.trans = self.manifest['trans']
+        self.fireLabels = self.manifest['fireLabels']
+        dtypes = self.manifest['dtypes']
+        rows = self.manifest['rows']
+        events = self.manifest['events']
+        count = self.manifest['replicates']
+        self.step = self.column('step', dtypes['step'], (rows,))
+        self.clock = self.column('clock', dtypes['clock'], (rows,))
+        self.tokens = self.column('tokens', dtypes['tokens'], (rows, len(self.places)))
+        self.fired = self.column('fired', dtypes['fired'], (rows, len(self.trans)))
+        self.events = self.column('events', dtypes['events'], (events,))
+        self.eventRows = self.column('eventRows', dtypes['eventRows'], (events,))
+        self.totals = self.column('totals', dtypes['totals'], (count, 3, len(self.places)))
+        self.replicates = self.column('replicates', [tuple(f) for f in self.manifest['replicateDtype']], (count,))
+        self.index = {int(ref): i for i, ref in enumerate(self.replicates['ref'])}
+
+    def column(self, name, dtype, shape):
+        """
+        Memory-maps a column file of the store
+
+        Parameters
+        ----------
+        name : string
+            Name of the column
+        dtype : string or list
+            NumPy data type of the column
+        shape : tuple
+            Shape of the column
+
+        Returns
+        ----------
+        column : numpy.ndarray
+            Read-only view of the column
+        """
+        if not shape[0]:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, '%s.bin' % name), dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self):
+        return len(self.replicates)
+
+    def refs(self):
+        """
+        Returns the labels of the simulations in the store, in order
+        """
+        return [int(ref) for ref in self.replicates['ref']]
+
+    def replicate(self, ref):
+        """
+        Gives the rows of one simulation
+
+        Parameters
+        ----------
+        ref : integer
+            Label of the simulation
+
+        Returns
+        ----------
+        step : numpy.ndarray
+            Step at each row
+        clock : numpy.ndarray
+            Clock value at each row
+        tokens : numpy.ndarray
+            Token count of each place (columns) at each row
+        fired : numpy.ndarray
+            Fired count of each transition (columns) at each row
+        """
+        rec = self.replicates[self.index[ref]]
+        rows = slice(rec['row'], rec['row'] + rec['rows'])
+        return self.step[rows], self.clock[rows], self.tokens[rows], self.fired[rows]
+
+    def firings(self, ref):
+        """
+        Gives the firings of one simulation
+
+        Parameters
+        ----------
+        ref : integer
+            Label of the simulation
+
+        Returns
+        ----------
+        rows : numpy.ndarray
+            Row of each firing, from the first row of the simulation
+        trans : numpy.ndarray
+            Index of the transition of each firing (see fireLabels)
+        """
+        rec = self.replicates[self.index[ref]]
+        events = slice(rec['event'], rec['event'] + rec['events'])
+        return self.eventRows[events], self.events[events]
+
+class EventLog(object):
+    """
+    Read access to a binary fire list (event log), written in place of the
+    fire list file by the 'binary' fire format (requires NumPy). The file
+    begins with 'MFL1', the length of a JSON header (a little-endian 32 bit
+    integer), and the header, which holds the table of transition labels.
+    This is followed by a fixed-width record of each firing: the simulation
+    label, step, and clock (64 bit), and the index of the transition in the
+    table (unsigned 32 bit). A record with the transition index 'noTrans'
+    marks the start of each simulation. Records are memory-mapped (or read
+    into memory, if the file is compressed), and selected by transition
+    index, so labels are only compared with the table.
+
+    Attributes
+    ----------
+    path : string
+        Path of the file
+    header : dictionary
+        Header of the file (name, units, seed, labels)
+    labels : list
+        Labels of the transitions, by index
+    records : numpy.ndarray
+        Record of each firing (and start of each simulation), with fields
+        'ref', 'step', 'clock', and 'trans'
+    """
+    # File signature, record layout, and the index marking the start of a simulation
+    magic = b'MFL1'
+    record = struct.Struct('<qqdI')
+    dtype = [('ref', '<i8'), ('step', '<i8'), ('clock', '<f8'), ('trans', '<u4')]
+    noTrans = 0xFFFFFFFF
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : string
+            Path of the file
+        """
+        if np is None:
+            raise ImportError('NumPy is required to read an event log')
+        self.path = path
+        compressed = compressionOf(path) != 'none'
+        with openResult(path, 'rb') as file:
+            offset = readEventLogHeader(file)
+            self.header = json.loads(file.read(offset - 8).decode('utf-8'))
+            if compressed:
+                # Compressed records are read into memory, not memory-mapped
+                data = file.read()
+        self.labels = self.header['labels']
+        if compressed:
+            self.records = np.frombuffer(data, dtype=self.dtype, count=len(data)//self.record.size)
+            return
+        count = (os.path.getsize(path) - offset)//self.record.size
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def ids(self, pattern=None):
+        """
+        Gives the indices of the transitions whose labels match a pattern
+
+        Parameters
+        ----------
+        pattern : string
+            Unix shell-style wildcard pattern (see fnmatch), or None for all
+            transitions
+
+        Returns
+        ----------
+        ids : numpy.ndarray
+            Indices of the matching transitions
+        """
+        if pattern is None:
+            return np.arange(len(self.labels))
+        matches = set(filter(self.labels, pattern))
+        return np.array([i for i, t in enumerate(self.labels) if t in matches], dtype=np.int64)
+
+    def select(self, pattern=None, start=None, end=None, refs=None):
+        """
+        Gives the records of firings, optionally filtered
+
+        Parameters
+        ----------
+        pattern : string
+            Unix shell-style wildcard pattern of transition labels (Default
+            = None, for all transitions)
+        start : float
+            Least clock value of the firings (inclusive)
+        end : float
+            Greatest clock value of the firings (exclusive)
+        refs : list
+            Labels of the simulations of the firings (Default = None, for
+            all simulations)
+
+        Returns
+        ----------
+        records : numpy.ndarray
+            Records of the selected firings, in order
+        """
+        records = self.records
+        keep = np.isin(records['trans'], self.ids(pattern))
+        if start is not None:
+            keep &= records['clock'] >= start
+        if end is not None:
+            keep &= records['clock'] < end
+        if refs is not None:
+            keep &= np.isin(records['ref'], refs)
+        return records[keep]
+
+    def count(self, pattern=None, start=None, end=None, refs=None):
+        """
+        Counts the firings of each transition, optionally filtered (see
+        select)
+
+        Returns
+        ----------
+        counts : collections.OrderedDict
+            Number of firings of each transition matching the pattern
+        """
+        ids = self.ids(pattern)
+        counts = np.bincount(self.select(pattern, start, end, refs)['trans'], minlength=len(self.labels))
+        return collections.OrderedDict((self.labels[i], int(counts[i])) for i in ids)
+
+    def refs(self):
+        """
+        Returns the labels of the simulations in the file, in order
+        """
+        return self.records['ref'][self.records['trans'] == self.noTrans].tolist()
+
+    def countByRef(self, pattern=None, start=None, end=None):
+        """
+        Counts the firings in each simulation, optionally filtered (see
+        select)
+
+        Returns
+        ----------
+        refs : list
+            Labels of the simulations
+        counts : numpy.ndarray
+            Number of matching firings in each simulation
+        """
+        refs = self.refs()
+        selected = self.select(pattern, start, end)['ref']
+        order = np.argsort(refs, kind='stable')
+        position = order[np.searchsorted(np.array(refs)[order], selected)]
+        return refs, np.bincount(position, minlength=len(refs))
+
+def writeEventLogHeader(file, pn):
+    """
+    Writes the header of a binary fire list (see EventLog)
+
+    Parameters
+    ----------
+    file : filepointer
+        File opened for binary writing
+    pn : PetriNet object
+        The Petri Net simulated
+    """
+    header = json.dumps(collections.OrderedDict([('name', pn.name), ('units', pn.units), ('seed', pn.seed), ('labels', list(pn.trans))])).encode('utf-8')
+    file.write(EventLog.magic + struct.pack('<I', 8 + len(header)) + header)
+
+def readEventLogHeader(file):
+    """
+    Reads the start of a binary fire list (see EventLog), leaving the file
+    positioned at the JSON header
+
+    Parameters
+    ----------
+    file : filepointer
+        File opened for binary reading
+
+    Returns
+    ----------
+    offset : integer
+        Position in the file of the first record
+    """
+    start = file.read(8)
+    if len(start) < 8 or start[:4] != EventLog.magic:
+        raise ValueError('"%s" is not a Macchiato event log' % getattr(file, 'name', 'file'))
+    return struct.unpack('<I', start[4:])[0]
+
+class PlaceDeltas(object):
+    """
+    Reader of a delta-encoded places file (see DeltaWriter), of one
+    simulation or concatenated, which reconstructs the tokens of every
+    place written at any step or clock value. Each marking is rebuilt from
+    the last keyframe before it, so only the rows since that keyframe are
+    applied.
+
+    Attributes
+    ----------
+    path : string
+        Path of the file
+    labels : list
+        Labels of the places, by column
+    timed : boolean
+        Indicates that each row gives the clock
+    sims : collections.OrderedDict
+        Steps, clocks, rows (tokens of keyframes, or changes, as column
+        index and tokens pairs), and row numbers of the keyframes of each
+        simulation, by label (None for a file of one simulation)
+    """
+    def __init__(self, path, ref=None):
+        """
+        Parameters
+        ----------
+        path : string
+            Path of the file (which may be compressed)
+        ref : integer
+            Label of the one simulation to read from a concatenated file,
+            found by its index (Default = None, to read every simulation)
+        """
+        self.path = path
+        self.labels = None
+        self.timed = False
+        self.sims = collections.OrderedDict()
+        if ref is not None:
+            self.readPart(ref, readCatPart(path, ref).split('\n'))
+            return
+        with openResult(path, 'r') as file:
+            lines = []
+            part = None
+            for line in file:
+                if line.startswith('>'*5):
+                    if lines:
+                        self.readPart(part, lines)
+                    part = int(line.split(',')[1])
+                    lines = []
+                    continue
+                lines.append(line)
+            if lines:
+                self.readPart(part, lines)
+
+    def readPart(self, ref, lines):
+        """
+        Reads the rows of one simulation
+
+        Parameters
+        ----------
+        ref : integer
+            Label of the simulation
+        lines : list
+            Lines of the simulation's part of the file, from its header
+        """
+        columns = lines[1].rstrip('\n').split(',')
+        self.timed = columns[1] != 'Type'
+        lead = 2 if self.timed else 1
+        self.labels = columns[lead + 1:-1]
+        sim = {'steps': [], 'clocks': [], 'rows': [], 'keys': []}
+        for line in lines[2:]:
+            line = line.rstrip('\n')
+            if not line:
+                # Summary follows the rows
+                break
+            values = line.split(',')
+            if values[lead] == 'K':
+                sim['keys'].append(len(sim['rows']))
+            sim['steps'].append(int(values[0]))
+            sim['clocks'].append(float(values[1]) if self.timed else None)
+            sim['rows'].append([int(v) for v in values[lead + 1:-1]])
+        self.sims[ref] = sim
+
+    def refs(self):
+        """
+        Returns the labels of the simulations read, in order
+        """
+        return list(self.sims)
+
+    def marking(self, step=None, clock=None, ref=None):
+        """
+        Reconstructs the tokens of every place at a step, or clock value, as
+        after the last row at or before it
+
+        Parameters
+        ----------
+        step : integer
+            Step (Default = None)
+        clock : float
+            Clock value, if step is not given (Default = None, for the end
+            of the simulation)
+        ref : integer
+            Label of the simulation (Default = None, for the first read)
+
+        Returns
+        ----------
+        marking : collections.OrderedDict
+            Tokens of each place, by label
+        """
+        sim = self.sims[next(iter(self.sims)) if ref is None else ref]
+        if step is not None:
+            row = bisect.bisect_right(sim['steps'], step) - 1
+        elif clock is not None:
+            if not self.timed:
+                raise ValueError('"%s" does not record the clock' % self.path)
+            row = bisect.bisect_right(sim['clocks'], clock) - 1
+        else:
+            row = len(sim['rows']) - 1
+        if row < 0:
+            raise ValueError('No rows at or before step %s, clock %s' % (step, clock))
+        key = sim['keys'][bisect.bisect_right(sim['keys'], row) - 1]
+        tokens = list(sim['rows'][key])
+        for changes in sim['rows'][key + 1:row + 1]:
+            for i in range(0, len(changes), 2):
+                tokens[changes[i]] = changes[i + 1]
+        return collections.OrderedDict(zip(self.labels, tokens))
+
+    def markings(self, ref=None):
+        """
+        Reconstructs the tokens of every place at every row, in order
+
+        Parameters
+        ----------
+        ref : integer
+            Label of the simulation (Default = None, for the first read)
+
+        Yields
+        ----------
+        row : tuple
+            Step, clock (None if not timed), and list of the tokens of each
+            place, by column
+        """
+        sim = self.sims[next(iter(self.sims)) if ref is None else ref]
+        tokens = None
+        keys = set(sim['keys'])
+        for row, (step, clock, values) in enumerate(zip(sim['steps'], sim['clocks'], sim['rows'])):
+            if row in keys:
+                tokens = list(values)
+            else:
+                tokens = list(tokens)
+                for i in range(0, len(values), 2):
+                    tokens[values[i]] = values[i + 1]
+            yield step, clock, tokens
+
+def repeat(pn, maxClock, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, start=0, history=True, fileOutput=True, endOnly=False, concatenate=False, analysisStep=1E2, batch=None, workers=None, seed=None, online=False, stats=None, background=False):#, log=True):
+    """
+    Automated repeated executions of a Petri Net
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net structure to simulated
+    maxClock : float
+        The largest simulated time permitted in any one simulation
+    maxSteps : float
+        The largest number of simulation steps permitted in any one simulation
+    simsFactor : float
+        Parametises the number of simulations conducted. Repetition of
+        simulations ends once the total simulated time supasses the product
+        of maxClock and simsFactor.
+    fixedNumber : integer (Default: None)
+        Set exact number of simulations to perform, overruling simsFactor and
+        maxClock parameters.
+    start : integer (Default: 0)
+        Starting offset for simulation label counter
+    history : boolean
+        Collects and aggregates data if True
+    analysisStep : float
+        Time resolution of post-simulation analysis
+    fileOutput : boolean (Default: True)
+        Toggles whether results are written to file.
+    endOnly : boolean (Default: False)
+        Only the final stage of the Petri net is recorded when enabled.
+    concatenate : boolean (Default: False)
+        Condenses output files to one per type if enabled.
+    batch : integer (Default: None)
+        If given, simulations are run in lockstep groups of this size by
+        repeatBatch (see Batch class), and no output files are written for
+        individual simulations
+    workers : integer (Default: None)
+        If greater than one, simulations are distributed across a pool of
+        this many processes by repeatParallel
+    seed : integer (Default: None)
+        Seed from which the random number stream of each simulation is
+        derived (see spawnRandom), such that each simulation's results
+        depend only on the seed and its label. Drawn from the global random
+        number generator if not given. Recorded in the output files.
+    online : boolean (Default: False)
+        If True, the history of each simulation is folded into a HistoryStats
+        object as soon as it finishes, rather than all histories being kept
+        until the end, so memory use does not grow with the number of
+        simulations (requires NumPy)
+    stats : HistoryStats object (Default: None)
+        Statistics into which the histories are folded, implying online. May
+        be inspected during or after the simulations, or carried over from
+        an earlier call to extend a set of simulations.
+    background : boolean (Default: False)
+        If True, output files are formatted, written, and concatenated by a
+        background thread (see OutputThread) while simulation continues
+    # log : boolean
+    #     Toggle log file
+    """
+    if batch is not None and workers is not None and workers > 1:
+        raise ValueError('Batch simulation cannot be combined with multiple workers')
+    if workers is not None and workers > 1:
+        return repeatParallel(pn, maxClock, workers, maxSteps=maxSteps, simsFactor=simsFactor, fixedNumber=fixedNumber, start=start, history=history, fileOutput=fileOutput, endOnly=endOnly, concatenate=concatenate, analysisStep=analysisStep, seed=seed, online=online, stats=stats, background=background)
+    if batch is not None:
+        if fileOutput:
+            speak('Batch simulation does not write output files for individual simulations')
+        return repeatBatch(pn, maxClock, batch, maxSteps=maxSteps, simsFactor=simsFactor, fixedNumber=fixedNumber, start=start, history=history, analysisStep=analysisStep, seed=seed, online=online, stats=stats)
+    if fixedNumber is not None and fixedNumber < 1:
+        speak(f'{fixedNumber} simulations requested -- exiting.')
+        return
+    # Wall time log
+    wall = int(time.time())
+    if seed is None:
+        seed = random.getrandbits(63)
+    # Back up Petri Net state
+    backUp = pn.snapshot()
+    stamp = pn.time
+
+    # Results of all simulations are written to one store in the 'store' output format
+    if fileOutput and pn.outputFormat == 'store' and True in [pn.writePlaceFile, pn.writeTransFile, pn.writeFireFile]:
+        pn.seed = seed
+        pn.store = StoreWriter(os.path.join(os.getcwd(), pn.name, '%s_Store_%d' % (pn.name, stamp)), pn, pn.runMode)
+    elif fileOutput and background:
+        pn.output = OutputThread()
+    # Concatenated output is appended directly to one file of each type
+    if fileOutput and concatenate and pn.store is None:
+        pn.seed = seed
+        pn.catFiles = openCatFiles(pn, stamp)
+
+    i = 1 + start
+    summary = ''
+    clock = 0.0
+    histories = []
+    if history and online and stats is None:
+        stats = HistoryStats(pn, maxClock, analysisStep)
+    stop = False
+    # Set up record of place history
+    pStats = collections.OrderedDict()
+    for p in pn.places:
+        pStats[p] = [0,0,0.0]
+    # Set up record of transition history
+    tStats = collections.OrderedDict()
+    for t in pn.trans:
+        tStats[t] = 0
+    # Loop to run multiple simulations
+
+    # if log:
+    #     logF = open(os.path.join(os.getcwd(), 'log.txt'), 'w')
+    try:
+        while True:
+            # if log:
+            #     logF.write('%r >>> Beginning simulation %d\n' % (datetime.now().strftime('%d/%m/%Y %H:%M:%S'), i))
+            print('\n'+'='*80+'\nBeginning simulation %d:' % i)
+            pn.time = i
+            # Independent random number stream for each simulation
+            pn.rng = spawnRandom(seed, i)
+            pn.seed = seed
+            # Run simulation
+            pn.run(maxSteps, maxClock=maxClock, history=history, fileOutput=fileOutput, endOnly=endOnly)
+            # Record place history
+            for p in pn.places:
+                pStats[p][0] += pn.places[p].ins
+                pStats[p][1] += pn.places[p].outs
+                pStats[p][2] += pn.places[p].totalTokenTime
+            # Record transition history
+            for t in pn.trans:
+                tStats[t] += pn.trans[t].firedCount
+            # Add to list of simulation histories, or to running statistics
+            if history and stats is not None:
+                stats.add(pn.history)
+            elif history:
+                histories.append(pn.history)
+            # Update aggregated simulation time accrued
+            clock += pn.clock
+            # End loop if total time or simulation count limit has been reached
+            if (clock >= maxClock*simsFactor and fixedNumber is None) or i-start == fixedNumber:
+                # Print simulations' wall time
+                wall = int(time.time() - wall)
+                summary = '='*80 + '\n%d simulations, total clock: %.5g %s (%.5g %s per simulation)\nSimulation wall time: %d seconds\nRandom seed: %s\n' % (i-start, clock, pn.units, clock/float(i), pn.units, wall, seed) + '='*80
+                print('\n\n%s' % summary)
+                break
+            i += 1
+            # Restore orginal Petri Net state for the next iteration
+            pn.restore(backUp)
+            pn.history = History()
+    except BaseException:
+        # Stop writing output without masking the exception
+        if pn.output is not None:
+            pn.output.close(check=False)
+            pn.output = None
+        raise
+    finally:
+        if pn.output is not None:
+            pn.output.close()
+            pn.output = None
+        if pn.catFiles is not None:
+            for file in pn.catFiles.values():
+                file.close()
+            pn.catFiles = None
+    # if log:
+    #     logF.write('All simulations complete')
+    #     logF.close()
+    if pn.store is not None:
+        pn.store.close()
+        pn.store = None
+    # Write summary of simulations to file
+    writeSummary(pn, summary, pStats, tStats)
+
+    # Amalgamate results
+    if history:
+        analyseHistories(pn, histories, maxClock, analysisStep, stats=stats)
+
+def spawnRandom(seed, label):
+    """
+    Creates an independent random number generator for one of a set of
+    simulations, determined only by the seed of the set and the simulation
+    label (the two are hashed together by random.Random)
+
+    Parameters
+    ----------
+    seed : integer
+        Seed of the set of simulations
+    label : integer
+        Label of the simulation
+
+    Returns
+    ----------
+    rng : random.Random object
+        Random number generator for the simulation
+    """
+    return random.Random('%s-%d' % (seed, label))
+
+# State of each worker process used by repeatParallel
+worker = {}
+
+def initWorker(pn, seed, quiet, settings):
+    """
+    Prepares a worker process for repeatParallel
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net structure to simulated
+    seed : integer
+        Seed of the set of simulations
+    quiet : boolean
+        Silences textual output to terminal if True
+    settings : dictionary
+        Arguments for PetriNet.run, the trace level, and whether there is a
+        trace file
+    """
+    global traceSink
+    # Only the main process writes to the trace file (see runReplicate)
+    traceSink = None
+    setTrace(settings['trace'])
+    if quiet:
+        blockPrint()
+    if settings['fileOutput'] and pn.outputFormat == 'store':
+        # Records are returned to the main process, which writes the store
+        pn.store = StoreWriter(None, pn, pn.runMode)
+    elif settings['fileOutput'] and settings['background']:
+        pn.output = OutputThread()
+    worker['pn'] = pn
+    worker['snap'] = pn.snapshot()
+    worker['seed'] = seed
+    worker['settings'] = settings
+
+def runReplicate(label):
+    """
+    Conducts one simulation in a worker process of repeatParallel
+
+    Parameters
+    ----------
+    label : integer
+        Label of the simulation
+
+    Returns
+    ----------
+    result : list
+        Simulation label, final clock, place statistics, transition fired
+        counts, history object (None if not recorded), output file paths,
+        store records (see StoreWriter.take), number of output rows, end
+        reason, and trace records (empty if there is no trace file)
+    """
+    pn = worker['pn']
+    pn.restore(worker['snap'])
+    pn.history = History()
+    pn.time = label
+    pn.rng = spawnRandom(worker['seed'], label)
+    pn.seed = worker['seed']
+    if worker['settings']['traceFile']:
+        # Trace records are returned to the main process, which writes them in label order
+        setTrace(sink=io.StringIO())
+    print('\n'+'='*80+'\nBeginning simulation %d:' % label)
+    lastFiles = pn.run(worker['settings']['maxSteps'], maxClock=worker['settings']['maxClock'], history=worker['settings']['history'], fileOutput=worker['settings']['fileOutput'], endOnly=worker['settings']['endOnly'])
+    if pn.output is not None:
+        # Files are complete before they are returned
+        pn.output.wait()
+    pStats = [[pn.places[p].ins, pn.places[p].outs, pn.places[p].totalTokenTime] for p in pn.places]
+    tStats = [pn.trans[t].firedCount for t in pn.trans]
+    return [label, pn.clock, pStats, tStats, pn.history if worker['settings']['history'] else None, lastFiles, pn.store.take() if pn.store is not None else [], pn.outputRows, pn.endReason, traceSink.getvalue() if traceSink is not None else '']
+
+def discardReplicates(pn, pool, queued):
+    """
+    Stops the workers of repeatParallel without waiting for the simulations
+    queued, and deletes the output files of those not collected
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net structure simulated
+    pool : multiprocessing.Pool object
+        Pool of worker processes
+    queued : collections.deque
+        Label and result (see runReplicate) of each simulation queued but
+        not collected
+    """
+    pool.terminate()
+    pool.join()
+    path = os.path.join(os.getcwd(), pn.name)
+    for label, result in queued:
+        if result.ready() and result.successful():
+            files = result.get()[5]
+        elif os.path.isdir(path):
+            # Interrupted simulations leave their files partly written
+            files = [os.path.join(path, name) for name in filter(os.listdir(path), 'Macchiato_PetriNet_*_%d.*' % label)]
+        else:
+            files = []
+        for file in files:
+            if file is not None:
+                try:
+                    os.remove(file)
+                except FileNotFoundError:
+                    pass
+    queued.clear()
 
-def repeat(pn, maxClock, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, start=0, history=True, fileOutput=True, endOnly=False, concatenate=False, analysisStep=1E2):#, log=True):
+def repeatParallel(pn, maxClock, workers, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, start=0, history=True, fileOutput=True, endOnly=False, concatenate=False, analysisStep=1E2, seed=None, online=False, stats=None, background=False):
     """
-    Automated repeated executions of a Petri Net
+    Automated repeated executions of a Petri Net, distributed across a pool
+    of processes. Each simulation draws from its own random number stream,
+    derived from the seed and its label, so the results are independent of
+    the number of workers, and match those of repeat with the same seed.
+    Results are collected in label order, and the simsFactor rule is
+    applied in that order, as by repeat; simulations started beyond the one
+    that reaches the total time limit are discarded, along with their
+    output files.
 
     Parameters
     ----------
@@ -2770,6 +6384,8 @@ def repeat(pn, maxClock, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, star
         The Petri Net structure to simulated
     maxClock : float
         The largest simulated time permitted in any one simulation
+    workers : integer
+        Number of processes
     maxSteps : float
         The largest number of simulation steps permitted in any one simulation
     simsFactor : float
@@ -2791,22 +6407,50 @@ def repeat(pn, maxClock, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, star
         Only the final stage of the Petri net is recorded when enabled.
     concatenate : boolean (Default: False)
         Condenses output files to one per type if enabled.
-    # log : boolean
-    #     Toggle log file
+    seed : integer (Default: None)
+        Seed of the set of simulations (see repeat)
+    online : boolean (Default: False)
+        See repeat
+    stats : HistoryStats object (Default: None)
+        See repeat
+    background : boolean (Default: False)
+        See repeat (each worker process, and the main process, in which
+        files are concatenated, has its own thread)
     """
-    if fixedNumber < 1:
+    if fixedNumber is not None and fixedNumber < 1:
         speak(f'{fixedNumber} simulations requested -- exiting.')
         return
     # Wall time log
     wall = int(time.time())
-    # Back Petri Net structure
-    backUp = copy.deepcopy(pn)
+    if seed is None:
+        seed = random.getrandbits(63)
+    if not pn.arcsVerified:
+        pn.verifyArcs()
+    # Output directory is created before the workers compete to do so
+    path = os.path.join(os.getcwd(), pn.name)
+    if fileOutput and not os.path.exists(path) and True in [pn.writePlaceFile, pn.writeTransFile, pn.writeFireFile]:
+        os.mkdir(path)
+    settings = {'maxSteps': maxSteps, 'maxClock': maxClock, 'history': history, 'fileOutput': fileOutput, 'endOnly': endOnly, 'trace': traceLevel, 'traceFile': traceSink is not None, 'background': background}
+    store = None
+    output = None
+    catFiles = None
+    if fileOutput and pn.outputFormat == 'store' and True in [pn.writePlaceFile, pn.writeTransFile, pn.writeFireFile]:
+        pn.seed = seed
+        store = StoreWriter(os.path.join(path, '%s_Store_%d' % (pn.name, pn.time)), pn, pn.runMode)
+    elif fileOutput and concatenate and True in [pn.writePlaceFile, pn.writeTransFile, pn.writeFireFile]:
+        pn.seed = seed
+        catFiles = openCatFiles(pn, pn.time)
+        if background:
+            output = OutputThread()
+    if traceSink is not None:
+        traceSink.flush()
 
-    i = 1 + start
     summary = ''
+    count = 0
     clock = 0.0
     histories = []
-    stop = False
+    if history and online and stats is None:
+        stats = HistoryStats(pn, maxClock, analysisStep)
     # Set up record of place history
     pStats = collections.OrderedDict()
     for p in pn.places:
@@ -2815,46 +6459,212 @@ def repeat(pn, maxClock, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, star
     tStats = collections.OrderedDict()
     for t in pn.trans:
         tStats[t] = 0
-    # Loop to run multiple simulations
 
-    # if log:
-    #     logF = open(os.path.join(os.getcwd(), 'log.txt'), 'w')
+    pool = multiprocessing.Pool(workers, initializer=initWorker, initargs=(pn, seed, print is silence, settings))
+    # Keep a few simulations queued for each worker
+    queued = collections.deque()
+    try:
+        label = start
+        done = False
+        while not done:
+            while len(queued) < 2*workers and (fixedNumber is None or label - start < fixedNumber):
+                label += 1
+                queued.append((label, pool.apply_async(runReplicate, (label,))))
+            ref, simClock, simP, simT, simHistory, lastFiles, records, rows, reason, traceRecords = queued[0][1].get()
+            queued.popleft()
+            if traceRecords:
+                traceSink.write(traceRecords)
+            if store is not None:
+                for record in records:
+                    store.add(*record)
+            elif catFiles is not None:
+                # Append to the concatenated files, indexing each part
+                for path, info in zip(lastFiles, ['Places', 'Trans', 'FireList']):
+                    if path is None:
+                        continue
+                    if output is not None:
+                        output.submit(catFiles[info].append, path, ref, rows, simClock, reason)
+                    else:
+                        catFiles[info].append(path, ref, rows, simClock, reason)
+            # Record place and transition history
+            for p, sp in zip(pStats, simP):
+                pStats[p][0] += sp[0]
+                pStats[p][1] += sp[1]
+                pStats[p][2] += sp[2]
+            for t, st in zip(tStats, simT):
+                tStats[t] += st
+            # Add to list of simulation histories, or to running statistics
+            if history and stats is not None:
+                stats.add(simHistory)
+            elif history:
+                histories.append(simHistory)
+            # Update aggregated simulation time accrued
+            clock += simClock
+            count += 1
+            # End loop if total time or simulation count limit has been reached
+            if (clock >= maxClock*simsFactor and fixedNumber is None) or count == fixedNumber:
+                done = True
+        # Discard simulations beyond the last required
+        discardReplicates(pn, pool, queued)
+    except BaseException:
+        # Stop the workers and writing output without masking the exception
+        discardReplicates(pn, pool, queued)
+        if output is not None:
+            output.close(check=False)
+            output = None
+        if catFiles is not None:
+            for file in catFiles.values():
+                file.close()
+            catFiles = None
+        raise
+    finally:
+        pool.close()
+        pool.join()
+        if store is not None:
+            store.close()
+    if output is not None:
+        output.close()
+    if catFiles is not None:
+        for file in catFiles.values():
+            file.close()
+    # Print simulations' wall time
+    wall = int(time.time() - wall)
+    summary = '='*80 + '\n%d simulations, total clock: %.5g %s (%.5g %s per simulation)\nSimulation wall time: %d seconds\nRandom seed: %s\n' % (count, clock, pn.units, clock/float(start + count), pn.units, wall, seed) + '='*80
+    print('\n\n%s' % summary)
+    # Write summary of simulations to file
+    writeSummary(pn, summary, pStats, tStats)
+
+    # Amalgamate results
+    if history:
+        analyseHistories(pn, histories, maxClock, analysisStep, stats=stats)
+
+def repeatBatch(pn, maxClock, batch, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, start=0, history=True, analysisStep=1E2, seed=None, online=False, stats=None):
+    """
+    Automated repeated executions of a Petri Net, simulated in groups of
+    replicates run in lockstep by a Batch object (requires NumPy). Only the
+    'schedule' run mode is supported, and no files are written for the
+    individual simulations.
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net structure to simulated
+    maxClock : float
+        The largest simulated time permitted in any one simulation
+    batch : integer
+        Number of simulations run in lockstep
+    maxSteps : float
+        The largest number of simulation steps permitted in any one simulation
+    simsFactor : float
+        Parametises the number of simulations conducted. Repetition of
+        simulations ends once the total simulated time supasses the product
+        of maxClock and simsFactor.
+    fixedNumber : integer (Default: None)
+        Set exact number of simulations to perform, overruling simsFactor and
+        maxClock parameters.
+    start : integer (Default: 0)
+        Starting offset for simulation label counter
+    history : boolean
+        Collects and aggregates data if True
+    analysisStep : float
+        Time resolution of post-simulation analysis
+    seed : integer (Default: None)
+        Seed of the NumPy random number generator shared by all simulations
+        (results depend on both the seed and the batch size)
+    online : boolean (Default: False)
+        See repeat
+    stats : HistoryStats object (Default: None)
+        See repeat
+    """
+    if np is None:
+        raise ImportError('NumPy is required for batch simulation')
+    if pn.runMode != 'schedule':
+        raise ValueError('Batch simulation only supports the "schedule" run mode, not "%s"' % pn.runMode)
+    if batch < 1:
+        raise ValueError('Batch size must be at least one, not %r' % batch)
+    if fixedNumber is not None and fixedNumber < 1:
+        speak(f'{fixedNumber} simulations requested -- exiting.')
+        return
+    # Wall time log
+    wall = int(time.time())
+    if pn.connectivity is None:
+        pn.buildConnectivity()
+    conn = pn.connectivity
+    if seed is None:
+        seed = random.getrandbits(63)
+    rng = np.random.default_rng(seed)
+
+    count = 0
+    clock = 0.0
+    histories = []
+    if history and online and stats is None:
+        stats = HistoryStats(pn, maxClock, analysisStep)
+    ins = np.zeros(len(conn.places), dtype=np.int64)
+    outs = np.zeros(len(conn.places), dtype=np.int64)
+    tokenTime = np.zeros(len(conn.places))
+    fired = np.zeros(len(conn.trans), dtype=np.int64)
     while True:
-        # if log:
-        #     logF.write('%r >>> Beginning simulation %d\n' % (datetime.now().strftime('%d/%m/%Y %H:%M:%S'), i))
-        print('\n'+'='*80+'\nBeginning simulation %d:' % i)
-        pn.time = i
-        # Run simulation
-        lastFiles = pn.run(maxSteps, maxClock=maxClock, history=history, fileOutput=fileOutput, endOnly=endOnly)
-        if fileOutput and concatenate:
-            catResults(lastFiles, pn.name, pn.time, backUp.time, pn.writePlaceFile, pn.writeTransFile, pn.writeFireFile)
-        # Record place history
-        for p in pn.places:
-            pStats[p][0] += pn.places[p].ins
-            pStats[p][1] += pn.places[p].outs
-            pStats[p][2] += pn.places[p].totalTokenTime
-        # Record transition history
-        for t in pn.trans:
-            tStats[t] += pn.trans[t].firedCount
-        # Add to list of simulation histories
-        if history:
-            histories.append(copy.deepcopy(pn.history))
+        n = batch if fixedNumber is None else min(batch, fixedNumber - count)
+        print('\n'+'='*80+'\nBeginning simulations %d to %d:' % (start + count + 1, start + count + n))
+        sims = Batch(pn, n, rng=rng)
+        sims.run(maxSteps, maxClock=maxClock, history=history)
+        # Keep simulations up to the one in which the total time limit is reached
+        if fixedNumber is None:
+            total = clock + np.cumsum(sims.clock)
+            over = np.flatnonzero(total >= maxClock*simsFactor)
+            if len(over):
+                n = over[0] + 1
+        # Record place and transition history
+        ins += sims.ins[:n].sum(axis=0)
+        outs += sims.outs[:n].sum(axis=0)
+        tokenTime += sims.totalTokenTime[:n].sum(axis=0)
+        fired += sims.firedCount[:n].sum(axis=0)
+        # Add to list of simulation histories, or to running statistics
+        if history and stats is not None:
+            for simHistory in sims.histories(n):
+                stats.add(simHistory)
+        elif history:
+            histories += sims.histories(n)
         # Update aggregated simulation time accrued
-        clock += pn.clock
+        for c in sims.clock[:n]:
+            clock += c
+        count += n
         # End loop if total time or simulation count limit has been reached
-        if (clock >= maxClock*simsFactor and fixedNumber is None) or i-start == fixedNumber:
+        if (clock >= maxClock*simsFactor and fixedNumber is None) or count == fixedNumber:
             # Print simulations' wall time
             wall = int(time.time() - wall)
-            summary = '='*80 + '\n%d simulations, total clock: %.5g %s (%.5g %s per simulation)\nSimulation wall time: %d seconds\n' % (i-start, clock, pn.units, clock/float(i), pn.units, wall) + '='*80
+            summary = '='*80 + '\n%d simulations, total clock: %.5g %s (%.5g %s per simulation)\nSimulation wall time: %d seconds\nRandom seed: %s\n' % (count, clock, pn.units, clock/float(start + count), pn.units, wall, seed) + '='*80
             print('\n\n%s' % summary)
             break
-        i += 1
-        # Restore orginal Petri Net state for the next iteration
-        pn = copy.deepcopy(backUp)
-    # if log:
-    #     logF.write('All simulations complete')
-    #     logF.close()
+
+    pStats = collections.OrderedDict()
+    for i, p in enumerate(conn.places):
+        pStats[p] = [int(ins[i]), int(outs[i]), float(tokenTime[i])]
+    tStats = collections.OrderedDict()
+    for i, t in enumerate(conn.trans):
+        tStats[t] = int(fired[i])
     # Write summary of simulations to file
+    writeSummary(pn, summary, pStats, tStats)
+
+    # Amalgamate results
+    if history:
+        analyseHistories(pn, histories, maxClock, analysisStep, stats=stats)
+
+def writeSummary(pn, summary, pStats, tStats):
+    """
+    Writes summary of repeated simulations to file
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net simulated
+    summary : string
+        Description of the simulations conducted
+    pStats : collections.OrderedDict
+        Total tokens in, tokens out, and time with tokens for each place
+    tStats : collections.OrderedDict
+        Total number of firings for each transition
+    """
     file = open(os.path.join(os.getcwd(), '%s_Summary.txt' % pn.name) , 'w')
     file.write(summary)
     file.write('\n\nPlaces:\n')
@@ -2865,158 +6675,753 @@ def repeat(pn, maxClock, maxSteps=1E12, simsFactor=1.5E3, fixedNumber=None, star
         file.write('%s fired %d Times\n' % (t, tStats[t]))
     file.close()
 
-    # Amalgamate results -- may rewite this section in the future
-    if history:
-        # Record wall time
-        wall = int(time.time())
-        # Time section in the simulations that is being considered
-        cTime = 0.0
-
-        # Array-like objects to store data for places' tokens and resets and transitions' firing
-        pDataT = collections.OrderedDict()
-        pDataR = collections.OrderedDict()
-        tData = collections.OrderedDict()
-        pD = collections.OrderedDict()
-        tD = collections.OrderedDict()
-
-        # Summaries of data
-        summaryPT = collections.OrderedDict()
-        summaryPR = collections.OrderedDict()
-        summaryT  = collections.OrderedDict()
+def analyseHistories(pn, histories, maxClock, analysisStep, stats=None):
+    """
+    Aggregates the histories of repeated simulations into time-binned means
+    and standard errors, and writes them to file -- may rewite this in the
+    future
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net simulated
+    histories : list
+        History objects of each simulation
+    maxClock : float
+        The largest simulated time permitted in any one simulation
+    analysisStep : float
+        Time resolution of post-simulation analysis
+    stats : HistoryStats object (Default: None)
+        If given, its statistics are written, and histories is ignored
+    """
+    # Record wall time
+    wall = int(time.time())
+    if stats is not None:
+        summaryPT, summaryPR, summaryT, count = stats.summaries()
+    elif np is None:
+        summaryPT, summaryPR, summaryT, count = binHistoriesLoop(pn, histories, maxClock, analysisStep)
+    else:
+        summaryPT, summaryPR, summaryT, count = binHistories(pn, histories, maxClock, analysisStep)
+
+    # Write results to file
+    writeTime = int(time.time())
+    writeRepeatStats(summaryPT, analysisStep, count, '%s_tokenStats' % pn.name, writeTime, pn.compression, pn.compressionLevel)
+    writeRepeatStats(summaryPR, analysisStep, count, '%s_resetStats' % pn.name, writeTime, pn.compression, pn.compressionLevel)
+    writeRepeatStats(summaryT, analysisStep, count, '%s_transStats' % pn.name, writeTime, pn.compression, pn.compressionLevel)
+
+    # Print wall time
+    wall = int(time.time()) - wall
+    print('Analysis wall time: %d seconds' % wall)
+
+def binHistories(pn, histories, maxClock, analysisStep):
+    """
+    Time-bins the histories of repeated simulations for analyseHistories,
+    with NumPy (see binHistory). Gives the same results as binHistoriesLoop.
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net simulated
+    histories : list
+        History objects of each simulation
+    maxClock : float
+        The largest simulated time permitted in any one simulation
+    analysisStep : float
+        Time resolution of post-simulation analysis
+
+    Returns
+    ----------
+    summaryPT : collections.OrderedDict
+        [mean, standard error, count] of each place's tokens in each bin
+    summaryPR : collections.OrderedDict
+        As summaryPT, for each place's resets
+    summaryT : collections.OrderedDict
+        As summaryPT, for each transition's fired count
+    count : integer
+        Number of bins
+    """
+    starts = binStarts(maxClock, analysisStep)
+    count = len(starts)
+    columns = 2*len(pn.places) + len(pn.trans)
+
+    # Bin averages (NaN where a simulation has no data) of each column: places' tokens, places' resets, and transitions' fired counts
+    values = np.full((len(histories), count, columns), np.nan)
+    for h, history in enumerate(histories):
+        values[h] = binHistory(history, starts, analysisStep, columns)
+
+    # Mean and standard error of the mean over simulations
+    n = (~np.isnan(values[:,:,0])).sum(axis=0)
+    mean = np.zeros((count, columns))
+    se = np.zeros((count, columns))
+    some = n > 0
+    if some.any():
+        mean[some] = np.nansum(values[:,some], axis=0)/n[some][:,None]
+    many = n > 1
+    if many.any():
+        deviation = np.nansum((values[:,many] - mean[many])**2, axis=0)
+        se[many] = np.sqrt(deviation/(n[many][:,None] - 1))/np.sqrt(n[many])[:,None]
+
+    summaryPT, summaryPR, summaryT = binSummaries(pn.places, pn.trans, mean, se, n)
+    return summaryPT, summaryPR, summaryT, count
+
+def binStarts(maxClock, analysisStep):
+    """
+    Start times of the bins of the analysis of repeated simulations,
+    accumulated as by binHistoriesLoop
+
+    Parameters
+    ----------
+    maxClock : float
+        The largest simulated time permitted in any one simulation
+    analysisStep : float
+        Time resolution of post-simulation analysis
+
+    Returns
+    ----------
+    starts : numpy.ndarray
+        Start time of each bin
+    """
+    starts = []
+    cTime = 0.0
+    while True:
+        starts.append(cTime)
+        cTime += analysisStep
+        if cTime > maxClock:
+            break
+    return np.array(starts)
+
+def binHistory(history, starts, analysisStep, columns):
+    """
+    Time-bins the history of one simulation, with NumPy. The place and
+    transition records are treated as step functions of the clock,
+    integrated over each bin using cumulative sums and the steps bounding
+    the bin (found by np.searchsorted), and averaged over the bin.
+
+    Parameters
+    ----------
+    history : History object
+        History of the simulation
+    starts : numpy.ndarray
+        Start time of each bin (see binStarts)
+    analysisStep : float
+        Time resolution of post-simulation analysis
+    columns : integer
+        Number of columns (twice the number of places, plus the number of
+        transitions)
+
+    Returns
+    ----------
+    values : numpy.ndarray
+        Average of each column (places' tokens, places' resets, and
+        transitions' fired counts) in each bin, NaN where the simulation has
+        no data
+    """
+    ends = starts + analysisStep
+    values = np.full((len(starts), columns), np.nan)
+    clock, tokens, resets, fired = history.arrays()
+    if not len(clock):
+        return values
+    data = np.concatenate([tokens, resets, fired], axis=1).astype(np.float64)
+    # Integral of each column from the first step to each step
+    cumulative = np.zeros_like(data)
+    cumulative[1:] = np.cumsum(np.diff(clock)[:,None]*data[:-1], axis=0)
+    # First step at or after the start and end of each bin
+    first = np.searchsorted(clock, starts, side='left')
+    last = np.searchsorted(clock, ends, side='left')
+    closed = last < len(clock)
+    # The state at the start of each bin is taken from the simulation's final step
+    final = data[-1]
+    steps = last > first
+    # Bins with steps: from the start of the bin to the first step, between steps, and from the last step to the end of the bin (if reached)
+    i0 = np.minimum(first, len(clock) - 1)
+    i1 = np.maximum(last - 1, 0)
+    total = (clock[i0] - starts)[:,None]*final + cumulative[i1] - cumulative[i0]
+    total += np.where(closed, ends - clock[i1], 0.0)[:,None]*data[i1]
+    # Bins without steps, but before the end of the simulation
+    total = np.where(steps[:,None], total, (ends - starts)[:,None]*final)
+    valid = steps | closed
+    values[valid] = total[valid]/float(analysisStep)
+    return values
+
+def binSummaries(places, trans, mean, se, n):
+    """
+    Arranges time-binned statistics of repeated simulations by place and
+    transition, for writeRepeatStats
+
+    Parameters
+    ----------
+    places : iterable
+        Place labels, in column order
+    trans : iterable
+        Transition labels, in column order
+    mean : numpy.ndarray
+        Mean of each column (see binHistory) in each bin
+    se : numpy.ndarray
+        Standard error of the mean of each column in each bin
+    n : numpy.ndarray
+        Number of simulations with data in each bin
+
+    Returns
+    ----------
+    summaryPT : collections.OrderedDict
+        [mean, standard error, count] of each place's tokens in each bin
+    summaryPR : collections.OrderedDict
+        As summaryPT, for each place's resets
+    summaryT : collections.OrderedDict
+        As summaryPT, for each transition's fired count
+    """
+    nP = len(places)
+    summaryPT = collections.OrderedDict()
+    summaryPR = collections.OrderedDict()
+    summaryT = collections.OrderedDict()
+    n = n.astype(np.float64).tolist()
+    for j, p in enumerate(places):
+        summaryPT[p] = [list(v) for v in zip(mean[:,j].tolist(), se[:,j].tolist(), n)]
+        summaryPR[p] = [list(v) for v in zip(mean[:,nP+j].tolist(), se[:,nP+j].tolist(), n)]
+    for j, t in enumerate(trans):
+        summaryT[t] = [list(v) for v in zip(mean[:,2*nP+j].tolist(), se[:,2*nP+j].tolist(), n)]
+    return summaryPT, summaryPR, summaryT
+
+class HistoryStats(object):
+    """
+    Running time-binned statistics of the histories of repeated simulations
+    (requires NumPy). Each history is binned as it is added, and folded into
+    the mean and sum of squared deviations of each bin by Welford's method,
+    so memory use depends on the numbers of bins, places, and transitions,
+    but not on the number of simulations. The statistics so far may be read
+    at any time with the summaries method.
+
+    Attributes
+    ----------
+    places : tuple
+        Place labels, in column order
+    trans : tuple
+        Transition labels, in column order
+    analysisStep : float
+        Time resolution of the analysis
+    starts : numpy.ndarray
+        Start time of each bin
+    added : integer
+        Number of histories added
+    n : numpy.ndarray
+        Number of simulations with data in each bin
+    mean : numpy.ndarray
+        Running mean of each column (see binHistory) in each bin
+    m2 : numpy.ndarray
+        Running sum of squared deviations from the mean of each column in
+        each bin
+    """
+    def __init__(self, pn, maxClock, analysisStep):
+        """
+        Parameters
+        ----------
+        pn : PetriNet object
+            The Petri Net simulated
+        maxClock : float
+            The largest simulated time permitted in any one simulation
+        analysisStep : float
+            Time resolution of post-simulation analysis
+        """
+        if np is None:
+            raise ImportError('NumPy is required for online analysis of simulations')
+        self.places = tuple(pn.places)
+        self.trans = tuple(pn.trans)
+        self.analysisStep = analysisStep
+        self.starts = binStarts(maxClock, analysisStep)
+        self.added = 0
+        columns = 2*len(self.places) + len(self.trans)
+        self.n = np.zeros(len(self.starts), dtype=np.int64)
+        self.mean = np.zeros((len(self.starts), columns))
+        self.m2 = np.zeros((len(self.starts), columns))
+
+    def add(self, history):
+        """
+        Folds the history of a simulation into the statistics
+
+        Parameters
+        ----------
+        history : History object
+            History of the simulation
+        """
+        values = binHistory(history, self.starts, self.analysisStep, self.mean.shape[1])
+        valid = ~np.isnan(values[:,0])
+        self.n[valid] += 1
+        delta = values[valid] - self.mean[valid]
+        self.mean[valid] += delta/self.n[valid][:,None]
+        self.m2[valid] += delta*(values[valid] - self.mean[valid])
+        self.added += 1
+
+    def summaries(self):
+        """
+        Gives the statistics of the histories added so far
+
+        Returns
+        ----------
+        summaryPT, summaryPR, summaryT, count
+            See binHistories
+        """
+        se = np.zeros_like(self.mean)
+        many = self.n > 1
+        if many.any():
+            se[many] = np.sqrt(self.m2[many]/(self.n[many][:,None] - 1))/np.sqrt(self.n[many])[:,None]
+        summaryPT, summaryPR, summaryT = binSummaries(self.places, self.trans, self.mean, se, self.n)
+        return summaryPT, summaryPR, summaryT, len(self.starts)
+
+def binHistoriesLoop(pn, histories, maxClock, analysisStep):
+    """
+    Time-bins the histories of repeated simulations for analyseHistories,
+    without NumPy (see binHistories)
+
+    Parameters
+    ----------
+    See binHistories
+
+    Returns
+    ----------
+    See binHistories
+    """
+    # Time section in the simulations that is being considered
+    cTime = 0.0
+
+    # Array-like objects to store data for places' tokens and resets and transitions' firing
+    pDataT = collections.OrderedDict()
+    pDataR = collections.OrderedDict()
+    tData = collections.OrderedDict()
+    pD = collections.OrderedDict()
+    tD = collections.OrderedDict()
+
+    # Summaries of data
+    summaryPT = collections.OrderedDict()
+    summaryPR = collections.OrderedDict()
+    summaryT  = collections.OrderedDict()
+    for p in pn.places:
+        summaryPT[p] = []
+        summaryPR[p] = []
+    for t in pn.trans:
+        summaryT[t] = []
+
+    count = 0 # Number of entries
+    first = False # Indicates first data point in an entry
+    while True:
+        # Array-like set-up
         for p in pn.places:
-            summaryPT[p] = []
-            summaryPR[p] = []
+            pD[p] = []
+            pDataT[p] = []
+            pDataR[p] = []
         for t in pn.trans:
-            summaryT[t] = []
-
-        count = 0 # Number of entries
-        first = False # Indicates first data point in an entry
-        while True:
-            # Array-like set-up
+            tD[t] = []
+            tData[t] = []
+        for h in range(len(histories)):
             for p in pn.places:
                 pD[p] = []
-                pDataT[p] = []
-                pDataR[p] = []
             for t in pn.trans:
                 tD[t] = []
-                tData[t] = []
-            for h in range(len(histories)):
-                for p in pn.places:
-                    pD[p] = []
-                for t in pn.trans:
-                    tD[t] = []
-                first = False
-                # Loop through histories
-                for s in range(len(histories[h].clock)):
-                    if not first:
-                        first = True
-                        # Record data points at start of time range
-                        for p in pn.places:
-                            pD[p].append([cTime, histories[h].places[p][s-1][0], histories[h].places[p][s-1][1]])
-                        for t in pn.trans:
-                            tD[t].append([cTime, histories[h].trans[t][s-1]])
-                    # Record data points in time range
-                    if histories[h].clock[s] >= cTime and histories[h].clock[s] < cTime+analysisStep:
-                        for p in pn.places:
-                            pD[p].append([histories[h].clock[s], histories[h].places[p][s][0], histories[h].places[p][s][1]])
-                        for t in pn.trans:
-                            tD[t].append([histories[h].clock[s], histories[h].trans[t][s]])
-                    # Add final dummy data points when end of time range is reached and exit loop
-                    elif histories[h].clock[s] >= cTime+analysisStep:
-                        for p in pn.places:
-                            pD[p].append([cTime+analysisStep, None, None])
-                        for t in pn.trans:
-                            tD[t].append([cTime+analysisStep, None])
-                        first = False
-                        break
+            first = False
+            # Loop through histories
+            for s in range(len(histories[h].clock)):
+                if not first:
+                    first = True
+                    # Record data points at start of time range
+                    for p in pn.places:
+                        pD[p].append([cTime, histories[h].places[p][s-1][0], histories[h].places[p][s-1][1]])
+                    for t in pn.trans:
+                        tD[t].append([cTime, histories[h].trans[t][s-1]])
+                # Record data points in time range
+                if histories[h].clock[s] >= cTime and histories[h].clock[s] < cTime+analysisStep:
+                    for p in pn.places:
+                        pD[p].append([histories[h].clock[s], histories[h].places[p][s][0], histories[h].places[p][s][1]])
+                    for t in pn.trans:
+                        tD[t].append([histories[h].clock[s], histories[h].trans[t][s]])
+                # Add final dummy data points when end of time range is reached and exit loop
+                elif histories[h].clock[s] >= cTime+analysisStep:
+                    for p in pn.places:
+                        pD[p].append([cTime+analysisStep, None, None])
+                    for t in pn.trans:
+                        tD[t].append([cTime+analysisStep, None])
+                    first = False
+                    break
 
-                # Amalgamate data points in time range
-                for p in pn.places:
-                    vPT = 0
-                    vPR = 0
-                    if len(pD[p]) > 1:
-                        for i in range(len(pD[p])-1):
-                            # print(p,pD[p][i][0],pD[p][i][1],pD[p][i][1])
-                            vPT += (pD[p][i+1][0]-pD[p][i][0])*pD[p][i][1]
-                            vPR += (pD[p][i+1][0]-pD[p][i][0])*pD[p][i][2]
-                        # print('')
-                        pDataT[p].append(float(vPT)/float(analysisStep))
-                        pDataR[p].append(float(vPR)/float(analysisStep))
-                for t in pn.trans:
-                    vT = 0
-                    if len(tD[t]) > 1:
-                        for i in range(len(tD[t])-1):
-                            # print(t, tD[t][i])
-                            vT += (tD[t][i+1][0]-tD[t][i][0])*tD[t][i][1]
-                        tData[t].append(float(vT)/float(analysisStep))
-
-            # Summarise place data
+            # Amalgamate data points in time range
             for p in pn.places:
-                nn = len(pDataT[p])
-                assert nn == len(pDataR[p])
-                n = float(nn)
-                xPT = 0.0
-                xPR = 0.0
-                sPT = 0.0
-                sPR = 0.0
-                # Calculate the mean and its standard error
-                if n:
-                    for i in range(nn):
-                        xPT += pDataT[p][i]
-                        xPR += pDataR[p][i]
-                    xPT /= n
-                    xPR /= n
-                    for i in range(nn):
-                        sPT += (pDataT[p][i] - xPT)**2
-                        sPR += (pDataR[p][i] - xPR)**2
-                    if nn > 1:
-                        sPT /= (n-1)
-                        sPR /= (n-1)
-                        sPT = math.sqrt(sPT)/math.sqrt(n)
-                        sPR = math.sqrt(sPR)/math.sqrt(n)
-
-                summaryPT[p].append([xPT, sPT, n])
-                summaryPR[p].append([xPR, sPR, n])
-
-            # Summarise transition data
+                vPT = 0
+                vPR = 0
+                if len(pD[p]) > 1:
+                    for i in range(len(pD[p])-1):
+                        # print(p,pD[p][i][0],pD[p][i][1],pD[p][i][1])
+                        vPT += (pD[p][i+1][0]-pD[p][i][0])*pD[p][i][1]
+                        vPR += (pD[p][i+1][0]-pD[p][i][0])*pD[p][i][2]
+                    # print('')
+                    pDataT[p].append(float(vPT)/float(analysisStep))
+                    pDataR[p].append(float(vPR)/float(analysisStep))
             for t in pn.trans:
-                nn = len(tData[t])
-                n = float(len(tData[t]))
-                xT = 0.0
-                sT = 0.0
-                # Calculate the mean and its standard error
-                if n:
-                    for i in range(nn):
-                        xT += tData[t][i]
-                    xT /= n
-                    for i in range(nn):
-                        sT += (tData[t][i] - xT)**2
-                    if nn > 1:
-                        sT /= (n-1)
-                        sT = math.sqrt(sT)/math.sqrt(n)
-
-                summaryT[t].append([xT, sT, n])
-
-            # Advance clock and counter
-            cTime += analysisStep
-            count += 1
-            # Break loop when clock limit is reached
-            if cTime > maxClock:
-                break
+                vT = 0
+                if len(tD[t]) > 1:
+                    for i in range(len(tD[t])-1):
+                        # print(t, tD[t][i])
+                        vT += (tD[t][i+1][0]-tD[t][i][0])*tD[t][i][1]
+                    tData[t].append(float(vT)/float(analysisStep))
+
+        # Summarise place data
+        for p in pn.places:
+            nn = len(pDataT[p])
+            assert nn == len(pDataR[p])
+            n = float(nn)
+            xPT = 0.0
+            xPR = 0.0
+            sPT = 0.0
+            sPR = 0.0
+            # Calculate the mean and its standard error
+            if n:
+                for i in range(nn):
+                    xPT += pDataT[p][i]
+                    xPR += pDataR[p][i]
+                xPT /= n
+                xPR /= n
+                for i in range(nn):
+                    sPT += (pDataT[p][i] - xPT)**2
+                    sPR += (pDataR[p][i] - xPR)**2
+                if nn > 1:
+                    sPT /= (n-1)
+                    sPR /= (n-1)
+                    sPT = math.sqrt(sPT)/math.sqrt(n)
+                    sPR = math.sqrt(sPR)/math.sqrt(n)
+
+            summaryPT[p].append([xPT, sPT, n])
+            summaryPR[p].append([xPR, sPR, n])
+
+        # Summarise transition data
+        for t in pn.trans:
+            nn = len(tData[t])
+            n = float(len(tData[t]))
+            xT = 0.0
+            sT = 0.0
+            # Calculate the mean and its standard error
+            if n:
+                for i in range(nn):
+                    xT += tData[t][i]
+                xT /= n
+                for i in range(nn):
+                    sT += (tData[t][i] - xT)**2
+                if nn > 1:
+                    sT /= (n-1)
+                    sT = math.sqrt(sT)/math.sqrt(n)
+
+            summaryT[t].append([xT, sT, n])
+
+        # Advance clock and counter
+        cTime += analysisStep
+        count += 1
+        # Break loop when clock limit is reached
+        if cTime > maxClock:
+            break
+
+    return summaryPT, summaryPR, summaryT, count
+
+class CatFile(OutputFile):
+    """
+    A concatenated output file, to which the output of each simulation of
+    a set is appended, with an index: a sidecar file ('_Index.csv' in place
+    of the extension) giving the label, byte offset, length in bytes, number
+    of rows, final clock, and end reason (see PetriNet.endReason) of each
+    simulation's part of the file. Each part of a text file begins with a
+    separator line ('>>>>>,ref,<<<<<'), and parts of a binary fire list
+    follow a single header (see EventLog). If compressed, each part is
+    written as whole compressed streams, so that it can be decompressed
+    alone. See readCatIndex, readCatPart, catRanges, and splitCat.
+
+    Attributes
+    ----------
+    binary : boolean
+        Indicates a binary fire list
+    indexFile : filepointer
+        The index, opened for appending
+    position : integer
+        Byte offset of the end of the part last indexed
+    start : integer
+        Value of size at the end of the part last indexed
+    """
+    def __init__(self, path, pn=None, compression='none', level=None):
+        """
+        Parameters
+        ----------
+        path : string
+            Path of the file (*.csv, or *.mfl for a binary fire list),
+            without the compression extension
+        pn : PetriNet object
+            The Petri Net simulated, for the header of a new binary fire
+            list
+        compression : string
+            Compression (Default = 'none', see OutputFile)
+        level : integer
+            Compression level (Default = None)
+        """
+        OutputFile.__init__(self, path, compression, level, 'ab')
+        self.binary = path.endswith('.mfl')
+        if self.binary and not self.file.tell():
+            writeEventLogHeader(self, pn)
+            self.endStream()
+        self.position = self.file.tell()
+        self.start = self.size
+        self.indexFile = open(catIndexPath(self.name), 'a')
+        if not self.indexFile.tell():
+            self.indexFile.write('Ref,Offset,Length,Rows,Clock,End\n')
+
+    def index(self, ref, rows, clock, reason):
+        """
+        Indexes the part of the file written since the last part indexed
+
+        Parameters
+        ----------
+        ref : integer
+            Label of the simulation
+        rows : integer
+            Number of rows written for the simulation (for a binary fire
+            list, the number of records is indexed instead)
+        clock : float
+            Final clock value of the simulation
+        reason : string
+            Reason the simulation ended (see PetriNet.endReason)
+        """
+        self.endStream()
+        self.file.flush()
+        end = self.file.tell()
+        if self.binary:
+            rows = (self.size - self.start)//EventLog.record.size
+        self.indexFile.write('%d,%d,%d,%d,%r,%s\n' % (ref, self.position, end - self.position, rows, clock, reason))
+        self.position = end
+        self.start = self.size
+
+    def append(self, path, ref, rows, clock, reason):
+        """
+        Appends the output file of a simulation, which is then deleted, as a
+        new part (as for repeatParallel)
+
+        Parameters
+        ----------
+        path : string
+            Path of the output file
+        ref, rows, clock, reason
+            See index
+        """
+        if not self.binary and compressionOf(path) == self.compression:
+            # Copied as it is, after the separator (in its own stream)
+            self.write('>'*5 + ',%d,' % ref + '<'*5 + '\n')
+            self.endStream()
+            with open(path, 'rb') as lastFile:
+                shutil.copyfileobj(lastFile, self.file)
+        else:
+            with openResult(path, 'rb') as lastFile:
+                if self.binary:
+                    lastFile.seek(readEventLogHeader(lastFile))
+                else:
+                    self.write('>'*5 + ',%d,' % ref + '<'*5 + '\n')
+                shutil.copyfileobj(lastFile, self)
+        self.index(ref, rows, clock, reason)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        OutputFile.close(self)
+        self.indexFile.close()
+
+def openCatFiles(pn, time):
+    """
+    Opens the concatenated output files of a set of simulations, to which
+    the output of each simulation is appended directly (see
+    PetriNet.catFiles), with the same names as by catResults
+
+    Parameters
+    ----------
+    pn : PetriNet object
+        The Petri Net simulated
+    time : integer
+        UNIX timestamp to use in filenames
+
+    Returns
+    ----------
+    catFiles : dictionary
+        CatFile objects for each type written ('Places', 'Trans', and
+        'FireList')
+    """
+    checkCompression(pn.compression, pn.compressionLevel)
+    path = os.path.join(os.getcwd(), pn.name)
+    catFiles = {}
+    for info, writeFile in zip(['Places', 'Trans', 'FireList'], [pn.writePlaceFile, pn.writeTransFile, pn.writeFireFile]):
+        if not writeFile:
+            continue
+        if not os.path.exists(path):
+            os.mkdir(path)
+        ext = 'mfl' if info == 'FireList' and pn.fireFormat == 'binary' else 'csv'
+        label = 'PlaceDeltas' if info == 'Places' and pn.placeFormat == 'delta' else info
+        catFiles[info] = CatFile(os.path.join(path, f'{pn.name}_{label}_{time}.{ext}'), pn, pn.compression, pn.compressionLevel)
+    return catFiles
+
+def catIndexPath(path):
+    """
+    Gives the path of the index of a concatenated output file (see CatFile)
+
+    Parameters
+    ----------
+    path : string
+        Path of the concatenated file
+
+    Returns
+    ----------
+    path : string
+        Path of the index
+    """
+    return '%s_Index.csv' % os.path.splitext(stripCompression(path))[0]
+
+def readCatIndex(path):
+    """
+    Reads the index of a concatenated output file (see CatFile)
+
+    Parameters
+    ----------
+    path : string
+        Path of the concatenated file
 
-        # Write results to file
-        writeTime = int(time.time())
-        writeRepeatStats(summaryPT, analysisStep, count, '%s_tokenStats' % pn.name, writeTime)
-        writeRepeatStats(summaryPR, analysisStep, count, '%s_resetStats' % pn.name, writeTime)
-        writeRepeatStats(summaryT, analysisStep, count, '%s_transStats' % pn.name, writeTime)
+    Returns
+    ----------
+    index : collections.OrderedDict
+        [offset, length, rows, clock, end reason] of each simulation's part
+        of the file, by simulation label
+    """
+    index = collections.OrderedDict()
+    with open(catIndexPath(path), 'r') as file:
+        next(file)
+        for line in file:
+            ref, offset, length, rows, clock, reason = line.rstrip('\n').split(',')
+            index[int(ref)] = [int(offset), int(length), int(rows), float(clock), reason]
+    return index
+
+def readCatPart(path, ref, index=None):
+    """
+    Reads one simulation's part of a concatenated output file, found by
+    its index, without reading the rest of the file
+
+    Parameters
+    ----------
+    path : string
+        Path of the concatenated file
+    ref : integer
+        Label of the simulation
+    index : collections.OrderedDict
+        Index of the file, if already read (see readCatIndex)
+
+    Returns
+    ----------
+    part : string or bytes
+        Text of the simulation's output file (without the separator line),
+        or for a binary fire list, its records (decompressed if the file is
+        compressed)
+    """
+    if index is None:
+        index = readCatIndex(path)
+    offset, length = index[ref][:2]
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        part = decompress(file.read(length), compressionOf(path))
+    if stripCompression(path).endswith('.mfl'):
+        return part
+    return part.decode('utf-8').split('\n', 1)[1]
+
+def catRanges(path, parts, index=None):
+    """
+    Divides a concatenated output file into byte ranges of whole
+    simulations, of similar lengths, such as for analysis by separate
+    processes
+
+    Parameters
+    ----------
+    path : string
+        Path of the concatenated file
+    parts : integer
+        Number of ranges (at most one per simulation)
+    index : collections.OrderedDict
+        Index of the file, if already read (see readCatIndex)
 
-        # Print wall time
-        wall = int(time.time()) - wall
-        print('Analysis wall time: %d seconds' % wall)
+    Returns
+    ----------
+    ranges : list
+        [offset, length, refs] of each range, where refs lists the labels
+        of its simulations
+    """
+    if index is None:
+        index = readCatIndex(path)
+    total = sum([entry[1] for entry in index.values()])
+    ranges = []
+    done = 0
+    for ref, entry in index.items():
+        offset, length = entry[:2]
+        if not ranges or offset != ranges[-1][0] + ranges[-1][1] or (len(ranges) < parts and done + length/2.0 >= total*len(ranges)/float(parts)):
+            ranges.append([offset, 0, []])
+        ranges[-1][1] += length
+        ranges[-1][2].append(ref)
+        done += length
+    return ranges
+
+def splitCatRange(path, outdir, offset, length, refs, index):
+    """
+    Writes the parts of a range of a concatenated output file to separate
+    files, with the same compression, for splitCat
+    """
+    compression = compressionOf(path)
+    info = os.path.basename(path).rsplit('_', 2)[-2]
+    ext = os.path.splitext(stripCompression(path))[1]
+    header = b''
+    if ext == '.mfl':
+        with openResult(path, 'rb') as file:
+            start = readEventLogHeader(file)
+            file.seek(0)
+            header = file.read(start)
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        for ref in refs:
+            part = decompress(file.read(index[ref][1]), compression)
+            if ext != '.mfl':
+                part = part.split(b'\n', 1)[1]
+            out = OutputFile(os.path.join(outdir, 'Macchiato_PetriNet_%s_%d%s' % (info, ref, ext)), compression)
+            out.write(header + part)
+            out.close()
+
+def splitCat(path, outdir=None, workers=None):
+    """
+    Splits a concatenated output file into the separate files of each
+    simulation, as written without concatenation, using its index to
+    divide the work between processes
+
+    Parameters
+    ----------
+    path : string
+        Path of the concatenated file
+    outdir : string
+        Directory for the separate files (Default = None, for the directory
+        of the concatenated file)
+    workers : integer
+        Number of processes (Default = None, for one)
+    """
+    if outdir is None:
+        outdir = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+    index = readCatIndex(path)
+    ranges = catRanges(path, workers if workers is not None else 1, index)
+    if workers is None or workers < 2:
+        for offset, length, refs in ranges:
+            splitCatRange(path, outdir, offset, length, refs, index)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        pool.starmap(splitCatRange, [(path, outdir, offset, length, refs, {ref: index[ref] for ref in refs}) for offset, length, refs in ranges])
 
 def catResults(lastFiles, name, ref, time, writePlaceFile, writeTransFile, writeFireFile):
     """
-    Appends last output files to concatenated file
+    Appends last output files to concatenated file. Simulations no longer
+    call this, appending their output to the files opened by openCatFiles
+    instead; it is kept as a public helper for existing scripts, and writes
+    uncompressed files only
 
     Parameters
     ----------
@@ -3046,7 +7451,21 @@ def catResults(lastFiles, name, ref, time, writePlaceFile, writeTransFile, write
             dir = None
     assert dir is not None
     for path, info, writeFile in zip(lastFiles, ['Places', 'Trans', 'FireList'], [writePlaceFile, writeTransFile, writeFireFile]):
-        if writeFile:
+        if writeFile and path.endswith('.mfl'):
+            # Binary fire list records are labelled by simulation, so are appended without a separator, after a single header
+            allPath = os.path.join(dir, f'{name}_{info}_{time}.mfl')
+            with open(path, 'rb') as lastFile:
+                offset = readEventLogHeader(lastFile)
+                lastFile.seek(0)
+                with open(allPath, 'ab') as allFile:
+                    if allFile.tell():
+                        lastFile.seek(offset)
+                    shutil.copyfileobj(lastFile, allFile)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        elif writeFile:
             # inter = ('>'*5+','+os.path.basename(path)+','+'<'*5+'\n').encode('utf-8')
             # inter = (('>'*5+',')*3+'\n').encode('utf-8')
             inter = ('>'*5+f',{ref},'+'<'*5+'\n').encode('utf-8')
@@ -3061,7 +7480,7 @@ def catResults(lastFiles, name, ref, time, writePlaceFile, writeTransFile, write
                 pass
 
 
-def writeRepeatStats(summary, analysisStep, count, name, time):
+def writeRepeatStats(summary, analysisStep, count, name, time, compression='none', level=None):
     """
     Writes statistical data from repeat method to .csv file
 
@@ -3075,10 +7494,14 @@ def writeRepeatStats(summary, analysisStep, count, name, time):
         Number of data points
     time : integer
         UNIX timestamp to use in filename
+    compression : string
+        Compression of the file (Default = 'none', see OutputFile)
+    level : integer
+        Compression level (Default = None)
     """
     # Create file
     path = os.path.join(os.getcwd(), '%s_%d.csv' % (name, time))
-    file = open(path, 'w')
+    file = OutputFile(path, compression, level)
     # Write first two column headers
     file.write('Step,Clock')
     # Write column headers for relevant Petri Nodes